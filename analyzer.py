@@ -1,6 +1,11 @@
-VERSION = "1.0.7"  # Incrémenté de 1.0.6 pour ajout analyse Bollinger et divergences RSI
+VERSION = "1.0.16"  # Incrémenté de 1.0.15 pour clé du cache d'alignement par empreinte blake2b (sans collision de hash())
 
+import hashlib
+import threading
+from dataclasses import dataclass, field
+import cachetools
 import pandas as pd
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,8 +17,131 @@ TVL_THRESHOLD = 1_000_000_000
 VOLUME_RATIO_THRESHOLD = 0.01
 SPY_THRESHOLD = 400  # Ajusté pour ETF SPY
 
-def _check_mtfa_trend(price_data_dict, interval_input, is_bullish):
+# Indicateurs lus par l'analyse, à demander à calculate_indicators(..., features=REQUIRED_FEATURES)
+REQUIRED_FEATURES = [
+    "ATR_14", "EMA_12", "EMA_20", "EMA_26", "MACD", "MACD_SIGNAL", "RSI", "ADX", "SUPPORT", "RESISTANCE",
+    "FIBO_0.382", "FIBO_0.618", "BB_UPPER", "BB_LOWER", "RSI_DIVERGENCE", "VOLATILITY_20", "VOLUME_MA_20",
+]
+ALIGN_CACHE_SIZE = 64  # Alignements MTFA (positions) mémorisés, réutilisés d'un jeu de paramètres à l'autre
+
+# Durée des bougies, pour aligner les intervalles MTFA barre par barre
+INTERVAL_TIMEDELTAS = {
+    "1h": pd.Timedelta(hours=1),
+    "4h": pd.Timedelta(hours=4),
+    "1d": pd.Timedelta(days=1),
+    "1w": pd.Timedelta(weeks=1),
+}
+
+# Poids par intervalle des règles techniques (sauf ADX)
+INTERVAL_WEIGHTS = {"1H": 1.2, "4H": 1.0, "1D": 0.8, "1W": 0.6}
+
+def _weights(values):
+    return field(default_factory=lambda: dict(values))
+
+@dataclass(frozen=True)
+class AnalyzerParams:
+    """Constantes de réglage de l'analyse technique et de la recommandation.
+
+    Les valeurs par défaut reproduisent le réglage historique ; les
+    dictionnaires sont indexés par intervalle (1.0 ou 0.05 pour un intervalle
+    absent, comme avant). Voir optimizer.py pour la recherche de paramètres.
+    """
+    # analyze_technical : poids par intervalle et points de chaque règle
+    rsi_weight: dict = _weights(INTERVAL_WEIGHTS)
+    macd_weight: dict = _weights(INTERVAL_WEIGHTS)
+    ema_weight: dict = _weights(INTERVAL_WEIGHTS)
+    adx_weight: dict = _weights({"1H": 1.0, "4H": 1.0, "1D": 1.2, "1W": 1.2})
+    volume_weight: dict = _weights(INTERVAL_WEIGHTS)
+    bb_weight: dict = _weights(INTERVAL_WEIGHTS)
+    div_weight: dict = _weights(INTERVAL_WEIGHTS)
+    rsi_points: float = 4
+    rsi_overbought: float = 65
+    rsi_oversold: float = 35
+    rsi_volatility_threshold: float = 5  # Volatilité (%) au-delà de laquelle les seuils RSI s'écartent
+    macd_points: float = 4
+    ema_points: float = 3
+    mtfa_points: int = 2
+    adx_points: float = 3
+    adx_threshold: float = 25
+    volume_points: float = 2
+    volume_spike: float = 2  # Volume > volume_spike × moyenne 20 périodes
+    bb_points: float = 3
+    div_points: float = 3
+    # generate_recommendation
+    score_weights: dict = _weights({"1H": (0.6, 0.2, 0.2), "4H": (0.5, 0.3, 0.2), "1D": (0.4, 0.3, 0.3), "1W": (0.3, 0.4, 0.3)})
+    mtfa_weight: dict = _weights({"1h": 0.1, "4h": 0.2, "1d": 0.3, "1w": 0.4})
+    volatility_cap: float = 10
+    score_threshold: float = 0.3
+    confidence_scale: float = 4
+    volatility_factor: dict = _weights({"1H": 1.0, "4H": 1.5, "1D": 2.0, "1W": 3.0})
+    max_deviation: dict = _weights({"1H": 0.02, "4H": 0.03, "1D": 0.05, "1W": 0.10})
+    min_spread: float = 0.5  # Écart minimal (%) entre prix d'achat et de vente
+    min_upside: float = 0.02  # Un BUY sans objectif au-delà de +2 % devient HOLD
+
+DEFAULT_PARAMS = AnalyzerParams()
+
+class MTFAContext:
+    """Contexte d'analyse multi-intervalles partagé par analyze_technical et generate_recommendation.
+
+    Les dernières lignes, les confirmations de tendance et les scores techniques
+    de chaque intervalle de price_data_dict ne sont calculés qu'une fois.
+    """
+
+    def __init__(self, price_data_dict, params=None):
+        self.price_data_dict = price_data_dict
+        self.params = params or DEFAULT_PARAMS
+        self._last_rows = {}
+        self._trends = {}
+        self._technical = {}
+
+    def last_row(self, timeframe):
+        """Dernière ligne de l'intervalle, ou None s'il est absent ou vide."""
+        if timeframe not in self._last_rows:
+            df = self.price_data_dict.get(timeframe)
+            self._last_rows[timeframe] = None if df is None or df.empty else df.iloc[-1]
+        return self._last_rows[timeframe]
+
+    def trend_confirmed(self, is_bullish):
+        """Confirmation MTFA (4h, 1d, 1w) de la tendance haussière ou baissière."""
+        if is_bullish not in self._trends:
+            confirmed = True
+            for timeframe in ["4h", "1d", "1w"]:
+                tf_last = self.last_row(timeframe)
+                if tf_last is None:
+                    continue
+                if (is_bullish and tf_last["EMA_12"] < tf_last["EMA_26"]) or (not is_bullish and tf_last["EMA_12"] > tf_last["EMA_26"]):
+                    confirmed = False
+                    break
+            self._trends[is_bullish] = confirmed
+        return self._trends[is_bullish]
+
+    def technical(self, interval):
+        """Score et détails techniques de l'intervalle, calculés au premier appel."""
+        interval = interval.lower()
+        if interval not in self._technical:
+            analyze_technical(self.price_data_dict[interval], interval.upper(), self.price_data_dict, mtfa_context=self, params=self.params)
+        return self._technical[interval]
+
+    def set_technical(self, interval, result):
+        """Mémorise le résultat (score, détails) de analyze_technical pour l'intervalle."""
+        self._technical[interval.lower()] = result
+
+    def has(self, interval):
+        """Vrai si l'intervalle est disponible et non vide."""
+        return self.last_row(interval.lower()) is not None
+
+def _context_params(mtfa_context, params):
+    """Réglage effectif : celui du contexte MTFA s'il est fourni ; un params différent est refusé."""
+    if mtfa_context is None:
+        return params or DEFAULT_PARAMS
+    if params is not None and params is not mtfa_context.params:
+        raise ValueError("params diffère de mtfa_context.params : passer le réglage à MTFAContext")
+    return mtfa_context.params
+
+def _check_mtfa_trend(price_data_dict, interval_input, is_bullish, mtfa_context=None):
     """Vérifie la tendance MTFA pour haussier ou baissier."""
+    if mtfa_context is not None:
+        return mtfa_context.trend_confirmed(is_bullish)
     trend_confirmed = True
     for timeframe in ["4h", "1d", "1w"]:
         if timeframe in price_data_dict and not price_data_dict[timeframe].empty:
@@ -26,13 +154,31 @@ def _check_mtfa_trend(price_data_dict, interval_input, is_bullish):
                 break
     return trend_confirmed
 
-def analyze_technical(df, interval_input, price_data_dict):
-    """Analyse technique avec seuils dynamiques et MTFA."""
+def _volatility(df):
+    """Volatilité (%) sur 20 périodes par barre : colonne VOLATILITY_20 des indicateurs, recalculée si absente."""
+    if "VOLATILITY_20" in df.columns:
+        return df["VOLATILITY_20"]
+    return df["close"].pct_change().rolling(window=20).std() * 100
+
+def _volume_mean(df):
+    """Volume moyen sur 20 périodes par barre : colonne VOLUME_MA_20 des indicateurs, recalculée si absente."""
+    if "VOLUME_MA_20" in df.columns:
+        return df["VOLUME_MA_20"]
+    return df["volume"].rolling(window=20).mean()
+
+def analyze_technical(df, interval_input, price_data_dict, mtfa_context=None, params=None):
+    """Analyse technique avec seuils dynamiques et MTFA.
+
+    Avec mtfa_context, le résultat y est mémorisé pour generate_recommendation.
+    params (AnalyzerParams) remplace le réglage par défaut ; avec mtfa_context,
+    c'est le réglage du contexte (ValueError si params en diffère).
+    """
     interval_input = interval_input.upper()
+    p = _context_params(mtfa_context, params)
     last = df.iloc[-1]
     price = last["close"]
     atr = last["ATR_14"]
-    volatility = df["close"].pct_change().rolling(window=20).std().iloc[-1] * 100
+    volatility = _volatility(df).iloc[-1]
     if pd.isna(volatility) or volatility == 0:
         volatility = 1.0
 
@@ -40,79 +186,82 @@ def analyze_technical(df, interval_input, price_data_dict):
     technical_details = []
 
     # Seuils RSI
-    rsi_weight = {"1H": 1.2, "4H": 1.0, "1D": 0.8, "1W": 0.6}.get(interval_input, 1.0)
-    rsi_overbought = 65 + (volatility if volatility > 5 else 0)
-    rsi_oversold = 35 - (volatility if volatility > 5 else 0)
+    rsi_weight = p.rsi_weight.get(interval_input, 1.0)
+    rsi_points = int(p.rsi_points * rsi_weight)
+    rsi_overbought = p.rsi_overbought + (volatility if volatility > p.rsi_volatility_threshold else 0)
+    rsi_oversold = p.rsi_oversold - (volatility if volatility > p.rsi_volatility_threshold else 0)
     if last["RSI"] > rsi_overbought:
-        technical_score -= int(4 * rsi_weight)
-        technical_details.append(f"RSI > {rsi_overbought:.2f} : suracheté (-{int(4 * rsi_weight)})")
+        technical_score -= rsi_points
+        technical_details.append(f"RSI > {rsi_overbought:.2f} : suracheté (-{rsi_points})")
     elif last["RSI"] < rsi_oversold:
-        technical_score += int(4 * rsi_weight)
-        technical_details.append(f"RSI < {rsi_oversold:.2f} : survendu (+{int(4 * rsi_weight)})")
+        technical_score += rsi_points
+        technical_details.append(f"RSI < {rsi_oversold:.2f} : survendu (+{rsi_points})")
 
     # MACD
-    macd_weight = {"1H": 1.2, "4H": 1.0, "1D": 0.8, "1W": 0.6}.get(interval_input, 1.0)
+    macd_points = int(p.macd_points * p.macd_weight.get(interval_input, 1.0))
     if last["MACD"] > last["MACD_SIGNAL"]:
-        technical_score += int(4 * macd_weight)
-        technical_details.append(f"MACD haussier (+{int(4 * macd_weight)})")
+        technical_score += macd_points
+        technical_details.append(f"MACD haussier (+{macd_points})")
     elif last["MACD"] < last["MACD_SIGNAL"]:
-        technical_score -= int(4 * macd_weight)
-        technical_details.append(f"MACD baissier (-{int(4 * macd_weight)})")
+        technical_score -= macd_points
+        technical_details.append(f"MACD baissier (-{macd_points})")
 
     # EMA avec MTFA
-    ema_weight = {"1H": 1.2, "4H": 1.0, "1D": 0.8, "1W": 0.6}.get(interval_input, 1.0)
+    ema_points = int(p.ema_points * p.ema_weight.get(interval_input, 1.0))
     if last["EMA_12"] > last["EMA_26"]:
-        technical_score += int(3 * ema_weight)
-        technical_details.append(f"EMA 12 > EMA 26 : haussier (+{int(3 * ema_weight)})")
-        if _check_mtfa_trend(price_data_dict, interval_input, is_bullish=True):
-            technical_score += 2
-            technical_details.append("Tendance haussière confirmée par MTFA (+2)")
+        technical_score += ema_points
+        technical_details.append(f"EMA 12 > EMA 26 : haussier (+{ema_points})")
+        if _check_mtfa_trend(price_data_dict, interval_input, is_bullish=True, mtfa_context=mtfa_context):
+            technical_score += p.mtfa_points
+            technical_details.append(f"Tendance haussière confirmée par MTFA (+{p.mtfa_points})")
     elif last["EMA_12"] < last["EMA_26"]:
-        technical_score -= int(3 * ema_weight)
-        technical_details.append(f"EMA 12 < EMA 26 : baissier (-{int(3 * ema_weight)})")
-        if _check_mtfa_trend(price_data_dict, interval_input, is_bullish=False):
-            technical_score -= 2
-            technical_details.append("Tendance baissière confirmée par MTFA (-2)")
+        technical_score -= ema_points
+        technical_details.append(f"EMA 12 < EMA 26 : baissier (-{ema_points})")
+        if _check_mtfa_trend(price_data_dict, interval_input, is_bullish=False, mtfa_context=mtfa_context):
+            technical_score -= p.mtfa_points
+            technical_details.append(f"Tendance baissière confirmée par MTFA (-{p.mtfa_points})")
 
     # ADX
-    adx_weight = {"1H": 1.0, "4H": 1.0, "1D": 1.2, "1W": 1.2}.get(interval_input, 1.0)
-    if last["ADX"] > 25:
+    adx_points = int(p.adx_points * p.adx_weight.get(interval_input, 1.0))
+    if last["ADX"] > p.adx_threshold:
         if last["close"] > last["EMA_20"]:
-            technical_score += int(3 * adx_weight)
-            technical_details.append(f"ADX > 25 et prix > EMA 20 : forte hausse (+{int(3 * adx_weight)})")
+            technical_score += adx_points
+            technical_details.append(f"ADX > {p.adx_threshold:g} et prix > EMA 20 : forte hausse (+{adx_points})")
         else:
-            technical_score -= int(3 * adx_weight)
-            technical_details.append(f"ADX > 25 et prix < EMA 20 : forte baisse (-{int(3 * adx_weight)})")
+            technical_score -= adx_points
+            technical_details.append(f"ADX > {p.adx_threshold:g} et prix < EMA 20 : forte baisse (-{adx_points})")
 
     # Volume
-    volume_weight = {"1H": 1.2, "4H": 1.0, "1D": 0.8, "1W": 0.6}.get(interval_input, 1.0)
-    avg_volume = df["volume"].rolling(window=20).mean().iloc[-1]
-    if avg_volume != 0 and last["volume"] > 2 * avg_volume:
+    volume_points = int(p.volume_points * p.volume_weight.get(interval_input, 1.0))
+    avg_volume = _volume_mean(df).iloc[-1]
+    if avg_volume != 0 and last["volume"] > p.volume_spike * avg_volume:
         if last["close"] > last["EMA_20"]:
-            technical_score += int(2 * volume_weight)
-            technical_details.append(f"Volume élevé et prix > EMA 20 : haussier (+{int(2 * volume_weight)})")
+            technical_score += volume_points
+            technical_details.append(f"Volume élevé et prix > EMA 20 : haussier (+{volume_points})")
         else:
-            technical_score -= int(2 * volume_weight)
-            technical_details.append(f"Volume élevé et prix < EMA 20 : baissier (-{int(2 * volume_weight)})")
+            technical_score -= volume_points
+            technical_details.append(f"Volume élevé et prix < EMA 20 : baissier (-{volume_points})")
 
     # Bandes de Bollinger
-    bb_weight = {"1H": 1.2, "4H": 1.0, "1D": 0.8, "1W": 0.6}.get(interval_input, 1.0)
+    bb_points = int(p.bb_points * p.bb_weight.get(interval_input, 1.0))
     if last["close"] <= last["BB_LOWER"]:
-        technical_score += int(3 * bb_weight)
-        technical_details.append(f"Prix <= BB_LOWER : survendu (+{int(3 * bb_weight)})")
+        technical_score += bb_points
+        technical_details.append(f"Prix <= BB_LOWER : survendu (+{bb_points})")
     elif last["close"] >= last["BB_UPPER"]:
-        technical_score -= int(3 * bb_weight)
-        technical_details.append(f"Prix >= BB_UPPER : suracheté (-{int(3 * bb_weight)})")
+        technical_score -= bb_points
+        technical_details.append(f"Prix >= BB_UPPER : suracheté (-{bb_points})")
 
     # Divergences RSI
-    div_weight = {"1H": 1.2, "4H": 1.0, "1D": 0.8, "1W": 0.6}.get(interval_input, 1.0)
+    div_points = int(p.div_points * p.div_weight.get(interval_input, 1.0))
     if last["RSI_DIVERGENCE"] == 1:
-        technical_score += int(3 * div_weight)
-        technical_details.append(f"Divergence haussière RSI (+{int(3 * div_weight)})")
+        technical_score += div_points
+        technical_details.append(f"Divergence haussière RSI (+{div_points})")
     elif last["RSI_DIVERGENCE"] == -1:
-        technical_score -= int(3 * div_weight)
-        technical_details.append(f"Divergence baissière RSI (-{int(3 * div_weight)})")
+        technical_score -= div_points
+        technical_details.append(f"Divergence baissière RSI (-{div_points})")
 
+    if mtfa_context is not None:
+        mtfa_context.set_technical(interval_input, (technical_score, technical_details))
     return technical_score, technical_details
 
 def analyze_fundamental(fundamental_data):
@@ -231,58 +380,59 @@ def analyze_macro(macro_data, interval_input):
 
     return macro_score, macro_details
 
-def generate_recommendation(df, technical_score, fundamental_score, macro_score, interval_input, price_data_dict):
-    """Génère la recommandation avec MTFA."""
+def generate_recommendation(df, technical_score, fundamental_score, macro_score, interval_input, price_data_dict, mtfa_context=None, params=None):
+    """Génère la recommandation avec MTFA.
+
+    Passer le mtfa_context utilisé par analyze_technical évite de recalculer
+    les scores techniques des autres intervalles. Le réglage est alors celui du
+    contexte : ValueError si params en diffère.
+    """
     interval_input = interval_input.upper()
+    p = _context_params(mtfa_context, params)
+    if mtfa_context is None:
+        mtfa_context = MTFAContext(price_data_dict, p)
     last = df.iloc[-1]
     price = last["close"]
     atr = last["ATR_14"]
-    volatility = df["close"].pct_change().rolling(window=20).std().iloc[-1] * 100
+    volatility = _volatility(df).iloc[-1]
     if pd.isna(volatility) or volatility == 0:
         volatility = 1.0
-    capped_volatility = min(volatility, 10)  # Limiter l'impact
+    capped_volatility = min(volatility, p.volatility_cap)  # Limiter l'impact
 
     # Calcul des scores techniques MTFA
     intervals = ["1h", "4h", "1d", "1w"]
     technical_scores = {interval_input.lower(): technical_score}
     for interval in intervals:
-        if interval != interval_input.lower() and interval in price_data_dict and not price_data_dict[interval].empty:
-            score, _ = analyze_technical(price_data_dict[interval], interval.upper(), price_data_dict)
+        if interval != interval_input.lower() and mtfa_context.has(interval):
+            score, _ = mtfa_context.technical(interval)
             technical_scores[interval] = score
 
     # Poids MTFA
-    weights = {
-        "1H": (0.6, 0.2, 0.2),
-        "4H": (0.5, 0.3, 0.2),
-        "1D": (0.4, 0.3, 0.3),
-        "1W": (0.3, 0.4, 0.3)
-    }
-    w_tech, w_fund, w_macro = weights[interval_input]
+    w_tech, w_fund, w_macro = p.score_weights[interval_input]
 
     # Ajustement score technique
-    mtfa_weight = {"1h": 0.1, "4h": 0.2, "1d": 0.3, "1w": 0.4}
     adjusted_technical_score = technical_score
     for interval, score in technical_scores.items():
         if interval != interval_input.lower():
-            weight = mtfa_weight.get(interval, 0)
+            weight = p.mtfa_weight.get(interval, 0)
             adjusted_technical_score += score * weight
 
     # Score total
     total_score = (adjusted_technical_score * w_tech + fundamental_score * w_fund + macro_score * w_macro) * (1 + capped_volatility / 200)
-    score_threshold = 0.3 * (1 + capped_volatility / 100)
+    score_threshold = p.score_threshold * (1 + capped_volatility / 100)
 
     if total_score > score_threshold:
         signal = "BUY"
-        confidence = total_score / (total_score + 4)
+        confidence = total_score / (total_score + p.confidence_scale)
     elif total_score < -score_threshold:
         signal = "SELL"
-        confidence = abs(total_score) / (abs(total_score) + 4)
+        confidence = abs(total_score) / (abs(total_score) + p.confidence_scale)
     else:
         signal = "HOLD"
         confidence = 0
 
     # Prix achat/vente
-    volatility_factor = {"1H": 1.0, "4H": 1.5, "1D": 2.0, "1W": 3.0}.get(interval_input, 1.0)
+    volatility_factor = p.volatility_factor.get(interval_input, 1.0)
     if signal == "BUY":
         buy_price = max(price - 0.5 * atr, last["SUPPORT"])
         sell_price = min(price + atr * volatility_factor, last["FIBO_0.618"])
@@ -295,13 +445,13 @@ def generate_recommendation(df, technical_score, fundamental_score, macro_score,
 
     # Ajustement MTFA
     for timeframe in ["4h", "1d", "1w"]:
-        if timeframe in price_data_dict and not price_data_dict[timeframe].empty:
-            tf_last = price_data_dict[timeframe].iloc[-1]
+        tf_last = mtfa_context.last_row(timeframe)
+        if tf_last is not None:
             buy_price = max(buy_price, tf_last["SUPPORT"])
             sell_price = min(sell_price, tf_last["RESISTANCE"])
 
     # Validation déviation
-    max_deviation = {"1H": 0.02, "4H": 0.03, "1D": 0.05, "1W": 0.10}.get(interval_input, 0.05)
+    max_deviation = p.max_deviation.get(interval_input, 0.05)
     if price != 0:
         if buy_price < price * (1 - max_deviation):
             buy_price = price * (1 - max_deviation)
@@ -309,15 +459,230 @@ def generate_recommendation(df, technical_score, fundamental_score, macro_score,
             sell_price = price * (1 + max_deviation)
 
     # Spread minimum
-    min_spread = 0.5 + (capped_volatility / 100 if capped_volatility != 0 else 0.01)
+    min_spread = p.min_spread + (capped_volatility / 100 if capped_volatility != 0 else 0.01)
     if price != 0 and (sell_price - buy_price) / price * 100 < min_spread:
         buy_price = price * (1 - (atr / price if price != 0 else 0.01))
         sell_price = price * (1 + (atr / price if price != 0 else 0.01))
 
     # Vérification signal BUY
-    if signal == "BUY" and sell_price <= price * 1.02:
+    if signal == "BUY" and sell_price <= price * (1 + p.min_upside):
         signal = "HOLD"
         confidence = 0
 
     logger.info(f"Signal: {signal}, Confiance: {confidence:.2%}, Buy: {buy_price:.2f}, Sell: {sell_price:.2f}, Total score: {total_score:.2f}, Seuil: {score_threshold:.2f}")
     return signal, confidence, buy_price, sell_price
+
+
+def bar_dates(df):
+    """Dates d'ouverture des barres en datetime64[ns] (colonne date, ou timestamp en ms des frames compactes)."""
+    if "date" in df.columns:
+        return df["date"].astype("datetime64[ns]").to_numpy()
+    return pd.to_datetime(df["timestamp"].to_numpy(), unit="ms").to_numpy().astype("datetime64[ns]")
+
+_align_cache = cachetools.LRUCache(maxsize=ALIGN_CACHE_SIZE)
+_align_lock = threading.Lock()
+
+def _fingerprint(values):
+    """Empreinte d'un tableau de dates pour la clé du cache : (longueur, blake2b 128 bits du contenu)."""
+    return len(values), hashlib.blake2b(np.ascontiguousarray(values).tobytes(), digest_size=16).digest()
+
+def _align_positions(df, interval_input, tf_df, timeframe, alignment):
+    """Position dans tf_df de la bougie alignée sur chaque barre de df (-1 si aucune).
+
+    Ne dépend que des dates : le résultat est mémorisé (clé : longueur et
+    empreinte blake2b des dates, voir _fingerprint) pour les appels répétés sur
+    les mêmes séries (backtests, optimizer.py).
+    """
+    left = bar_dates(df) + INTERVAL_TIMEDELTAS[interval_input.lower()]
+    right = bar_dates(tf_df)
+    key = (interval_input.lower(), timeframe, alignment, _fingerprint(left), _fingerprint(right))
+    with _align_lock:
+        positions = _align_cache.get(key)
+    if positions is not None:
+        return positions
+    if alignment == "close":
+        right = right + INTERVAL_TIMEDELTAS[timeframe]
+    elif alignment == "open":
+        left = left - np.timedelta64(1, "ns")
+    else:
+        raise ValueError(f"Alignement MTFA inconnu : {alignment}")
+    order = np.argsort(right, kind="stable")
+    found = np.searchsorted(right[order], left, side="right") - 1
+    positions = np.where(found >= 0, order[np.maximum(found, 0)], -1)
+    with _align_lock:
+        _align_cache[key] = positions
+    return positions
+
+def _align_mtfa(df, interval_input, tf_df, timeframe, columns, alignment="close"):
+    """Aligne des colonnes d'un autre intervalle sur chaque barre de df (jointure as-of).
+
+    alignment="close" n'utilise que les bougies clôturées avant la clôture de la
+    barre (backtest sans biais de look-ahead) ; alignment="open" prend la dernière
+    bougie ouverte avant la fin de la barre, comme analyze_technical qui lit les
+    bougies en cours.
+    """
+    positions = _align_positions(df, interval_input, tf_df, timeframe, alignment)
+    missing = positions < 0
+    aligned = {}
+    for col in columns:
+        values = tf_df[col].to_numpy()[np.maximum(positions, 0)]
+        if missing.any():
+            values = np.where(missing, np.nan, values.astype(float))
+        aligned[col] = values
+    return pd.DataFrame(aligned, index=df.index)
+
+def _py_max(a, b):
+    """max() Python élément par élément (un NaN en second argument est ignoré)."""
+    return np.where(b > a, b, a)
+
+def _py_min(a, b):
+    """min() Python élément par élément (un NaN en second argument est ignoré)."""
+    return np.where(b < a, b, a)
+
+def _volatility_series(df):
+    """Volatilité (%) sur 20 périodes pour chaque barre, 1.0 si indéfinie ou nulle."""
+    volatility = _volatility(df)
+    return volatility.where(volatility.notna() & (volatility != 0), 1.0)
+
+TECHNICAL_RULES = ["rsi", "macd", "ema", "mtfa", "adx", "volume", "bollinger", "divergence"]
+
+def _points(p, rule, interval_input):
+    """Points entiers d'une règle pour l'intervalle, comme int(points * poids) dans analyze_technical."""
+    return int(getattr(p, f"{rule}_points") * getattr(p, f"{rule}_weight").get(interval_input, 1.0))
+
+def analyze_technical_series(df, interval_input, price_data_dict, alignment="close", params=None):
+    """Mode colonnaire de analyze_technical : score et contribution de chaque règle par barre.
+
+    Renvoie un DataFrame indexé comme df avec une colonne par règle
+    (TECHNICAL_RULES) et leur somme dans "score". Voir _align_mtfa pour alignment.
+    """
+    interval_input = interval_input.upper()
+    p = params or DEFAULT_PARAMS
+    close = df["close"]
+    volatility = _volatility_series(df)
+    contributions = {}
+
+    # RSI avec seuils dynamiques
+    extra = volatility.where(volatility > p.rsi_volatility_threshold, 0)
+    overbought = df["RSI"] > p.rsi_overbought + extra
+    oversold = ~overbought & (df["RSI"] < p.rsi_oversold - extra)
+    points = _points(p, "rsi", interval_input)
+    contributions["rsi"] = np.where(overbought, -points, np.where(oversold, points, 0))
+
+    # MACD
+    points = _points(p, "macd", interval_input)
+    contributions["macd"] = np.where(df["MACD"] > df["MACD_SIGNAL"], points,
+                                     np.where(df["MACD"] < df["MACD_SIGNAL"], -points, 0))
+
+    # EMA avec MTFA
+    bullish_trend = pd.Series(True, index=df.index)
+    bearish_trend = pd.Series(True, index=df.index)
+    for timeframe in ["4h", "1d", "1w"]:
+        if timeframe in price_data_dict and not price_data_dict[timeframe].empty:
+            tf = _align_mtfa(df, interval_input, price_data_dict[timeframe], timeframe, ["EMA_12", "EMA_26"], alignment)
+            bullish_trend &= ~(tf["EMA_12"] < tf["EMA_26"])
+            bearish_trend &= ~(tf["EMA_12"] > tf["EMA_26"])
+    ema_up = df["EMA_12"] > df["EMA_26"]
+    ema_down = df["EMA_12"] < df["EMA_26"]
+    points = _points(p, "ema", interval_input)
+    contributions["ema"] = np.where(ema_up, points, np.where(ema_down, -points, 0))
+    contributions["mtfa"] = np.where(ema_up & bullish_trend, p.mtfa_points, np.where(ema_down & bearish_trend, -p.mtfa_points, 0))
+
+    # ADX
+    above_ema_20 = close > df["EMA_20"]
+    points = _points(p, "adx", interval_input)
+    contributions["adx"] = np.where(df["ADX"] > p.adx_threshold, np.where(above_ema_20, points, -points), 0)
+
+    # Volume
+    avg_volume = _volume_mean(df)
+    spike = (avg_volume != 0) & (df["volume"] > p.volume_spike * avg_volume)
+    points = _points(p, "volume", interval_input)
+    contributions["volume"] = np.where(spike, np.where(above_ema_20, points, -points), 0)
+
+    # Bandes de Bollinger
+    points = _points(p, "bb", interval_input)
+    contributions["bollinger"] = np.where(close <= df["BB_LOWER"], points,
+                                          np.where(close >= df["BB_UPPER"], -points, 0))
+
+    # Divergences RSI
+    points = _points(p, "div", interval_input)
+    contributions["divergence"] = np.where(df["RSI_DIVERGENCE"] == 1, points,
+                                           np.where(df["RSI_DIVERGENCE"] == -1, -points, 0))
+
+    result = pd.DataFrame(contributions, index=df.index)
+    result["score"] = result[TECHNICAL_RULES].sum(axis=1)
+    return result
+
+def generate_recommendation_series(df, technical_scores, fundamental_score, macro_score, interval_input, price_data_dict, alignment="close", params=None):
+    """Version vectorisée de generate_recommendation : une recommandation par barre.
+
+    technical_scores est la série de scores techniques de df. Renvoie un DataFrame
+    (total_score, signal, confidence, buy_price, sell_price) indexé comme df.
+    """
+    interval_input = interval_input.upper()
+    p = params or DEFAULT_PARAMS
+    price = df["close"].to_numpy(dtype=float)
+    atr = df["ATR_14"].to_numpy(dtype=float)
+    capped_volatility = np.minimum(_volatility_series(df).to_numpy(), p.volatility_cap)
+
+    # Scores techniques MTFA des autres intervalles, alignés barre par barre
+    adjusted_technical_score = np.asarray(technical_scores, dtype=float).copy()
+    for interval in ["1h", "4h", "1d", "1w"]:
+        if interval != interval_input.lower() and interval in price_data_dict and not price_data_dict[interval].empty:
+            tf_df = price_data_dict[interval].copy()
+            tf_df["_score"] = analyze_technical_series(tf_df, interval.upper(), price_data_dict, alignment, p)["score"]
+            tf_score = _align_mtfa(df, interval_input, tf_df, interval, ["_score"], alignment)["_score"]
+            adjusted_technical_score += tf_score.fillna(0).to_numpy() * p.mtfa_weight.get(interval, 0)
+
+    w_tech, w_fund, w_macro = p.score_weights[interval_input]
+    total_score = (adjusted_technical_score * w_tech + fundamental_score * w_fund + macro_score * w_macro) * (1 + capped_volatility / 200)
+    score_threshold = p.score_threshold * (1 + capped_volatility / 100)
+
+    is_buy = total_score > score_threshold
+    is_sell = ~is_buy & (total_score < -score_threshold)
+    signal = np.where(is_buy, "BUY", np.where(is_sell, "SELL", "HOLD")).astype(object)
+    abs_score = np.abs(total_score)
+    confidence = np.where(is_buy | is_sell, abs_score / (abs_score + p.confidence_scale), 0.0)
+
+    # Prix achat/vente
+    volatility_factor = p.volatility_factor.get(interval_input, 1.0)
+    support = df["SUPPORT"].to_numpy(dtype=float)
+    resistance = df["RESISTANCE"].to_numpy(dtype=float)
+    buy_price = np.where(is_buy, _py_max(price - 0.5 * atr, support),
+                         np.where(is_sell, _py_max(price - atr * volatility_factor, df["FIBO_0.382"].to_numpy(dtype=float)), price - 0.5 * atr))
+    sell_price = np.where(is_buy, _py_min(price + atr * volatility_factor, df["FIBO_0.618"].to_numpy(dtype=float)),
+                          np.where(is_sell, _py_min(price + 0.5 * atr, resistance), price + 0.5 * atr))
+
+    # Ajustement MTFA
+    for timeframe in ["4h", "1d", "1w"]:
+        if timeframe in price_data_dict and not price_data_dict[timeframe].empty:
+            tf = _align_mtfa(df, interval_input, price_data_dict[timeframe], timeframe, ["SUPPORT", "RESISTANCE"], alignment)
+            buy_price = _py_max(buy_price, tf["SUPPORT"].to_numpy(dtype=float))
+            sell_price = _py_min(sell_price, tf["RESISTANCE"].to_numpy(dtype=float))
+
+    # Validation déviation
+    max_deviation = p.max_deviation.get(interval_input, 0.05)
+    valid_price = price != 0
+    buy_price = np.where(valid_price & (buy_price < price * (1 - max_deviation)), price * (1 - max_deviation), buy_price)
+    sell_price = np.where(valid_price & (sell_price > price * (1 + max_deviation)), price * (1 + max_deviation), sell_price)
+
+    # Spread minimum
+    min_spread = p.min_spread + np.where(capped_volatility != 0, capped_volatility / 100, 0.01)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        narrow = valid_price & ((sell_price - buy_price) / price * 100 < min_spread)
+        atr_ratio = np.where(valid_price, atr / price, 0.01)
+    buy_price = np.where(narrow, price * (1 - atr_ratio), buy_price)
+    sell_price = np.where(narrow, price * (1 + atr_ratio), sell_price)
+
+    # Vérification signal BUY
+    weak_buy = (signal == "BUY") & (sell_price <= price * (1 + p.min_upside))
+    signal[weak_buy] = "HOLD"
+    confidence = np.where(weak_buy, 0.0, confidence)
+
+    return pd.DataFrame({
+        "total_score": total_score,
+        "signal": signal,
+        "confidence": confidence,
+        "buy_price": buy_price,
+        "sell_price": sell_price,
+    }, index=df.index)
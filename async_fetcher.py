@@ -0,0 +1,472 @@
+VERSION = "1.0.7"  # Incrémenté de 1.0.6 pour coalescence de get_json par (URL, budget)
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+import aiohttp
+import cachetools
+import numpy as np
+import pandas as pd
+import candle_store
+import http_client
+import telemetry
+from data_fetcher import (
+    COINCAP_ID_MAP, KLINE_PROVIDERS, KLINES_LIMIT, TTL_CACHE_SECONDS, EMPTY_FUNDAMENTAL_DATA,
+    FRED_URL, FEAR_GREED_URL, SP500_URL, DEFILLAMA_CHAINS_URL,
+    kline_url, kline_payload_error, parse_klines, store_klines, fetch_klines_derived, fundamental_url, parse_fundamental_data,
+    parse_fear_greed, parse_vix, parse_fred_rate, parse_cpi, parse_gdp, parse_sp500, build_macro_data
+)
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+CONNECTION_LIMIT = 200
+CONNECTION_LIMIT_PER_HOST = 20
+INTERVALS = ["1h", "4h", "1d", "1w"]
+
+# Requêtes couvertes (hedged) : budget de latence par fournisseur
+DEFAULT_HEDGE_DELAY = 1.5  # Délai (s) avant de lancer le fournisseur suivant, faute d'historique
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 10
+LATENCY_HISTORY = 100
+
+_provider_latencies = defaultdict(lambda: deque(maxlen=LATENCY_HISTORY))
+
+# Requêtes get_json en cours, partagées entre boucles (sessions Streamlit, scanner...)
+_singleflight = http_client.SingleFlight()
+
+FAILED_FETCH_TTL = 60  # Durée de vie (s) d'un résultat incomplet (source en échec), pour réessayer rapidement
+# Champ principal de chaque source macro : 0 (valeur par défaut) si la source a échoué
+MACRO_SOURCE_FIELDS = [
+    "fear_greed_index", "vix_value", "fed_interest_rate", "cpi_current", "gdp_current", "unemployment_rate", "sp500_value",
+]
+
+def _expires_at(key, value, now):
+    """Expiration d'une entrée macro ou DeFiLlama : TTL_CACHE_SECONDS, ou FAILED_FETCH_TTL si une source a échoué."""
+    complete = bool(value) if key == "chains" else all(value.get(name) for name in MACRO_SOURCE_FIELDS)
+    return now + (TTL_CACHE_SECONDS if complete else FAILED_FETCH_TTL)
+
+# Caches partagés par les boucles de plusieurs threads (sessions Streamlit, scanner, scheduler)
+_macro_cache = cachetools.TLRUCache(maxsize=16, ttu=_expires_at, timer=time.monotonic)
+_defillama_cache = cachetools.TLRUCache(maxsize=1, ttu=_expires_at, timer=time.monotonic)
+_cache_lock = threading.Lock()
+
+def create_session():
+    """Session aiohttp partagée : un pool keep-alive multiplexant toutes les requêtes."""
+    connector = aiohttp.TCPConnector(limit=CONNECTION_LIMIT, limit_per_host=CONNECTION_LIMIT_PER_HOST, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector)
+
+async def get_json(session, url, max_retries=http_client.DEFAULT_RETRIES, backoff=http_client.DEFAULT_BACKOFF, deadline=http_client.DEFAULT_DEADLINE):
+    """GET asynchrone avec backoff non bloquant ; renvoie (status, JSON ou None).
+
+    Même politique que http_client.get : nouvelles tentatives sur erreurs réseau,
+    429 et 5xx, respect de Retry-After, limiteur de débit de l'hôte et budget
+    total `deadline`. Les appels simultanés sur la même URL avec le même budget
+    (tentatives, backoff, deadline), y compris depuis d'autres threads,
+    partagent une seule requête et le même JSON (à ne pas modifier). Chaque
+    appel est tracé (span "http").
+    """
+    host = urlsplit(url).hostname or ""
+    key = (url, max_retries, backoff, deadline)
+    with telemetry.span("http", provider=host) as attributes:
+        while True:
+            future, leader = _singleflight.join(key)
+            if leader:
+                break
+            try:
+                # shield : l'annulation d'un suiveur n'annule pas la requête partagée
+                status, data, body_size, attempts, throttled = await asyncio.shield(asyncio.wrap_future(future))
+                attributes.update(status=status, bytes=body_size, attempts=attempts, throttled=round(throttled, 3), coalesced=True)
+                return status, data
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # Leader annulé (requête couverte perdante) : relancer pour son propre compte
+        try:
+            result = await _get_json_with_retries(session, host, url, max_retries, backoff, deadline)
+        except BaseException as e:
+            _singleflight.finish(key, future, exception=e)
+            raise
+        _singleflight.finish(key, future, result)
+        status, data, body_size, attempts, throttled = result
+        attributes.update(status=status, bytes=body_size, attempts=attempts, throttled=round(throttled, 3), coalesced=False)
+        return status, data
+
+async def _get_json_with_retries(session, host, url, max_retries, backoff, deadline):
+    """Boucle de tentatives de get_json ; renvoie (status, JSON ou None, octets, tentatives, attente du limiteur en s)."""
+    connect_timeout, read_timeout = http_client.HOST_TIMEOUTS.get(host, (http_client.DEFAULT_TIMEOUT, http_client.DEFAULT_TIMEOUT))
+    timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+    give_up_at = time.monotonic() + deadline
+    attempt = 0
+    throttled = 0.0
+    while True:
+        wait = http_client.throttle_delay(host, give_up_at - time.monotonic())
+        if wait is None:
+            raise asyncio.TimeoutError(f"Limite de débit de {host} : budget de {deadline}s insuffisant")
+        if wait:
+            await asyncio.sleep(wait)
+            throttled += wait
+        try:
+            async with session.get(url, timeout=timeout) as response:
+                if response.status not in http_client.RETRY_STATUSES or attempt >= max_retries - 1:
+                    if response.status >= 400:
+                        return response.status, None, 0, attempt + 1, throttled
+                    body = await response.read()
+                    return response.status, json.loads(body) if body.strip() else None, len(body), attempt + 1, throttled
+                delay = http_client.retry_after(response)
+                if delay is None:
+                    delay = http_client.backoff_delay(attempt, backoff)
+                if response.status == 429:
+                    http_client.penalize(host, delay)
+                status, reason = response.status, f"HTTP {response.status}"
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            if attempt >= max_retries - 1:
+                raise
+            status, reason = None, repr(e)
+            delay = http_client.backoff_delay(attempt, backoff)
+
+        if time.monotonic() + delay > give_up_at:
+            logger.warning(f"async_fetcher: budget dépassé pour {host} ({reason}), abandon")
+            if status is not None:
+                return status, None, 0, attempt + 1, throttled
+            raise asyncio.TimeoutError(f"Budget de {deadline}s dépassé pour {host}")
+        logger.warning(f"async_fetcher: {reason} sur {host}, tentative {attempt + 2}/{max_retries} dans {delay:.2f}s")
+        await asyncio.sleep(delay)
+        attempt += 1
+
+def record_latency(provider, seconds):
+    """Enregistre la latence d'une réponse d'un fournisseur."""
+    _provider_latencies[provider].append(seconds)
+
+def latency_budget(provider):
+    """Délai (s) avant couverture : p95 des latences observées, ou DEFAULT_HEDGE_DELAY."""
+    latencies = _provider_latencies[provider]
+    if len(latencies) < HEDGE_MIN_SAMPLES:
+        return DEFAULT_HEDGE_DELAY
+    return float(np.percentile(latencies, HEDGE_PERCENTILE))
+
+async def fetch_klines_provider_async(session, provider, symbol, interval):
+    """Récupère les bougies d'un seul fournisseur ; None en cas d'échec."""
+    # Accès SQLite dans un thread : ne pas bloquer les autres requêtes de la boucle
+    since = await asyncio.to_thread(candle_store.delta_start, symbol, interval, provider, KLINES_LIMIT)
+    url = kline_url(provider, symbol, interval, since)
+    if url is None:
+        logger.error(f"Fournisseur {provider} indisponible (clé API manquante)")
+        return None
+    with telemetry.span("fetch_klines", provider=provider, symbol=symbol, interval=interval, delta=since is not None) as attributes:
+        try:
+            start_time = datetime.now()
+            status, data = await get_json(session, url)
+            record_latency(provider, (datetime.now() - start_time).total_seconds())
+            attributes["status"] = status
+            if status >= 400:
+                logger.error(f"Erreur {provider} ({symbol}, {interval}) : HTTP {status}")
+                return None
+            error = kline_payload_error(provider, symbol, data)
+            if error:
+                logger.error(f"Erreur API {provider} : {error}")
+                attributes["error"] = error
+                return None
+            df = parse_klines(provider, symbol, data)
+            attributes["rows"] = len(df)
+            if df.empty and since is None:
+                logger.error(f"Aucune donnée {provider} pour {symbol}")
+                return None
+            logger.info(f"fetch_klines_async: {len(df)} lignes pour {symbol} ({interval}, {provider}) en {(datetime.now() - start_time).total_seconds():.2f}s")
+            return await asyncio.to_thread(store_klines, df, symbol, interval, provider)
+        except asyncio.CancelledError:
+            attributes["cancelled"] = True
+            raise
+        except Exception as e:
+            logger.error(f"Erreur fetch_klines_provider_async ({provider}, {symbol}, {interval}) : {e!r}")
+            attributes["error"] = repr(e)
+            return None
+
+async def fetch_klines_async(session, symbol, interval):
+    """Version asynchrone de fetch_klines : parcourt la chaîne de repli des fournisseurs."""
+    for provider in KLINE_PROVIDERS:
+        df = await fetch_klines_provider_async(session, provider, symbol, interval)
+        if df is not None:
+            return df
+        logger.warning(f"Échec {provider} pour {symbol} ({interval}), fournisseur suivant")
+    return pd.DataFrame()
+
+async def fetch_klines_hedged_async(session, symbol, interval):
+    """Requête couverte : lance le fournisseur suivant si le courant dépasse son budget de latence.
+
+    Le premier DataFrame valide l'emporte et les requêtes restantes sont annulées.
+    Un échec déclenche immédiatement le fournisseur suivant.
+    """
+    start_time = datetime.now()
+    providers = iter(KLINE_PROVIDERS)
+    tasks = {}
+
+    def launch_next():
+        provider = next(providers, None)
+        if provider is None:
+            return None, None
+        task = asyncio.create_task(fetch_klines_provider_async(session, provider, symbol, interval))
+        tasks[task] = provider
+        return provider, task
+
+    current, current_task = launch_next()
+    try:
+        while tasks:
+            budget = latency_budget(current) if current_task is not None else None
+            done, _ = await asyncio.wait(tasks, timeout=budget, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                provider = tasks.pop(task)
+                df = task.result()
+                if df is not None:
+                    logger.info(f"fetch_klines_hedged_async: {symbol} ({interval}) servi par {provider} en {(datetime.now() - start_time).total_seconds():.2f}s")
+                    return df
+                logger.warning(f"Échec {provider} pour {symbol} ({interval}), couverture par le fournisseur suivant")
+            # Couvrir si le dernier fournisseur lancé dépasse son budget ou a échoué
+            if current_task is not None and (not done or current_task in done):
+                if not done:
+                    logger.info(f"fetch_klines_hedged_async: {current} dépasse {budget:.2f}s pour {symbol} ({interval}), couverture")
+                current, current_task = launch_next()
+        return pd.DataFrame()
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+async def fetch_fundamental_data_async(session, coin_id, defillama_chains=None):
+    """Version asynchrone de fetch_fundamental_data."""
+    url = fundamental_url(coin_id)
+    if url is None:
+        logger.error("Clé API CoinCap manquante.")
+        return dict(EMPTY_FUNDAMENTAL_DATA)
+    try:
+        start_time = datetime.now()
+        with telemetry.span("fetch_fundamental", provider="coincap", symbol=coin_id) as attributes:
+            status, data = await get_json(session, url)
+            attributes["status"] = status
+        if status >= 400:
+            logger.error(f"Erreur HTTP fetch_fundamental_data_async ({coin_id}) : {status}")
+            return dict(EMPTY_FUNDAMENTAL_DATA)
+        fundamental_data = parse_fundamental_data(data, coin_id, defillama_chains)
+        logger.info(f"fetch_fundamental_data_async: Données pour {coin_id} en {(datetime.now() - start_time).total_seconds():.2f}s")
+        return fundamental_data
+    except Exception as e:
+        logger.error(f"Erreur fetch_fundamental_data_async ({coin_id}) : {e!r}")
+        return dict(EMPTY_FUNDAMENTAL_DATA)
+
+async def _fetch_parsed(session, url, parser, default, name):
+    """Récupère une URL et applique son parseur ; renvoie `default` en cas d'échec."""
+    try:
+        start_time = datetime.now()
+        status, data = await get_json(session, url)
+        if status >= 400:
+            logger.error(f"Erreur {name} : HTTP {status}")
+            return default
+        result = parser(data)
+        logger.info(f"{name}: Données récupérées en {(datetime.now() - start_time).total_seconds():.2f}s")
+        return result
+    except Exception as e:
+        logger.error(f"Erreur {name} : {e!r}")
+        return default
+
+async def fetch_fear_greed_async(session):
+    """Version asynchrone de fetch_fear_greed."""
+    return await _fetch_parsed(session, FEAR_GREED_URL, parse_fear_greed, (0, []), "fetch_fear_greed_async")
+
+async def fetch_vix_async(session, fred_api_key):
+    """Version asynchrone de fetch_vix."""
+    url = FRED_URL.format(series_id="VIXCLS", api_key=fred_api_key, limit=7)
+    return await _fetch_parsed(session, url, parse_vix, (0, []), "fetch_vix_async")
+
+async def fetch_fed_interest_rate_async(session, fred_api_key):
+    """Version asynchrone de fetch_fed_interest_rate."""
+    url = FRED_URL.format(series_id="FEDFUNDS", api_key=fred_api_key, limit=1)
+    return await _fetch_parsed(session, url, parse_fred_rate, 0, "fetch_fed_interest_rate_async")
+
+async def fetch_cpi_async(session, fred_api_key):
+    """Version asynchrone de fetch_cpi."""
+    url = FRED_URL.format(series_id="CPIAUCSL", api_key=fred_api_key, limit=2)
+    return await _fetch_parsed(session, url, parse_cpi, (0, 0), "fetch_cpi_async")
+
+async def fetch_gdp_async(session, fred_api_key):
+    """Version asynchrone de fetch_gdp."""
+    url = FRED_URL.format(series_id="GDP", api_key=fred_api_key, limit=20) + "&start_date=2000-01-01"
+    return await _fetch_parsed(session, url, parse_gdp, (0, 0), "fetch_gdp_async")
+
+async def fetch_unemployment_rate_async(session, fred_api_key):
+    """Version asynchrone de fetch_unemployment_rate."""
+    url = FRED_URL.format(series_id="UNRATE", api_key=fred_api_key, limit=1)
+    return await _fetch_parsed(session, url, parse_fred_rate, 0, "fetch_unemployment_rate_async")
+
+async def fetch_sp500_async(session, alpha_vantage_api_key):
+    """Version asynchrone de fetch_sp500."""
+    url = SP500_URL.format(api_key=alpha_vantage_api_key)
+    return await _fetch_parsed(session, url, parse_sp500, (0, []), "fetch_sp500_async")
+
+async def fetch_defillama_chains_async(session):
+    """Version asynchrone de fetch_defillama_chains (cache TTL partagé, FAILED_FETCH_TTL en cas d'échec)."""
+    with telemetry.span("fetch_defillama", provider="defillama", cache="hit") as attributes:
+        with _cache_lock:
+            chains = _defillama_cache.get("chains")
+        if chains is None:
+            attributes["cache"] = "miss"
+            chains = await _fetch_parsed(session, DEFILLAMA_CHAINS_URL, lambda data: data, [], "fetch_defillama_chains_async")
+            with _cache_lock:
+                _defillama_cache["chains"] = chains
+        return chains
+
+async def fetch_macro_data_async(session, fred_api_key, alpha_vantage_api_key):
+    """Récupère toutes les données macro en parallèle sur la boucle d'événements.
+
+    Cache TTL partagé ; un résultat dont une source a échoué n'est conservé que
+    FAILED_FETCH_TTL secondes.
+    """
+    cache_key = (fred_api_key, alpha_vantage_api_key)
+    with telemetry.span("fetch_macro", cache="hit") as attributes:
+        with _cache_lock:
+            macro_data = _macro_cache.get(cache_key)
+        if macro_data is None:
+            attributes["cache"] = "miss"
+            results = await asyncio.gather(
+                fetch_fear_greed_async(session),
+                fetch_vix_async(session, fred_api_key),
+                fetch_fed_interest_rate_async(session, fred_api_key),
+                fetch_cpi_async(session, fred_api_key),
+                fetch_gdp_async(session, fred_api_key),
+                fetch_unemployment_rate_async(session, fred_api_key),
+                fetch_sp500_async(session, alpha_vantage_api_key),
+            )
+            macro_data = build_macro_data(*results)
+            with _cache_lock:
+                _macro_cache[cache_key] = macro_data
+        return macro_data
+
+async def _fetch_symbol_async(session, symbol, coin_id, defillama_chains, hedged=True, derive=False):
+    """Bougies des quatre intervalles et données fondamentales d'un symbole.
+
+    derive=True dérive les intervalles d'un historique 1h (fetch_klines_derived,
+    exécuté dans un thread) au lieu de quatre requêtes klines.
+    """
+    if derive:
+        price_data_dict, fundamental_data = await asyncio.gather(
+            asyncio.to_thread(fetch_klines_derived, symbol, INTERVALS),
+            fetch_fundamental_data_async(session, coin_id, defillama_chains),
+        )
+        return price_data_dict, fundamental_data
+    fetch_klines = fetch_klines_hedged_async if hedged else fetch_klines_async
+    results = await asyncio.gather(
+        *(fetch_klines(session, symbol, intv) for intv in INTERVALS),
+        fetch_fundamental_data_async(session, coin_id, defillama_chains),
+    )
+    return dict(zip(INTERVALS, results[:-1])), results[-1]
+
+async def fetch_all_data_async(symbol, interval, coin_id, fred_api_key, alpha_vantage_api_key, session=None, hedged=True, derive=False):
+    """Version asynchrone de fetch_all_data (même valeur de retour).
+
+    hedged=True met les fournisseurs de bougies en concurrence (voir
+    fetch_klines_hedged_async) au lieu de la chaîne de repli séquentielle.
+    derive=True dérive les intervalles d'un historique 1h (voir fetch_klines_derived).
+    """
+    if not all([fred_api_key, alpha_vantage_api_key]):
+        logger.error("Clés API FRED ou Alpha Vantage manquantes.")
+        return pd.DataFrame(), {}, {}, {}
+    if session is None:
+        async with create_session() as own_session:
+            return await fetch_all_data_async(symbol, interval, coin_id, fred_api_key, alpha_vantage_api_key, own_session, hedged, derive)
+
+    start_time = datetime.now()
+    defillama_chains = await fetch_defillama_chains_async(session)
+    (price_data_dict, fundamental_data), macro_data = await asyncio.gather(
+        _fetch_symbol_async(session, symbol, coin_id, defillama_chains, hedged, derive),
+        fetch_macro_data_async(session, fred_api_key, alpha_vantage_api_key),
+    )
+    logger.info(f"fetch_all_data_async: {symbol} en {(datetime.now() - start_time).total_seconds():.2f}s")
+    price_data = price_data_dict.get(interval.lower(), pd.DataFrame())
+    return price_data, fundamental_data, macro_data, price_data_dict
+
+async def fetch_parts_async(symbol, coin_id, fred_api_key, alpha_vantage_api_key, intervals=INTERVALS, fundamental=True,
+                            macro=True, session=None, hedged=True, derive=False):
+    """Récupère uniquement les parties demandées : bougies de `intervals`, fondamentaux, macro.
+
+    Renvoie (price_data_dict, fundamental_data, macro_data), None pour une partie
+    non demandée ; ({}, {}, {}) si les clés FRED ou Alpha Vantage manquent.
+    """
+    if not all([fred_api_key, alpha_vantage_api_key]):
+        logger.error("Clés API FRED ou Alpha Vantage manquantes.")
+        return {}, {}, {}
+    if session is None:
+        async with create_session() as own_session:
+            return await fetch_parts_async(symbol, coin_id, fred_api_key, alpha_vantage_api_key, intervals, fundamental,
+                                           macro, own_session, hedged, derive)
+
+    async def _none():
+        return None
+
+    async def _fundamental():
+        defillama_chains = await fetch_defillama_chains_async(session)
+        return await fetch_fundamental_data_async(session, coin_id, defillama_chains)
+
+    start_time = datetime.now()
+    intervals = list(intervals)
+    if derive and intervals:
+        klines_tasks = [asyncio.to_thread(fetch_klines_derived, symbol, intervals)]
+    else:
+        fetch_klines = fetch_klines_hedged_async if hedged else fetch_klines_async
+        klines_tasks = [fetch_klines(session, symbol, intv) for intv in intervals]
+    *klines, fundamental_data, macro_data = await asyncio.gather(
+        *klines_tasks,
+        _fundamental() if fundamental else _none(),
+        fetch_macro_data_async(session, fred_api_key, alpha_vantage_api_key) if macro else _none(),
+    )
+    price_data_dict = klines[0] if derive and intervals else dict(zip(intervals, klines))
+    logger.info(f"fetch_parts_async: {symbol} ({', '.join(intervals) or 'aucune bougie'}, fondamentaux={fundamental}, macro={macro}) en {(datetime.now() - start_time).total_seconds():.2f}s")
+    return price_data_dict, fundamental_data, macro_data
+
+async def fetch_many_async(symbols, fred_api_key, alpha_vantage_api_key, hedged=True, derive=False):
+    """Récupère les données de plusieurs symboles sur une seule boucle ; macro une seule fois.
+
+    Renvoie (macro_data, {symbole: (price_data_dict, fundamental_data)}).
+    """
+    async with create_session() as session:
+        defillama_chains = await fetch_defillama_chains_async(session)
+        macro_task = fetch_macro_data_async(session, fred_api_key, alpha_vantage_api_key)
+        symbol_tasks = []
+        for symbol in symbols:
+            symbol_key = symbol[:-4] if symbol.endswith("USDT") and len(symbol) > 4 else symbol
+            coin_id = COINCAP_ID_MAP.get(symbol_key.lower(), symbol_key.lower())
+            symbol_tasks.append(_fetch_symbol_async(session, symbol, coin_id, defillama_chains, hedged, derive))
+        macro_data, *symbol_results = await asyncio.gather(macro_task, *symbol_tasks)
+    return macro_data, dict(zip(symbols, symbol_results))
+
+def run_sync(coro):
+    """Exécute une coroutine depuis du code synchrone (Streamlit, scripts)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Une boucle tourne déjà dans ce thread : exécuter dans un thread dédié
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+def fetch_all_data_sync(symbol, interval, coin_id, fred_api_key, alpha_vantage_api_key, hedged=True, derive=False):
+    """Wrapper synchrone de fetch_all_data_async pour Streamlit."""
+    return run_sync(fetch_all_data_async(symbol, interval, coin_id, fred_api_key, alpha_vantage_api_key, hedged=hedged, derive=derive))
+
+def fetch_parts_sync(symbol, coin_id, fred_api_key, alpha_vantage_api_key, intervals=INTERVALS, fundamental=True, macro=True,
+                     hedged=True, derive=False):
+    """Wrapper synchrone de fetch_parts_async."""
+    return run_sync(fetch_parts_async(symbol, coin_id, fred_api_key, alpha_vantage_api_key, intervals, fundamental, macro,
+                                      hedged=hedged, derive=derive))
+
+def fetch_klines_hedged(symbol, interval):
+    """Wrapper synchrone de fetch_klines_hedged_async."""
+    async def _run():
+        async with create_session() as session:
+            return await fetch_klines_hedged_async(session, symbol, interval)
+    return run_sync(_run())
@@ -0,0 +1,162 @@
+VERSION = "1.0.4"  # Incrémenté de 1.0.3 pour RSI sans look-ahead (point_in_time_rsi) et frames compactes sans date
+
+import argparse
+import logging
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import candle_store
+from indicators import calculate_indicators, point_in_time_rsi
+from analyzer import REQUIRED_FEATURES, analyze_technical_series, bar_dates, generate_recommendation_series
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+INTERVALS = ["1h", "4h", "1d", "1w"]
+DEFAULT_FEE = 0.001  # 0.1 % par ordre
+DEFAULT_SLIPPAGE = 0.0005
+DEFAULT_ORDER_TTL = 3  # Validité (en barres) d'un ordre d'achat limite
+DEFAULT_CAPITAL = 10_000.0
+
+def load_history(symbol, provider="binance_proxy", intervals=INTERVALS):
+    """Charge tout l'historique local (candle_store) d'un symbole pour chaque intervalle."""
+    return {intv: candle_store.load(symbol, intv, provider, limit=None) for intv in intervals}
+
+def prepare_frames(price_data_dict):
+    """Indicateurs de chaque intervalle, sans look-ahead : chaque barre ne dépend que des bougies jusqu'à elle.
+
+    Le RSI adaptatif de calculate_indicators dépend de la dernière bougie ; il est
+    remplacé par point_in_time_rsi. Les frames déjà préparés (colonne RSI_WINDOW)
+    sont repris tels quels.
+    """
+    frames = {}
+    for intv, df in price_data_dict.items():
+        if df.empty:
+            continue
+        if "RSI_WINDOW" not in df.columns:
+            if "ATR_14" not in df.columns:
+                df = calculate_indicators(df, intv.upper(), features=REQUIRED_FEATURES)
+            df = point_in_time_rsi(df)
+        frames[intv] = df
+    return frames
+
+def generate_signals(price_data_dict, interval_input, fundamental_score=0, macro_score=0, params=None):
+    """Signaux de generate_recommendation pour chaque barre de l'intervalle principal.
+
+    Aucun look-ahead : les indicateurs d'une barre ne dépendent que des bougies
+    jusqu'à elle (voir prepare_frames) et les autres intervalles ne contribuent
+    qu'avec leurs bougies clôturées. Faute d'historique, les scores fondamental
+    et macro sont constants. params (AnalyzerParams) remplace le réglage par
+    défaut de l'analyzer.
+    """
+    frames = prepare_frames(price_data_dict)
+    df = frames[interval_input.lower()]
+    technical = analyze_technical_series(df, interval_input, frames, alignment="close", params=params)
+    signals = generate_recommendation_series(
+        df, technical["score"], fundamental_score, macro_score, interval_input, frames, alignment="close", params=params
+    )
+    signals.insert(0, "technical_score", technical["score"])
+    return df, signals
+
+def simulate_fills(df, signals, fee=DEFAULT_FEE, slippage=DEFAULT_SLIPPAGE, order_ttl=DEFAULT_ORDER_TTL, initial_capital=DEFAULT_CAPITAL):
+    """Simule les exécutions (long uniquement) aux prix limites buy_price/sell_price.
+
+    Un signal BUY en clôture de barre place un achat limite valable order_ttl
+    barres, avec sell_price pour objectif ; un signal SELL annule l'achat en
+    attente ou rapproche l'objectif de la position ouverte.
+    """
+    open_ = df["open"].to_numpy(dtype=float)
+    high = df["high"].to_numpy(dtype=float)
+    low = df["low"].to_numpy(dtype=float)
+    close = df["close"].to_numpy(dtype=float)
+    dates = bar_dates(df)  # Colonne date, ou timestamp des frames compactes
+    signal = signals["signal"].to_numpy()
+    buy_price = signals["buy_price"].to_numpy(dtype=float)
+    sell_price = signals["sell_price"].to_numpy(dtype=float)
+
+    n = len(df)
+    equity = np.empty(n)
+    in_position = np.zeros(n, dtype=bool)
+    cash, qty, fees_paid = initial_capital, 0.0, 0.0
+    pending = None  # (limite, objectif, dernière barre de validité)
+    target = entry_bar = entry_price = entry_cash = None
+    trades = []
+
+    for t in range(n):
+        if qty == 0 and pending is not None:
+            limit, pending_target, expires_at = pending
+            if t > expires_at:
+                pending = None
+            elif low[t] <= limit:
+                fill = min(open_[t], limit) * (1 + slippage)
+                fees_paid += cash * fee
+                qty = cash * (1 - fee) / fill
+                entry_cash, cash = cash, 0.0
+                target, entry_bar, entry_price, pending = pending_target, t, fill, None
+        elif qty > 0 and t > entry_bar and high[t] >= target:
+            fill = max(open_[t], target) * (1 - slippage)
+            proceeds = qty * fill
+            fees_paid += proceeds * fee
+            cash, qty = proceeds * (1 - fee), 0.0
+            trades.append({
+                "entry_date": dates[entry_bar],
+                "entry_price": entry_price,
+                "exit_date": dates[t],
+                "exit_price": fill,
+                "return": cash / entry_cash - 1,
+                "bars_held": t - entry_bar,
+            })
+
+        in_position[t] = qty > 0
+        equity[t] = cash + qty * close[t]
+
+        # Ordres placés en clôture de barre, exécutables à partir de la suivante
+        if signal[t] == "BUY" and qty == 0 and not np.isnan(buy_price[t]) and not np.isnan(sell_price[t]):
+            pending = (buy_price[t], sell_price[t], t + order_ttl)
+        elif signal[t] == "SELL":
+            if qty == 0:
+                pending = None
+            elif not np.isnan(sell_price[t]):
+                target = min(target, sell_price[t])
+
+    return pd.Series(equity, index=pd.DatetimeIndex(dates, name="date")), pd.DataFrame(trades), in_position, fees_paid
+
+def compute_metrics(equity, trades, in_position, fees_paid, close, initial_capital=DEFAULT_CAPITAL):
+    """PnL, taux de réussite, drawdown maximal et exposition d'un backtest."""
+    drawdown = equity / equity.cummax() - 1
+    return {
+        "final_equity": float(equity.iloc[-1]) if len(equity) else initial_capital,
+        "pnl": float(equity.iloc[-1] - initial_capital) if len(equity) else 0.0,
+        "total_return": float(equity.iloc[-1] / initial_capital - 1) if len(equity) else 0.0,
+        "buy_and_hold_return": float(close.iloc[-1] / close.iloc[0] - 1) if len(close) else 0.0,
+        "trades": len(trades),
+        "hit_rate": float((trades["return"] > 0).mean()) if len(trades) else 0.0,
+        "avg_trade_return": float(trades["return"].mean()) if len(trades) else 0.0,
+        "max_drawdown": float(drawdown.min()) if len(drawdown) else 0.0,
+        "exposure": float(in_position.mean()) if len(in_position) else 0.0,
+        "fees_paid": float(fees_paid),
+    }
+
+def run_backtest(price_data_dict, interval_input="1H", fundamental_score=0, macro_score=0, fee=DEFAULT_FEE,
+                 slippage=DEFAULT_SLIPPAGE, order_ttl=DEFAULT_ORDER_TTL, initial_capital=DEFAULT_CAPITAL, params=None):
+    """Rejoue tout l'historique : signaux par barre, exécutions simulées et métriques."""
+    start_time = datetime.now()
+    df, signals = generate_signals(price_data_dict, interval_input, fundamental_score, macro_score, params)
+    equity, trades, in_position, fees_paid = simulate_fills(df, signals, fee, slippage, order_ttl, initial_capital)
+    metrics = compute_metrics(equity, trades, in_position, fees_paid, df["close"], initial_capital)
+    logger.info(f"run_backtest: {len(df)} barres ({interval_input}), {metrics['trades']} trades en {(datetime.now() - start_time).total_seconds():.2f}s")
+    return {"metrics": metrics, "signals": signals, "trades": trades, "equity": equity}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest des signaux Crypto Swinger sur l'historique local")
+    parser.add_argument("symbol", help="Paire, ex : BTCUSDT")
+    parser.add_argument("--interval", default="1H", choices=["1H", "4H", "1D", "1W"])
+    parser.add_argument("--provider", default="binance_proxy")
+    parser.add_argument("--fee", type=float, default=DEFAULT_FEE)
+    parser.add_argument("--slippage", type=float, default=DEFAULT_SLIPPAGE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    result = run_backtest(load_history(args.symbol.upper(), args.provider), args.interval, fee=args.fee, slippage=args.slippage)
+    for key, value in result["metrics"].items():
+        print(f"{key}: {value}")
@@ -0,0 +1,233 @@
+VERSION = "1.0.3"  # Incrémenté de 1.0.2 pour boucle calculate_indicators sans copie (comparaison au panel)
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import http_client
+from data_fetcher import KLINE_PROVIDERS, kline_url, kline_payload_error, parse_klines
+from indicators import calculate_indicators, detect_rsi_divergence, validate_data
+from analyzer import analyze_technical, analyze_macro, generate_recommendation
+import panel_indicators
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+SIZES = [200, 10_000, 1_000_000]
+WATCHLIST_SIZE = 100  # Symboles du benchmark panel (bougies : 200)
+BASELINE_PATH = "benchmark_baseline.json"
+DEFAULT_THRESHOLD = 1.25  # Régression si temps ou mémoire > 125 % de la référence
+MIN_TIME_DELTA = 0.005  # Écarts de temps (s) ignorés, en deçà du bruit de mesure
+MIN_MEMORY_DELTA = 1024 * 1024  # Écarts de mémoire (octets) ignorés
+HOUR_MS = 3_600_000
+# Nombre de bougies 1h par bougie des autres intervalles
+INTERVAL_RATIOS = {"1h": 1, "4h": 4, "1d": 24, "1w": 168}
+MACRO_DATA = {
+    "fear_greed_index": 45, "vix": 18.5, "fed_interest_rate": 4.33, "cpi": 2.9,
+    "gdp": 2.4, "unemployment_rate": 4.1, "sp500": 520.0,
+}
+
+def synthetic_candles(n, seed=0, interval="1h"):
+    """Série OHLCV normalisée (marche aléatoire log-normale) de n bougies."""
+    rng = np.random.default_rng(seed)
+    step = HOUR_MS * INTERVAL_RATIOS[interval]
+    close = 60_000 * np.exp(np.cumsum(rng.normal(0, 0.004, n)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.002, n))
+    timestamps = 1_600_000_000_000 // step * step + np.arange(n, dtype="int64") * step
+    return pd.DataFrame({
+        "timestamp": timestamps,
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + spread),
+        "low": np.minimum(open_, close) * (1 - spread),
+        "close": close,
+        "volume": rng.uniform(10, 1000, n),
+        "date": pd.to_datetime(timestamps, unit="ms"),
+    })
+
+def synthetic_payload(provider, symbol, n, seed=0):
+    """Réponse JSON (texte) au format du fournisseur, construite à partir d'une série synthétique."""
+    df = synthetic_candles(n, seed)
+    rows = zip(df["timestamp"], df["open"], df["high"], df["low"], df["close"], df["volume"])
+    if provider in ("binance_proxy", "binance_futures"):
+        data = [
+            [int(t), f"{o:.2f}", f"{h:.2f}", f"{l:.2f}", f"{c:.2f}", f"{v:.4f}", int(t) + HOUR_MS - 1,
+             f"{v * c:.2f}", 100, f"{v / 2:.4f}", f"{v * c / 2:.2f}", "0"]
+            for t, o, h, l, c, v in rows
+        ]
+    elif provider == "coincap":
+        data = {"data": [
+            {"open": f"{o:.2f}", "high": f"{h:.2f}", "low": f"{l:.2f}", "close": f"{c:.2f}", "volume": f"{v:.4f}", "period": int(t)}
+            for t, o, h, l, c, v in rows
+        ]}
+    elif provider == "kraken":
+        kraken_symbol = symbol.replace("USDT", "USD").replace("BTC", "XBT")
+        data = {"error": [], "result": {kraken_symbol: [
+            [int(t) // 1000, f"{o:.2f}", f"{h:.2f}", f"{l:.2f}", f"{c:.2f}", f"{c:.2f}", f"{v:.4f}", 100]
+            for t, o, h, l, c, v in rows
+        ], "last": 0}}
+    else:
+        raise ValueError(f"Fournisseur de bougies inconnu : {provider}")
+    return json.dumps(data)
+
+def record_payloads(directory, symbol="BTCUSDT", interval="1h"):
+    """Enregistre une réponse réelle de chaque fournisseur (réseau requis) pour les benchmarks."""
+    os.makedirs(directory, exist_ok=True)
+    for provider in KLINE_PROVIDERS:
+        url = kline_url(provider, symbol, interval)
+        if url is None:
+            logger.warning(f"record_payloads: {provider} indisponible, ignoré")
+            continue
+        response = http_client.get(url)
+        response.raise_for_status()
+        with open(os.path.join(directory, f"{provider}.json"), "w", encoding="utf-8") as f:
+            f.write(response.text)
+        logger.info(f"record_payloads: {provider} enregistré ({len(response.content)} octets)")
+
+def load_payloads(directory, symbol="BTCUSDT"):
+    """Réponses enregistrées par record_payloads, ou synthétiques (200 bougies) à défaut."""
+    payloads = {}
+    for provider in KLINE_PROVIDERS:
+        path = os.path.join(directory, f"{provider}.json") if directory else None
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                payloads[provider] = f.read()
+        else:
+            payloads[provider] = synthetic_payload(provider, symbol, 200)
+    return payloads
+
+def measure(func, repeat):
+    """Meilleur temps sur `repeat` exécutions, puis pic mémoire (tracemalloc) d'une exécution."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+def _parse(provider, symbol, payload):
+    data = json.loads(payload)
+    if kline_payload_error(provider, symbol, data):
+        raise ValueError(f"Réponse d'erreur enregistrée pour {provider}")
+    return parse_klines(provider, symbol, data)
+
+def _price_data_dict(n):
+    """Intervalles 1h/4h/1d/1w avec indicateurs, de tailles proportionnelles à n (200 au minimum)."""
+    return {
+        intv: calculate_indicators(synthetic_candles(max(200, n // ratio), seed=i, interval=intv), intv.upper())
+        for i, (intv, ratio) in enumerate(INTERVAL_RATIOS.items())
+    }
+
+def _end_to_end(raw, interval_input, price_data_dict):
+    df = calculate_indicators(raw.copy(), interval_input)
+    validate_data(df)
+    technical_score, _ = analyze_technical(df, interval_input, price_data_dict)
+    macro_score, _ = analyze_macro(MACRO_DATA, interval_input)
+    return generate_recommendation(df, technical_score, 0, macro_score, interval_input, price_data_dict)
+
+def run_benchmarks(sizes=SIZES, payload_dir=None, symbol="BTCUSDT"):
+    """Mesure chaque étape ; renvoie {"étape[taille]": {"seconds", "peak_bytes"}}."""
+    results = {}
+    for provider, payload in load_payloads(payload_dir, symbol).items():
+        results[f"parse_klines[{provider}]"] = measure(lambda: _parse(provider, symbol, payload), repeat=20)
+    results["analyze_macro"] = measure(lambda: analyze_macro(MACRO_DATA, "1H"), repeat=20)
+
+    frames = {f"S{i}": synthetic_candles(200, seed=i) for i in range(WATCHLIST_SIZE)}
+    _, panel = panel_indicators.panel_from_frames(frames)
+    watchlist = f"{WATCHLIST_SIZE}x200"
+    results[f"calculate_indicators_loop[{watchlist}]"] = measure(
+        lambda: {symbol: calculate_indicators(df, "1H") for symbol, df in frames.items()}, repeat=3
+    )
+    results[f"calculate_panel[{watchlist}]"] = measure(lambda: panel_indicators.calculate_panel(panel, "1H"), repeat=5)
+    results[f"calculate_indicators_many[{watchlist}]"] = measure(
+        lambda: panel_indicators.calculate_indicators_many(frames, "1H"), repeat=5
+    )
+
+    for n in sizes:
+        repeat = 5 if n <= 10_000 else 1
+        raw = synthetic_candles(n)
+        payload = synthetic_payload("binance_proxy", symbol, n)
+        price_data_dict = _price_data_dict(n)
+        df = calculate_indicators(raw.copy(), "1H")
+        price_data_dict["1h"] = df
+        technical_score, _ = analyze_technical(df, "1H", price_data_dict)
+
+        results[f"parse_klines[{n}]"] = measure(lambda: _parse("binance_proxy", symbol, payload), repeat)
+        results[f"calculate_indicators[{n}]"] = measure(lambda: calculate_indicators(raw.copy(), "1H"), repeat)
+        results[f"detect_rsi_divergence[{n}]"] = measure(lambda: detect_rsi_divergence(df[["close", "RSI"]].copy()), repeat)
+        results[f"validate_data[{n}]"] = measure(lambda: validate_data(df), repeat)
+        results[f"analyze_technical[{n}]"] = measure(lambda: analyze_technical(df, "1H", price_data_dict), repeat)
+        results[f"generate_recommendation[{n}]"] = measure(
+            lambda: generate_recommendation(df, technical_score, 0, 0, "1H", price_data_dict), repeat
+        )
+        results[f"end_to_end[{n}]"] = measure(lambda: _end_to_end(raw, "1H", price_data_dict), repeat)
+        logger.info(f"run_benchmarks: {n} lignes terminé")
+    return results
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Liste des régressions (étape, mesure, référence, valeur) au-delà du seuil."""
+    regressions = []
+    for stage, current in results.items():
+        reference = baseline.get(stage)
+        if reference is None:
+            continue
+        for key, min_delta in (("seconds", MIN_TIME_DELTA), ("peak_bytes", MIN_MEMORY_DELTA)):
+            if current[key] > reference[key] * threshold and current[key] - reference[key] > min_delta:
+                regressions.append((stage, key, reference[key], current[key]))
+    return regressions
+
+def format_report(results, baseline=None):
+    """Tableau texte : temps, pic mémoire et variation par rapport à la référence."""
+    lines = [f"{'étape':<40} {'temps (ms)':>12} {'pic (Mo)':>10} {'Δ temps':>9} {'Δ mém.':>9}"]
+    for stage, current in results.items():
+        reference = (baseline or {}).get(stage)
+        delta_time = f"{current['seconds'] / reference['seconds'] - 1:+.0%}" if reference and reference["seconds"] else "-"
+        delta_mem = f"{current['peak_bytes'] / reference['peak_bytes'] - 1:+.0%}" if reference and reference["peak_bytes"] else "-"
+        lines.append(
+            f"{stage:<40} {current['seconds'] * 1000:>12.2f} {current['peak_bytes'] / 1024 / 1024:>10.2f} {delta_time:>9} {delta_mem:>9}"
+        )
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks hors ligne Crypto Swinger")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in SIZES), help="Tailles des séries synthétiques")
+    parser.add_argument("--payloads", default=None, help="Répertoire des réponses enregistrées (--record)")
+    parser.add_argument("--record", default=None, help="Enregistre les réponses réelles des fournisseurs puis quitte")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Écrit les résultats comme nouvelle référence")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.disable(logging.INFO)  # Les journaux INFO des modules fausseraient les mesures
+    if args.record:
+        record_payloads(args.record)
+        sys.exit(0)
+
+    results = run_benchmarks([int(n) for n in args.sizes.split(",") if n], args.payloads)
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(format_report(results, baseline))
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Référence enregistrée dans {args.baseline}")
+    elif baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for stage, key, reference, current in regressions:
+            print(f"RÉGRESSION {stage} ({key}) : {reference:.6g} -> {current:.6g}")
+        sys.exit(1 if regressions else 0)
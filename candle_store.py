@@ -0,0 +1,114 @@
+VERSION = "1.0.2"  # Incrémenté de 1.0.1 pour schéma et lecture via kline_parser
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import pandas as pd
+import kline_parser
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+STORE_PATH = os.environ.get("CANDLE_STORE_PATH", "candles.db")
+
+# Durée d'une bougie en millisecondes
+INTERVAL_MS = {
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+    "4h": 14_400_000,
+    "1d": 86_400_000,
+    "1w": 604_800_000,
+}
+
+COLUMNS = kline_parser.COLUMNS
+
+_local = threading.local()
+
+def _connection():
+    """Connexion SQLite propre au thread courant (créée à la demande)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != STORE_PATH:
+        conn = sqlite3.connect(STORE_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS candles (
+                symbol TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                close_time INTEGER,
+                quote_asset_volume REAL,
+                number_of_trades INTEGER,
+                taker_buy_base REAL,
+                taker_buy_quote REAL,
+                PRIMARY KEY (symbol, interval, provider, timestamp)
+            ) WITHOUT ROWID
+        """)
+        _local.conn = conn
+        _local.path = STORE_PATH
+    return conn
+
+def first_timestamp(symbol, interval, provider):
+    """Horodatage d'ouverture (ms) de la plus ancienne bougie stockée, ou None."""
+    row = _connection().execute(
+        "SELECT MIN(timestamp) FROM candles WHERE symbol = ? AND interval = ? AND provider = ?",
+        (symbol, interval.lower(), provider)
+    ).fetchone()
+    return row[0] if row and row[0] is not None else None
+
+def last_timestamp(symbol, interval, provider):
+    """Horodatage d'ouverture (ms) de la dernière bougie stockée, ou None."""
+    row = _connection().execute(
+        "SELECT MAX(timestamp) FROM candles WHERE symbol = ? AND interval = ? AND provider = ?",
+        (symbol, interval.lower(), provider)
+    ).fetchone()
+    return row[0] if row and row[0] is not None else None
+
+def delta_start(symbol, interval, provider, limit=200):
+    """Point de départ (ms) d'une requête delta, ou None si un rechargement complet est nécessaire.
+
+    La dernière bougie stockée est redemandée car elle peut être encore en cours.
+    Si l'écart dépasse `limit` bougies, un rechargement complet évite un trou.
+    """
+    since = last_timestamp(symbol, interval, provider)
+    interval_ms = INTERVAL_MS.get(interval.lower())
+    if since is None or interval_ms is None:
+        return None
+    if time.time() * 1000 - since > (limit - 1) * interval_ms:
+        return None
+    return since
+
+def append(symbol, interval, provider, df):
+    """Ajoute ou remplace des bougies normalisées (timestamp en ms)."""
+    if df.empty:
+        return 0
+    frame = kline_parser.normalize(df)
+    rows = [
+        (symbol, interval.lower(), provider, *values)
+        for values in zip(*(frame[column].tolist() for column in COLUMNS))
+    ]
+    conn = _connection()
+    with conn:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO candles (symbol, interval, provider, {', '.join(COLUMNS)}) "
+            f"VALUES ({', '.join('?' * (len(COLUMNS) + 3))})",
+            rows
+        )
+    return len(rows)
+
+def load(symbol, interval, provider, limit=200):
+    """Charge les `limit` dernières bougies stockées (toutes si limit=None), triées par date."""
+    query = f"SELECT {', '.join(COLUMNS)} FROM candles WHERE symbol = ? AND interval = ? AND provider = ? ORDER BY timestamp DESC"
+    params = [symbol, interval.lower(), provider]
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    rows = _connection().execute(query, params).fetchall()
+    df = kline_parser.from_rows(rows[::-1])
+    df["date"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df
@@ -0,0 +1,107 @@
+VERSION = "1.0.2"  # Incrémenté de 1.0.1 pour commande stream (flux kline websocket)
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+INTERVAL_CHOICES = ["1H", "4H", "1D", "1W"]
+
+def _print_result(result):
+    """Affichage texte d'un résultat de pipeline.run."""
+    if "error" in result:
+        print(f"{result['symbol']} ({result['interval']}) : ERREUR - {result['error']}")
+        return
+    print(f"{result['symbol']} ({result['interval']}) : {result['signal']} (confiance {result['confidence']:.2%})")
+    print(f"Prix : {result['price']:.2f}  Achat : {result['buy_price']:.2f}  Vente : {result['sell_price']:.2f}")
+    print(f"Scores : technique {result['technical_score']:g}, fondamental {result['fundamental_score']:g}, macro {result['macro_score']:g}")
+    for detail in result["technical_details"] + result["fundamental_details"] + result["macro_details"]:
+        print(f"- {detail}")
+
+def cmd_analyze(args):
+    """Analyse d'un ou plusieurs symboles ; code de sortie 1 si l'un d'eux échoue."""
+    import pipeline  # Import différé : `--help` reste instantané
+
+    cache = pipeline.MemoryCache()
+    results = [
+        pipeline.run(symbol, args.interval, os.environ.get("FRED_API_KEY"), os.environ.get("ALPHA_VANTAGE_API_KEY"),
+                     cache=cache, derive=args.derive, hedged=not args.no_hedge, compact=args.compact)
+        for symbol in args.symbols
+    ]
+    if args.json:
+        print(json.dumps(results[0] if len(results) == 1 else results, ensure_ascii=False, indent=2))
+    else:
+        for result in results:
+            _print_result(result)
+    return 1 if any("error" in result for result in results) else 0
+
+def cmd_scan(args):
+    """Scan multi-symboles (voir scanner.scan_market)."""
+    import scanner
+
+    watchlist = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    ranking = scanner.scan_market(
+        watchlist, args.interval, os.environ.get("FRED_API_KEY"), os.environ.get("ALPHA_VANTAGE_API_KEY"),
+        max_workers=args.workers, derive=args.derive
+    )
+    print(ranking.to_json(orient="records", force_ascii=False, indent=2) if args.json else ranking.to_string())
+    return 0
+
+def cmd_stream(args):
+    """Signaux recalculés à chaque clôture de bougie (flux kline websocket) ; une ligne JSON par signal."""
+    import asyncio
+    import kline_stream
+
+    def on_signal(result):
+        print(json.dumps({k: v for k, v in result.items() if k != "technical_details"}, ensure_ascii=False), flush=True)
+
+    intervals = [intv.strip().lower() for intv in args.intervals.split(",") if intv.strip()]
+    stream = kline_stream.KlineStream(args.symbols, intervals, url=args.url or kline_stream.STREAM_URL, on_signal=on_signal)
+    try:
+        asyncio.run(stream.run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli", description="Crypto Swinger en ligne de commande")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Affiche les journaux INFO")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    analyze = subparsers.add_parser("analyze", help="Recommandation pour un ou plusieurs symboles")
+    analyze.add_argument("symbols", nargs="+", help="Ex : BTC ou BTCUSDT")
+    analyze.add_argument("--interval", default="1H", type=str.upper, choices=INTERVAL_CHOICES)
+    analyze.add_argument("--json", action="store_true", help="Sortie JSON")
+    analyze.add_argument("--derive", action="store_true", help="Dériver 4h/1d/1w d'un historique 1h")
+    analyze.add_argument("--no-hedge", action="store_true", help="Chaîne de repli séquentielle des fournisseurs")
+    analyze.add_argument("--compact", action="store_true", help="Frames float32 réduites aux colonnes utiles")
+    analyze.set_defaults(func=cmd_analyze)
+
+    scan = subparsers.add_parser("scan", help="Classement des signaux sur une liste de symboles")
+    scan.add_argument("--symbols", default="", help="Liste séparée par des virgules (défaut : tout COINCAP_ID_MAP)")
+    scan.add_argument("--interval", default="1H", type=str.upper, choices=INTERVAL_CHOICES)
+    scan.add_argument("--workers", type=int, default=16)
+    scan.add_argument("--json", action="store_true", help="Sortie JSON")
+    scan.add_argument("--derive", action="store_true", help="Dériver 4h/1d/1w d'un historique 1h")
+    scan.set_defaults(func=cmd_scan)
+
+    stream = subparsers.add_parser("stream", help="Signaux en continu depuis un flux kline websocket")
+    stream.add_argument("symbols", nargs="+", help="Ex : BTC ou BTCUSDT")
+    stream.add_argument("--intervals", default="1h", help="Liste séparée par des virgules (ex : 1h,4h)")
+    stream.add_argument("--url", help="URL du flux combiné (défaut : KLINE_STREAM_URL ou Binance)")
+    stream.set_defaults(func=cmd_stream)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr)
+    if not args.verbose:
+        logging.disable(logging.INFO)  # Les modules journalisent en INFO ; stdout reste exploitable (--json)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
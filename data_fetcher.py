@@ -1,4 +1,4 @@
-VERSION = "1.0.15"  # Incrémenté pour ajout de l'importation streamlit
+VERSION = "1.0.23"  # Incrémenté pour parseur klines NumPy à schéma unique (kline_parser)
 
 import pandas as pd
 import requests
@@ -8,7 +8,12 @@ import logging
 import time
 import os
 import cachetools.func
-import streamlit as st  # Ajouté pour @st.cache_data
+import candle_store
+import http_client
+import kline_parser
+import resampler
+import symbol_registry
+import telemetry
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -16,111 +21,114 @@ logger.setLevel(logging.INFO)
 # Cache pour données macro (1 heure)
 TTL_CACHE_SECONDS = 3600
 
-def fetch_coincap_ids():
-    """Récupère les 100 plus grandes cryptos et leurs ID via l'API CoinCap v3."""
-    coincap_api_key = os.environ.get("COINCAP_API_KEY")
-    if not coincap_api_key:
-        logger.error("Clé API CoinCap manquante. Configurez COINCAP_API_KEY.")
-        return {
-            "btc": "bitcoin",
-            "eth": "ethereum",
-            "bnb": "binance-coin",
-            "ada": "cardano",
-            "tao": "bittensor",
-        }
-
-    url = f"https://rest.coincap.io/v3/assets?limit=100&apiKey={coincap_api_key}"
+# Symbole -> ID CoinCap, chargé à la première utilisation depuis coincap_ids.json (voir symbol_registry)
+COINCAP_ID_MAP = symbol_registry.registry
+
+KLINES_LIMIT = 200
+HISTORY_PAGE_LIMIT = 1000  # Maximum par requête des API klines Binance
+# Fournisseurs paginables par startTime, pour l'historique profond
+HISTORY_PROVIDERS = ["binance_proxy", "binance_futures"]
+
+# Chaîne de repli des fournisseurs de bougies, dans l'ordre
+KLINE_PROVIDERS = ["binance_proxy", "coincap", "kraken", "binance_futures"]
+
+def kline_url(provider, symbol, interval, since=None, limit=KLINES_LIMIT):
+    """Construit l'URL klines d'un fournisseur (None si le fournisseur est indisponible)."""
+    interval = interval.lower()
+    if provider == "binance_proxy":
+        url = f"https://crypto-swing-proxy.fly.dev/proxy/api/v3/klines?symbol={symbol}&interval={interval}&limit={limit}"
+        return url + f"&startTime={since}" if since is not None else url
+    if provider == "coincap":
+        coincap_api_key = os.environ.get("COINCAP_API_KEY")
+        if not coincap_api_key:
+            return None
+        coincap_interval = {"1h": "h1", "4h": "h4", "1d": "d1", "1w": "d7"}.get(interval, "h1")
+        coin_id = COINCAP_ID_MAP.get(symbol.lower().replace("usdt", ""), symbol.lower().replace("usdt", ""))
+        url = f"https://rest.coincap.io/v3/candles?exchange=binance_timestamps&interval={coincap_interval}&baseId={coin_id}&apiKey={coincap_api_key}"
+        return url + f"&start={since}&end={int(time.time() * 1000)}" if since is not None else url
+    if provider == "kraken":
+        kraken_symbol = symbol.replace("USDT", "USD").replace("BTC", "XBT")
+        kraken_interval = {"1h": 60, "4h": 240, "1d": 1440, "1w": 10080}.get(interval, 60)
+        url = f"https://api.kraken.com/0/public/OHLC?pair={kraken_symbol}&interval={kraken_interval}"
+        return url + f"&since={since // 1000 - 1}" if since is not None else url
+    if provider == "binance_futures":
+        binance_interval = {"15m": "15m", "30m": "30m", "1h": "1h", "4h": "4h", "1d": "1d", "1w": "1w"}.get(interval, "1h")
+        url = f"https://fapi.binance.com/fapi/v1/klines?symbol={symbol}&interval={binance_interval}&limit={limit}"
+        return url + f"&startTime={since}" if since is not None else url
+    raise ValueError(f"Fournisseur de bougies inconnu : {provider}")
+
+def kline_payload_error(provider, symbol, data):
+    """Message d'erreur contenu dans la réponse d'un fournisseur, ou None."""
+    if provider in ("binance_proxy", "binance_futures"):
+        if isinstance(data, dict) and "code" in data:
+            return f"{data['msg']} (code: {data['code']})"
+    elif provider == "kraken":
+        if data["error"] and len(data["error"]) > 0:
+            return str(data["error"])
+    return None
+
+def kline_request(provider, symbol, interval, url, **kwargs):
+    """GET klines via http_client, tracé par fournisseur (span "fetch_klines")."""
+    with telemetry.span("fetch_klines", provider=provider, symbol=symbol, interval=interval.lower()) as attributes:
+        response = http_client.get(url, **kwargs)
+        attributes.update(status=response.status_code, bytes=len(response.content))
+        return response
+
+def parse_klines(provider, symbol, data):
+    """Convertit la réponse JSON d'un fournisseur en DataFrame normalisé (voir kline_parser.SCHEMA, timestamp en ms)."""
+    with telemetry.span("parse_klines", provider=provider, symbol=symbol) as attributes:
+        df = kline_parser.parse(provider, symbol, data)
+        attributes["rows"] = len(df)
+        return df
+
+def store_klines(df, symbol, interval, provider):
+    """Ajoute les bougies reçues au stockage local et renvoie les KLINES_LIMIT dernières."""
+    added = candle_store.append(symbol, interval, provider, df)
+    logger.info(f"candle_store: {added} bougies ajoutées pour {symbol} ({interval}, {provider})")
+    return candle_store.load(symbol, interval, provider, limit=KLINES_LIMIT)
+
+def fetch_klines(symbol, interval, max_retries=3, retry_delay=http_client.DEFAULT_BACKOFF):
+    """Récupère les données de prix via proxy Binance (delta depuis le stockage local)."""
+    since = candle_store.delta_start(symbol, interval, "binance_proxy", KLINES_LIMIT)
+    url = kline_url("binance_proxy", symbol, interval, since)
     try:
-        response = requests.get(url, timeout=10)
+        start_time = datetime.now()
+        response = kline_request("binance_proxy", symbol, interval, url, max_retries=max_retries, backoff=retry_delay)
+        if response.status_code == 451:
+            logger.error("Erreur proxy : Accès bloqué (451)")
+            return fetch_klines_fallback(symbol, interval)
         response.raise_for_status()
         data = response.json()
-        coincap_id_map = {asset["symbol"].lower(): asset["id"] for asset in data["data"]}
-        logger.info(f"Récupéré {len(coincap_id_map)} cryptos depuis CoinCap")
-        return coincap_id_map
+        error = kline_payload_error("binance_proxy", symbol, data)
+        if error:
+            logger.error(f"Erreur API proxy : {error}")
+            return pd.DataFrame()
+        df = parse_klines("binance_proxy", symbol, data)
+        logger.info(f"fetch_klines: {len(df)} lignes pour {symbol} ({interval}) en {(datetime.now() - start_time).total_seconds():.2f}s")
+        return store_klines(df, symbol, interval, "binance_proxy")
     except Exception as e:
-        logger.error(f"Erreur récupération ID CoinCap : {e}")
-        return {
-            "btc": "bitcoin",
-            "eth": "ethereum",
-            "bnb": "binance-coin",
-            "ada": "cardano",
-            "tao": "bittensor",
-        }
-
-COINCAP_ID_MAP = fetch_coincap_ids()
-
-def fetch_klines(symbol, interval, max_retries=3, retry_delay=10):
-    """Récupère les données de prix via proxy Binance."""
-    url = f"https://crypto-swing-proxy.fly.dev/proxy/api/v3/klines?symbol={symbol}&interval={interval}&limit=200"
-    for attempt in range(max_retries):
-        try:
-            start_time = datetime.now()
-            response = requests.get(url, timeout=10)
-            if response.status_code == 451:
-                logger.error("Erreur proxy : Accès bloqué (451)")
-                return fetch_klines_fallback(symbol, interval)
-            response.raise_for_status()
-            data = response.json()
-            if isinstance(data, dict) and "code" in data:
-                logger.error(f"Erreur API proxy : {data['msg']} (code: {data['code']})")
-                return pd.DataFrame()
-            df = pd.DataFrame(data, columns=[
-                "timestamp", "open", "high", "low", "close", "volume", "close_time",
-                "quote_asset_volume", "number_of_trades", "taker_buy_base", "taker_buy_quote", "ignore"
-            ])
-            numeric_columns = ["open", "high", "low", "close", "volume", "quote_asset_volume", "taker_buy_base", "taker_buy_quote"]
-            for col in numeric_columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').astype(float)
-                if df[col].isnull().any():
-                    logger.warning(f"Valeurs non numériques dans {col}, remplacées par NaN")
-            df["date"] = pd.to_datetime(df["timestamp"], unit="ms")
-            logger.info(f"fetch_klines: {len(df)} lignes pour {symbol} ({interval}) en {(datetime.now() - start_time).total_seconds():.2f}s")
-            return df
-        except Exception as e:
-            logger.error(f"Erreur fetch_klines ({symbol}, {interval}) - Tentative {attempt + 1}/{max_retries} : {e}")
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
-            else:
-                logger.warning("Échec proxy, passage à CoinCap")
-                return fetch_klines_fallback(symbol, interval)
+        logger.error(f"Erreur fetch_klines ({symbol}, {interval}) après {max_retries} tentatives : {e}")
+        logger.warning("Échec proxy, passage à CoinCap")
+        return fetch_klines_fallback(symbol, interval)
 
 def fetch_klines_fallback(symbol, interval):
-    """Récupère les données de prix via CoinCap v3."""
-    interval_map = {"1h": "h1", "4h": "h4", "1d": "d1", "1w": "d7"}
-    coincap_interval = interval_map.get(interval.lower(), "h1")
-    coin_id = COINCAP_ID_MAP.get(symbol.lower().replace("usdt", ""), symbol.lower().replace("usdt", ""))
-    
-    coincap_api_key = os.environ.get("COINCAP_API_KEY")
-    if not coincap_api_key:
+    """Récupère les données de prix via CoinCap v3 (delta depuis le stockage local)."""
+    since = candle_store.delta_start(symbol, interval, "coincap", KLINES_LIMIT)
+    url = kline_url("coincap", symbol, interval, since)
+    if url is None:
         logger.error("Clé API CoinCap manquante.")
         return fetch_klines_fallback_kraken(symbol, interval)
 
-    url = f"https://rest.coincap.io/v3/candles?exchange=binance_timestamps&interval={coincap_interval}&baseId={coin_id}&apiKey={coincap_api_key}"
     try:
         start_time = datetime.now()
-        response = requests.get(url, timeout=10)
+        response = kline_request("coincap", symbol, interval, url)
         response.raise_for_status()
-        data = response.json()
-        candles = data.get("data", [])
-        if not candles:
-            logger.error(f"Aucune donnée CoinCap pour {coin_id}")
+        df = parse_klines("coincap", symbol, response.json())
+        if df.empty and since is None:
+            logger.error(f"Aucune donnée CoinCap pour {symbol}")
             return fetch_klines_fallback_kraken(symbol, interval)
-        df = pd.DataFrame(candles)
-        df["timestamp"] = pd.to_datetime(df["period"], unit="ms")
-        df["date"] = df["timestamp"]
-        df["open"] = df["open"].astype(float)
-        df["high"] = df["high"].astype(float)
-        df["low"] = df["low"].astype(float)
-        df["close"] = df["close"].astype(float)
-        df["volume"] = df["volume"].astype(float)
-        df["close_time"] = df["period"]
-        df["quote_asset_volume"] = 0.0
-        df["number_of_trades"] = 0
-        df["taker_buy_base"] = 0.0
-        df["taker_buy_quote"] = 0.0
-        df["ignore"] = 0
-        logger.info(f"fetch_klines_fallback: {len(df)} lignes pour {coin_id} ({coincap_interval}) en {(datetime.now() - start_time).total_seconds():.2f}s")
-        return df
+        logger.info(f"fetch_klines_fallback: {len(df)} lignes pour {symbol} ({interval}) en {(datetime.now() - start_time).total_seconds():.2f}s")
+        return store_klines(df, symbol, interval, "coincap")
     except requests.exceptions.HTTPError as e:
         logger.error(f"Erreur CoinCap ({symbol}, {interval}) : {e}")
         if e.response.status_code == 429:
@@ -131,38 +139,24 @@ def fetch_klines_fallback(symbol, interval):
         return fetch_klines_fallback_kraken(symbol, interval)
 
 def fetch_klines_fallback_kraken(symbol, interval):
-    """Récupère les données de prix via Kraken."""
-    kraken_symbol = symbol.replace("USDT", "USD").replace("BTC", "XBT")
-    interval_map = {"1h": 60, "4h": 240, "1d": 1440, "1w": 10080}
-    kraken_interval = interval_map.get(interval.lower(), 60)
-    
-    url = f"https://api.kraken.com/0/public/OHLC?pair={kraken_symbol}&interval={kraken_interval}"
+    """Récupère les données de prix via Kraken (delta depuis le stockage local)."""
+    since = candle_store.delta_start(symbol, interval, "kraken", KLINES_LIMIT)
+    url = kline_url("kraken", symbol, interval, since)
     try:
         start_time = datetime.now()
-        response = requests.get(url, timeout=10)
+        response = kline_request("kraken", symbol, interval, url)
         response.raise_for_status()
         data = response.json()
-        if data["error"] and len(data["error"]) > 0:
-            logger.error(f"Erreur Kraken : {data['error']}")
+        error = kline_payload_error("kraken", symbol, data)
+        if error:
+            logger.error(f"Erreur Kraken : {error}")
             return fetch_klines_fallback_binance_futures(symbol, interval)
-        ohlc_data = data["result"].get(kraken_symbol, [])
-        if not ohlc_data:
-            logger.error(f"Aucune donnée Kraken pour {kraken_symbol}")
+        df = parse_klines("kraken", symbol, data)
+        if df.empty and since is None:
+            logger.error(f"Aucune donnée Kraken pour {symbol}")
             return fetch_klines_fallback_binance_futures(symbol, interval)
-        df = pd.DataFrame(ohlc_data, columns=[
-            "timestamp", "open", "high", "low", "close", "vwap", "volume", "count"
-        ])
-        df["date"] = pd.to_datetime(df["timestamp"], unit="s")
-        df["close"] = df["close"].astype(float)
-        df["volume"] = df["volume"].astype(float)
-        df["close_time"] = df["timestamp"] * 1000
-        df["quote_asset_volume"] = 0.0
-        df["number_of_trades"] = df["count"]
-        df["taker_buy_base"] = 0.0
-        df["taker_buy_quote"] = 0.0
-        df["ignore"] = 0
-        logger.info(f"fetch_klines_fallback_kraken: {len(df)} lignes pour {kraken_symbol} ({interval}) en {(datetime.now() - start_time).total_seconds():.2f}s")
-        return df
+        logger.info(f"fetch_klines_fallback_kraken: {len(df)} lignes pour {symbol} ({interval}) en {(datetime.now() - start_time).total_seconds():.2f}s")
+        return store_klines(df, symbol, interval, "kraken")
     except requests.exceptions.HTTPError as e:
         logger.error(f"Erreur Kraken ({symbol}, {interval}) : {e}")
         if e.response.status_code == 429:
@@ -173,30 +167,24 @@ def fetch_klines_fallback_kraken(symbol, interval):
         return fetch_klines_fallback_binance_futures(symbol, interval)
 
 def fetch_klines_fallback_binance_futures(symbol, interval):
-    """Récupère les données de prix via Binance Futures."""
-    interval_map = {"1h": "1h", "4h": "4h", "1d": "1d", "1w": "1w"}
-    binance_interval = interval_map.get(interval.lower(), "1h")
-    url = f"https://fapi.binance.com/fapi/v1/klines?symbol={symbol}&interval={binance_interval}&limit=200"
+    """Récupère les données de prix via Binance Futures (delta depuis le stockage local)."""
+    since = candle_store.delta_start(symbol, interval, "binance_futures", KLINES_LIMIT)
+    url = kline_url("binance_futures", symbol, interval, since)
     try:
         start_time = datetime.now()
-        response = requests.get(url, timeout=10)
+        response = kline_request("binance_futures", symbol, interval, url)
         if response.status_code == 451:
             logger.error("Erreur Binance Futures : Accès bloqué (451)")
             return pd.DataFrame()
         response.raise_for_status()
         data = response.json()
-        if isinstance(data, dict) and "code" in data:
-            logger.error(f"Erreur Binance Futures : {data['msg']} (code: {data['code']})")
+        error = kline_payload_error("binance_futures", symbol, data)
+        if error:
+            logger.error(f"Erreur Binance Futures : {error}")
             return pd.DataFrame()
-        df = pd.DataFrame(data, columns=[
-            "timestamp", "open", "high", "low", "close", "volume", "close_time",
-            "quote_asset_volume", "number_of_trades", "taker_buy_base", "taker_buy_quote", "ignore"
-        ])
-        df["date"] = pd.to_datetime(df["timestamp"], unit="ms")
-        df["close"] = df["close"].astype(float)
-        df["volume"] = df["volume"].astype(float)
+        df = parse_klines("binance_futures", symbol, data)
         logger.info(f"fetch_klines_fallback_binance_futures: {len(df)} lignes pour {symbol} ({interval}) en {(datetime.now() - start_time).total_seconds():.2f}s")
-        return df
+        return store_klines(df, symbol, interval, "binance_futures")
     except requests.exceptions.HTTPError as e:
         logger.error(f"Erreur Binance Futures ({symbol}, {interval}) : {e}")
         if e.response.status_code == 429:
@@ -206,37 +194,78 @@ def fetch_klines_fallback_binance_futures(symbol, interval):
         logger.error(f"Erreur fetch_klines_fallback_binance_futures ({symbol}, {interval}) : {e}")
         return pd.DataFrame()
 
-def fetch_fundamental_data(coin_id, defillama_chains=None):
-    """Récupère les données fondamentales via CoinCap v3 et DeFiLlama pour TVL."""
+def fetch_klines_history(symbol, interval="1h", bars=KLINES_LIMIT):
+    """Récupère un historique profond de `bars` bougies, paginé et complété depuis le stockage local.
+
+    Seule la partie manquante est demandée (delta après la première exécution).
+    Renvoie un DataFrame vide si aucun fournisseur paginable ne répond.
+    """
+    interval_ms = candle_store.INTERVAL_MS[interval.lower()]
+    now_ms = int(time.time() * 1000)
+    needed_start = now_ms // interval_ms * interval_ms - (bars - 1) * interval_ms
+    for provider in HISTORY_PROVIDERS:
+        first = candle_store.first_timestamp(symbol, interval, provider)
+        last = candle_store.last_timestamp(symbol, interval, provider)
+        since = last if first is not None and first <= needed_start else needed_start
+        try:
+            start_time = datetime.now()
+            requests_made = 0
+            while since <= now_ms:
+                response = kline_request(provider, symbol, interval, kline_url(provider, symbol, interval, since, HISTORY_PAGE_LIMIT))
+                requests_made += 1
+                response.raise_for_status()
+                data = response.json()
+                error = kline_payload_error(provider, symbol, data)
+                if error:
+                    raise ValueError(error)
+                df = parse_klines(provider, symbol, data)
+                candle_store.append(symbol, interval, provider, df)
+                if len(df) < HISTORY_PAGE_LIMIT:
+                    break
+                since = int(df["timestamp"].iloc[-1]) + interval_ms
+            history = candle_store.load(symbol, interval, provider, limit=bars)
+            logger.info(f"fetch_klines_history: {len(history)} bougies pour {symbol} ({interval}, {provider}) en {requests_made} requêtes, {(datetime.now() - start_time).total_seconds():.2f}s")
+            return history
+        except Exception as e:
+            logger.error(f"Erreur fetch_klines_history ({symbol}, {interval}, {provider}) : {e}")
+    return pd.DataFrame()
+
+def fetch_klines_derived(symbol, intervals, base_interval="1h"):
+    """Bougies de chaque intervalle dérivées d'un seul historique de base (une requête delta par symbole).
+
+    Repli sur fetch_klines par intervalle si l'historique de base est indisponible.
+    """
+    history = fetch_klines_history(symbol, base_interval, resampler.required_bars(intervals, KLINES_LIMIT, base_interval))
+    if history.empty:
+        logger.warning(f"Historique {base_interval} indisponible pour {symbol}, récupération par intervalle")
+        return {intv: fetch_klines(symbol, intv) for intv in intervals}
+    return resampler.derive_intervals(history, intervals, KLINES_LIMIT, base_interval)
+
+FRED_URL = "https://api.stlouisfed.org/fred/series/observations?series_id={series_id}&api_key={api_key}&file_type=json&limit={limit}"
+FEAR_GREED_URL = "https://api.alternative.me/fng/?limit=7"
+SP500_URL = "https://www.alphavantage.co/query?function=TIME_SERIES_DAILY&symbol=SPY&apikey={api_key}&outputsize=compact"
+DEFILLAMA_CHAINS_URL = "https://api.llama.fi/v2/chains"
+EMPTY_FUNDAMENTAL_DATA = {"market_cap": 0, "volume_24h": 0, "tvl": 0}
+
+def fundamental_url(coin_id):
+    """URL CoinCap de l'actif (None si la clé API est absente)."""
     coincap_api_key = os.environ.get("COINCAP_API_KEY")
     if not coincap_api_key:
-        logger.error("Clé API CoinCap manquante.")
-        return {"market_cap": 0, "volume_24h": 0, "tvl": 0}
+        return None
+    return f"https://rest.coincap.io/v3/assets/{COINCAP_ID_MAP.get(coin_id, coin_id)}?apiKey={coincap_api_key}"
 
+def parse_fundamental_data(data, coin_id, defillama_chains=None):
+    """Extrait market cap, volume 24h et TVL de la réponse CoinCap et des chaînes DeFiLlama."""
     coincap_id = COINCAP_ID_MAP.get(coin_id, coin_id)
-    url = f"https://rest.coincap.io/v3/assets/{coincap_id}?apiKey={coincap_api_key}"
-    try:
-        start_time = datetime.now()
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        asset_data = data.get("data", {})
-        fundamental_data = {
-            "market_cap": float(asset_data.get("marketCapUsd", 0)),
-            "volume_24h": float(asset_data.get("volumeUsd24Hr", 0)),
-            "tvl": 0
-        }
-
-        if all(value == 0 for value in fundamental_data.values()):
-            logger.warning(f"Toutes données fondamentales à 0 pour {coincap_id}.")
-    except requests.exceptions.HTTPError as e:
-        logger.error(f"Erreur HTTP fetch_fundamental_data ({coincap_id}) : {e}")
-        if e.response.status_code == 429:
-            logger.warning("Limite de taux CoinCap atteinte.")
-        return {"market_cap": 0, "volume_24h": 0, "tvl": 0}
-    except Exception as e:
-        logger.error(f"Erreur fetch_fundamental_data ({coincap_id}) : {e}")
-        return {"market_cap": 0, "volume_24h": 0, "tvl": 0}
+    asset_data = data.get("data", {})
+    fundamental_data = {
+        "market_cap": float(asset_data.get("marketCapUsd", 0)),
+        "volume_24h": float(asset_data.get("volumeUsd24Hr", 0)),
+        "tvl": 0
+    }
+
+    if all(value == 0 for value in fundamental_data.values()):
+        logger.warning(f"Toutes données fondamentales à 0 pour {coincap_id}.")
 
     market_cap_threshold = 10_000_000_000
     volume_ratio_threshold = 0.01
@@ -252,125 +281,163 @@ def fetch_fundamental_data(coin_id, defillama_chains=None):
                 fundamental_data["tvl"] = float(chain.get("tvl", 0))
                 logger.info(f"TVL récupéré pour {defillama_id} : {fundamental_data['tvl']}")
                 break
+    return fundamental_data
+
+def fetch_fundamental_data(coin_id, defillama_chains=None):
+    """Récupère les données fondamentales via CoinCap v3 et DeFiLlama pour TVL."""
+    url = fundamental_url(coin_id)
+    if url is None:
+        logger.error("Clé API CoinCap manquante.")
+        return dict(EMPTY_FUNDAMENTAL_DATA)
+
+    coincap_id = COINCAP_ID_MAP.get(coin_id, coin_id)
+    try:
+        start_time = datetime.now()
+        with telemetry.span("fetch_fundamental", provider="coincap", symbol=coin_id) as attributes:
+            response = http_client.get(url)
+            attributes.update(status=response.status_code, bytes=len(response.content))
+            response.raise_for_status()
+            fundamental_data = parse_fundamental_data(response.json(), coin_id, defillama_chains)
+    except requests.exceptions.HTTPError as e:
+        logger.error(f"Erreur HTTP fetch_fundamental_data ({coincap_id}) : {e}")
+        if e.response.status_code == 429:
+            logger.warning("Limite de taux CoinCap atteinte.")
+        return dict(EMPTY_FUNDAMENTAL_DATA)
+    except Exception as e:
+        logger.error(f"Erreur fetch_fundamental_data ({coincap_id}) : {e}")
+        return dict(EMPTY_FUNDAMENTAL_DATA)
 
     logger.info(f"fetch_fundamental_data: Données pour {coincap_id} en {(datetime.now() - start_time).total_seconds():.2f}s")
     return fundamental_data
 
+def parse_fear_greed(data):
+    """Dernier indice Fear & Greed et historique sur 7 jours."""
+    fng_values = [int(entry["value"]) for entry in data["data"]]
+    return fng_values[-1], fng_values
+
 @cachetools.func.ttl_cache(maxsize=128, ttl=TTL_CACHE_SECONDS)
 def fetch_fear_greed():
     """Récupère l’indice Fear & Greed."""
-    url = "https://api.alternative.me/fng/?limit=7"
     try:
         start_time = datetime.now()
-        response = requests.get(url, timeout=10)
+        response = http_client.get(FEAR_GREED_URL)
         response.raise_for_status()
-        data = response.json()
-        fng_values = [int(entry["value"]) for entry in data["data"]]
+        result = parse_fear_greed(response.json())
         logger.info(f"fetch_fear_greed: Données récupérées en {(datetime.now() - start_time).total_seconds():.2f}s")
-        return fng_values[-1], fng_values
+        return result
     except Exception as e:
         logger.error(f"Erreur fetch_fear_greed : {e}")
         return 0, []
 
+def parse_vix(data):
+    """Dernière valeur VIX et historique."""
+    vix_values = [float(obs["value"]) for obs in data["observations"]]
+    return vix_values[-1], vix_values
+
 @cachetools.func.ttl_cache(maxsize=128, ttl=TTL_CACHE_SECONDS)
 def fetch_vix(fred_api_key):
     """Récupère l’indice VIX via FRED."""
-    series_id = "VIXCLS"
-    url = f"https://api.stlouisfed.org/fred/series/observations?series_id={series_id}&api_key={fred_api_key}&file_type=json&limit=7"
+    url = FRED_URL.format(series_id="VIXCLS", api_key=fred_api_key, limit=7)
     try:
         start_time = datetime.now()
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url)
         response.raise_for_status()
-        data = response.json()
-        vix_values = [float(obs["value"]) for obs in data["observations"]]
+        result = parse_vix(response.json())
         logger.info(f"fetch_vix: VIX récupéré en {(datetime.now() - start_time).total_seconds():.2f}s")
-        return vix_values[-1], vix_values
+        return result
     except Exception as e:
         logger.error(f"Erreur fetch_vix : {e}")
         return 0, []
 
+def parse_fred_rate(data):
+    """Dernière observation FRED sous forme de taux."""
+    return float(data["observations"][-1]["value"])
+
 @cachetools.func.ttl_cache(maxsize=128, ttl=TTL_CACHE_SECONDS)
 def fetch_fed_interest_rate(fred_api_key):
     """Récupère le taux d’intérêt FED via FRED."""
-    series_id = "FEDFUNDS"
-    url = f"https://api.stlouisfed.org/fred/series/observations?series_id={series_id}&api_key={fred_api_key}&file_type=json&limit=1"
+    url = FRED_URL.format(series_id="FEDFUNDS", api_key=fred_api_key, limit=1)
     try:
         start_time = datetime.now()
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url)
         response.raise_for_status()
-        data = response.json()
-        rate = float(data["observations"][-1]["value"])
+        rate = parse_fred_rate(response.json())
         logger.info(f"fetch_fed_interest_rate: Taux récupéré ({rate}%) en {(datetime.now() - start_time).total_seconds():.2f}s")
         return rate
     except Exception as e:
         logger.error(f"Erreur fetch_fed_interest_rate : {e}")
         return 0
 
+def parse_cpi(data):
+    """CPI courant et précédent."""
+    cpi_values = [float(obs["value"]) for obs in data["observations"]]
+    return cpi_values[-1], cpi_values[-2]
+
 @cachetools.func.ttl_cache(maxsize=128, ttl=TTL_CACHE_SECONDS)
 def fetch_cpi(fred_api_key):
     """Récupère le CPI via FRED."""
-    series_id = "CPIAUCSL"
-    url = f"https://api.stlouisfed.org/fred/series/observations?series_id={series_id}&api_key={fred_api_key}&file_type=json&limit=2"
+    url = FRED_URL.format(series_id="CPIAUCSL", api_key=fred_api_key, limit=2)
     try:
         start_time = datetime.now()
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url)
         response.raise_for_status()
-        data = response.json()
-        cpi_values = [float(obs["value"]) for obs in data["observations"]]
+        result = parse_cpi(response.json())
         logger.info(f"fetch_cpi: CPI récupéré en {(datetime.now() - start_time).total_seconds():.2f}s")
-        return cpi_values[-1], cpi_values[-2]
+        return result
     except Exception as e:
         logger.error(f"Erreur fetch_cpi : {e}")
         return 0, 0
 
+def parse_gdp(data):
+    """PIB courant et précédent, en ignorant les observations invalides."""
+    if "observations" not in data or not data["observations"]:
+        logger.warning("fetch_gdp: Aucune observation disponible")
+        return 0, 0
+
+    gdp_values = []
+    invalid_count = 0
+    for obs in data["observations"]:
+        value = obs.get("value", "0")
+        date = obs.get("date", "inconnue")
+        if not value or value.strip() in [".", ""]:
+            invalid_count += 1
+            continue
+        try:
+            cleaned_value = value.replace(",", "").strip()
+            if cleaned_value.count(".") > 1:
+                logger.warning(f"fetch_gdp: Valeur avec plusieurs points pour {date} : '{value}'")
+                invalid_count += 1
+                continue
+            gdp_value = float(cleaned_value)
+            if gdp_value <= 0:
+                logger.warning(f"fetch_gdp: Valeur non positive pour {date} : {gdp_value}")
+                invalid_count += 1
+                continue
+            gdp_values.append(gdp_value)
+        except ValueError as e:
+            logger.warning(f"fetch_gdp: Valeur non numérique pour {date} : '{value}'")
+            invalid_count += 1
+            continue
+
+    if invalid_count > 0:
+        logger.warning(f"fetch_gdp: {invalid_count} valeurs invalides ignorées")
+    if len(gdp_values) < 2:
+        logger.warning(f"fetch_gdp: Moins de 2 valeurs valides ({len(gdp_values)})")
+        return 0, 0
+    return gdp_values[-1], gdp_values[-2]
+
 @cachetools.func.ttl_cache(maxsize=128, ttl=TTL_CACHE_SECONDS)
 def fetch_gdp(fred_api_key):
     """Récupère le PIB USA via FRED."""
-    series_id = "GDP"
-    start_date = "2000-01-01"
-    url = f"https://api.stlouisfed.org/fred/series/observations?series_id={series_id}&api_key={fred_api_key}&file_type=json&limit=20&start_date={start_date}"
+    url = FRED_URL.format(series_id="GDP", api_key=fred_api_key, limit=20) + "&start_date=2000-01-01"
     try:
         start_time = datetime.now()
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url)
         response.raise_for_status()
-        data = response.json()
-        if "observations" not in data or not data["observations"]:
-            logger.warning("fetch_gdp: Aucune observation disponible")
-            return 0, 0
-
-        gdp_values = []
-        invalid_count = 0
-        for obs in data["observations"]:
-            value = obs.get("value", "0")
-            date = obs.get("date", "inconnue")
-            if not value or value.strip() in [".", ""]:
-                invalid_count += 1
-                continue
-            try:
-                cleaned_value = value.replace(",", "").strip()
-                if cleaned_value.count(".") > 1:
-                    logger.warning(f"fetch_gdp: Valeur avec plusieurs points pour {date} : '{value}'")
-                    invalid_count += 1
-                    continue
-                gdp_value = float(cleaned_value)
-                if gdp_value <= 0:
-                    logger.warning(f"fetch_gdp: Valeur non positive pour {date} : {gdp_value}")
-                    invalid_count += 1
-                    continue
-                gdp_values.append(gdp_value)
-            except ValueError as e:
-                logger.warning(f"fetch_gdp: Valeur non numérique pour {date} : '{value}'")
-                invalid_count += 1
-                continue
-
-        if invalid_count > 0:
-            logger.warning(f"fetch_gdp: {invalid_count} valeurs invalides ignorées")
-        if len(gdp_values) < 2:
-            logger.warning(f"fetch_gdp: Moins de 2 valeurs valides ({len(gdp_values)})")
-            return 0, 0
-
-        logger.info(f"fetch_gdp: PIB récupéré ({gdp_values[-1]}, {gdp_values[-2]}) en {(datetime.now() - start_time).total_seconds():.2f}s")
-        return gdp_values[-1], gdp_values[-2]
+        gdp_current, gdp_previous = parse_gdp(response.json())
+        if gdp_current:
+            logger.info(f"fetch_gdp: PIB récupéré ({gdp_current}, {gdp_previous}) en {(datetime.now() - start_time).total_seconds():.2f}s")
+        return gdp_current, gdp_previous
     except Exception as e:
         logger.error(f"Erreur fetch_gdp : {e}")
         return 0, 0
@@ -378,48 +445,49 @@ def fetch_gdp(fred_api_key):
 @cachetools.func.ttl_cache(maxsize=128, ttl=TTL_CACHE_SECONDS)
 def fetch_unemployment_rate(fred_api_key):
     """Récupère le taux de chômage USA via FRED."""
-    series_id = "UNRATE"
-    url = f"https://api.stlouisfed.org/fred/series/observations?series_id={series_id}&api_key={fred_api_key}&file_type=json&limit=1"
+    url = FRED_URL.format(series_id="UNRATE", api_key=fred_api_key, limit=1)
     try:
         start_time = datetime.now()
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url)
         response.raise_for_status()
-        data = response.json()
-        rate = float(data["observations"][-1]["value"])
+        rate = parse_fred_rate(response.json())
         logger.info(f"fetch_unemployment_rate: Taux récupéré ({rate}%) en {(datetime.now() - start_time).total_seconds():.2f}s")
         return rate
     except Exception as e:
         logger.error(f"Erreur fetch_unemployment_rate : {e}")
         return 0
 
+def parse_sp500(data):
+    """Dernière clôture SPY et les 7 derniers jours ouvrés."""
+    daily_data = data.get("Time Series (Daily)", {})
+    if not daily_data:
+        logger.warning("fetch_sp500: Aucune donnée disponible")
+        return 0, []
+
+    df = pd.DataFrame([
+        {"date": date, "close": float(daily_data[date]["4. close"])}
+        for date in sorted(daily_data.keys())
+    ])
+    df["date"] = pd.to_datetime(df["date"])
+    df = df[df["date"].dt.dayofweek < 5]  # Exclure week-ends
+
+    if len(df) < 7:
+        logger.warning(f"fetch_sp500: Moins de 7 jours ouvrés ({len(df)})")
+        return 0, []
+
+    sp500_values = df["close"].tail(7).tolist()
+    return sp500_values[-1], sp500_values
+
 @cachetools.func.ttl_cache(maxsize=128, ttl=TTL_CACHE_SECONDS)
 def fetch_sp500(alpha_vantage_api_key):
     """Récupère les données SPY via Alpha Vantage."""
-    url = f"https://www.alphavantage.co/query?function=TIME_SERIES_DAILY&symbol=SPY&apikey={alpha_vantage_api_key}&outputsize=compact"
     try:
         start_time = datetime.now()
-        response = requests.get(url, timeout=20)
+        response = http_client.get(SP500_URL.format(api_key=alpha_vantage_api_key))
         response.raise_for_status()
-        data = response.json()
-        daily_data = data.get("Time Series (Daily)", {})
-        if not daily_data:
-            logger.warning("fetch_sp500: Aucune donnée disponible")
-            return 0, []
-
-        df = pd.DataFrame([
-            {"date": date, "close": float(daily_data[date]["4. close"])}
-            for date in sorted(daily_data.keys())
-        ])
-        df["date"] = pd.to_datetime(df["date"])
-        df = df[df["date"].dt.dayofweek < 5]  # Exclure week-ends
-
-        if len(df) < 7:
-            logger.warning(f"fetch_sp500: Moins de 7 jours ouvrés ({len(df)})")
-            return 0, []
-
-        sp500_values = df["close"].tail(7).tolist()
-        sp500_value = sp500_values[-1]
-        logger.info(f"fetch_sp500: {len(sp500_values)} jours SPY en {(datetime.now() - start_time).total_seconds():.2f}s")
+        sp500_value, sp500_values = parse_sp500(response.json())
+        if sp500_values:
+            logger.info(f"fetch_sp500: {len(sp500_values)} jours SPY en {(datetime.now() - start_time).total_seconds():.2f}s")
         return sp500_value, sp500_values
     except requests.exceptions.Timeout:
         logger.error("fetch_sp500: Délai dépassé")
@@ -431,18 +499,58 @@ def fetch_sp500(alpha_vantage_api_key):
 @cachetools.func.ttl_cache(maxsize=128, ttl=TTL_CACHE_SECONDS)
 def fetch_defillama_chains():
     """Récupère les données DeFiLlama pour TVL."""
-    url = "https://api.llama.fi/v2/chains"
     try:
-        response = requests.get(url, timeout=10)
+        response = http_client.get(DEFILLAMA_CHAINS_URL)
         response.raise_for_status()
         return response.json()
     except Exception as e:
         logger.error(f"Erreur fetch_defillama_chains : {e}")
         return []
 
-@st.cache_data
-def fetch_all_data(symbol, interval, coin_id, fred_api_key, alpha_vantage_api_key, _cache_key=None):
-    """Récupère toutes les données en parallèle."""
+def build_macro_data(fear_greed, vix, fed_rate, cpi, gdp, unemployment_rate, sp500):
+    """Assemble le dictionnaire macro à partir des résultats de chaque source."""
+    fear_greed_index, fng_trend = fear_greed
+    vix_value, vix_trend = vix
+    cpi_current, cpi_previous = cpi
+    gdp_current, gdp_previous = gdp
+    sp500_value, sp500_values = sp500
+    return {
+        "fear_greed_index": fear_greed_index,
+        "fng_trend": fng_trend,
+        "vix_value": vix_value,
+        "vix_trend": vix_trend,
+        "fed_interest_rate": fed_rate,
+        "cpi_current": cpi_current,
+        "cpi_previous": cpi_previous,
+        "gdp_current": gdp_current,
+        "gdp_previous": gdp_previous,
+        "unemployment_rate": unemployment_rate,
+        "sp500_value": sp500_value,
+        "sp500_values": sp500_values
+    }
+
+def fetch_macro_data(fred_api_key, alpha_vantage_api_key):
+    """Récupère les données macro en parallèle (communes à tous les symboles)."""
+    with telemetry.span("fetch_macro"), ThreadPoolExecutor() as executor:
+        future_fear_greed = executor.submit(fetch_fear_greed)
+        future_vix = executor.submit(fetch_vix, fred_api_key)
+        future_fed_rate = executor.submit(fetch_fed_interest_rate, fred_api_key)
+        future_cpi = executor.submit(fetch_cpi, fred_api_key)
+        future_gdp = executor.submit(fetch_gdp, fred_api_key)
+        future_unemployment = executor.submit(fetch_unemployment_rate, fred_api_key)
+        future_sp500 = executor.submit(fetch_sp500, alpha_vantage_api_key)
+
+        return build_macro_data(
+            future_fear_greed.result(), future_vix.result(), future_fed_rate.result(), future_cpi.result(),
+            future_gdp.result(), future_unemployment.result(), future_sp500.result()
+        )
+
+def fetch_all_data(symbol, interval, coin_id, fred_api_key, alpha_vantage_api_key, derive=False):
+    """Récupère toutes les données en parallèle.
+
+    derive=True construit les quatre intervalles à partir d'un historique 1h
+    (voir fetch_klines_derived) au lieu de quatre requêtes klines.
+    """
     if not all([fred_api_key, alpha_vantage_api_key]):
         logger.error("Clés API FRED ou Alpha Vantage manquantes.")
         return pd.DataFrame(), {}, {}, {}
@@ -451,41 +559,20 @@ def fetch_all_data(symbol, interval, coin_id, fred_api_key, alpha_vantage_api_ke
     defillama_chains = fetch_defillama_chains()
 
     with ThreadPoolExecutor() as executor:
-        futures_klines = {intv: executor.submit(fetch_klines, symbol, intv) for intv in intervals}
+        if derive:
+            future_derived = executor.submit(fetch_klines_derived, symbol, intervals)
+        else:
+            futures_klines = {intv: executor.submit(fetch_klines, symbol, intv) for intv in intervals}
         future_fundamental = executor.submit(fetch_fundamental_data, coin_id, defillama_chains)
-        future_fear_greed = executor.submit(fetch_fear_greed)
-        future_vix = executor.submit(fetch_vix, fred_api_key)
-        future_fed_rate = executor.submit(fetch_fed_interest_rate, fred_api_key)
-        future_cpi = executor.submit(fetch_cpi, fred_api_key)
-        future_gdp = executor.submit(fetch_gdp, fred_api_key)
-        future_unemployment = executor.submit(fetch_unemployment_rate, fred_api_key)
-        future_sp500 = executor.submit(fetch_sp500, alpha_vantage_api_key)
+        future_macro = executor.submit(fetch_macro_data, fred_api_key, alpha_vantage_api_key)
 
-        for intv in intervals:
-            price_data_dict[intv] = futures_klines[intv].result()
+        if derive:
+            price_data_dict = future_derived.result()
+        else:
+            for intv in intervals:
+                price_data_dict[intv] = futures_klines[intv].result()
         fundamental_data = future_fundamental.result()
-        fear_greed_index, fng_trend = future_fear_greed.result()
-        vix_value, vix_trend = future_vix.result()
-        fed_rate = future_fed_rate.result()
-        cpi_current, cpi_previous = future_cpi.result()
-        gdp_current, gdp_previous = future_gdp.result()
-        unemployment_rate = future_unemployment.result()
-        sp500_value, sp500_values = future_sp500.result()
-
-        macro_data = {
-            "fear_greed_index": fear_greed_index,
-            "fng_trend": fng_trend,
-            "vix_value": vix_value,
-            "vix_trend": vix_trend,
-            "fed_interest_rate": fed_rate,
-            "cpi_current": cpi_current,
-            "cpi_previous": cpi_previous,
-            "gdp_current": gdp_current,
-            "gdp_previous": gdp_previous,
-            "unemployment_rate": unemployment_rate,
-            "sp500_value": sp500_value,
-            "sp500_values": sp500_values
-        }
+        macro_data = future_macro.result()
 
     price_data = price_data_dict.get(interval.lower(), pd.DataFrame())
     return price_data, fundamental_data, macro_data, price_data_dict
@@ -0,0 +1,262 @@
+VERSION = "1.0.4"  # Incrémenté de 1.0.3 pour avertissement si get bloque une boucle asyncio
+
+import asyncio
+import copy
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+import telemetry
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_TIMEOUT = 10
+# Délais (connexion, lecture) par hôte
+HOST_TIMEOUTS = {
+    "crypto-swing-proxy.fly.dev": (3.05, 10),
+    "rest.coincap.io": (3.05, 10),
+    "api.kraken.com": (3.05, 10),
+    "fapi.binance.com": (3.05, 10),
+    "api.stlouisfed.org": (3.05, 10),
+    "www.alphavantage.co": (3.05, 20),
+    "api.llama.fi": (3.05, 15),
+    "api.alternative.me": (3.05, 10),
+}
+POOL_MAXSIZE = 32
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # Délai de base (s) du backoff exponentiel
+MAX_BACKOFF = 8.0
+DEFAULT_DEADLINE = 30.0  # Budget total (s) d'une requête, tentatives comprises
+# Débit autorisé par hôte : (jetons par seconde, rafale), partagé par tous les threads et boucles
+RATE_LIMITS = {
+    "crypto-swing-proxy.fly.dev": (10.0, 20),
+    "rest.coincap.io": (2.0, 10),
+    "api.kraken.com": (1.0, 15),
+    "fapi.binance.com": (20.0, 50),
+    "api.stlouisfed.org": (2.0, 10),
+    "www.alphavantage.co": (5 / 60, 1),
+    "api.llama.fi": (5.0, 10),
+    "api.alternative.me": (5.0, 10),
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+class TokenBucket:
+    """Seau à jetons thread-safe : `rate` jetons par seconde, au plus `capacity` en réserve."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, max_wait=None):
+        """Réserve un jeton ; renvoie l'attente (s) avant de l'utiliser, ou None si elle dépasse max_wait."""
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def penalize(self, seconds):
+        """Vide le seau pendant `seconds` (réponse 429 / Retry-After de l'hôte)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+_buckets = {}
+
+def rate_limiter(host):
+    """Seau à jetons de l'hôte (None si l'hôte n'est pas limité)."""
+    limits = RATE_LIMITS.get(host)
+    if limits is None:
+        return None
+    with _sessions_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = _buckets[host] = TokenBucket(*limits)
+        return bucket
+
+def throttle_delay(host, max_wait=None):
+    """Attente (s) imposée par le limiteur de l'hôte avant une requête, None si elle dépasse max_wait."""
+    bucket = rate_limiter(host)
+    return bucket.reserve(max_wait) if bucket is not None else 0.0
+
+def penalize(host, seconds):
+    """Suspend les requêtes vers l'hôte pendant `seconds` (toutes sessions confondues)."""
+    bucket = rate_limiter(host)
+    if bucket is not None:
+        bucket.penalize(seconds)
+
+class SingleFlight:
+    """Coalescence des requêtes identiques en cours : un seul appel amont par clé.
+
+    join(key) renvoie (future, leader) ; le leader exécute la requête, publie
+    son résultat avec finish(key, ...) et les autres attendent la même future.
+    Les futures (concurrent.futures) sont partageables entre threads et boucles asyncio.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def join(self, key):
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def finish(self, key, future, result=None, exception=None):
+        """Publie le résultat du leader ; une interruption (annulation asyncio...) annule la future."""
+        with self._lock:
+            self._inflight.pop(key, None)
+        if exception is None:
+            future.set_result(result)
+        elif isinstance(exception, Exception):
+            future.set_exception(exception)
+        else:
+            future.cancel()
+
+    def do(self, key, fn):
+        """Exécute fn() une seule fois pour les appels concurrents de même clé ; renvoie (résultat, leader)."""
+        future, leader = self.join(key)
+        if not leader:
+            return future.result(), False
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, future, exception=e)
+            raise
+        self.finish(key, future, result)
+        return result, True
+
+_singleflight = SingleFlight()
+
+def get_session(host):
+    """Session HTTP partagée pour un hôte (connexions TCP/TLS réutilisées)."""
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+        return session
+
+def retry_after(response):
+    """Délai demandé par l'en-tête Retry-After (secondes ou date HTTP), ou None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+def backoff_delay(attempt, backoff):
+    """Backoff exponentiel plafonné avec full jitter."""
+    return random.uniform(0, min(MAX_BACKOFF, backoff * 2 ** attempt))
+
+def get(url, params=None, timeout=None, max_retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, deadline=DEFAULT_DEADLINE):
+    """GET via la session de l'hôte, avec nouvelles tentatives sur erreurs réseau, 429 et 5xx.
+
+    Renvoie la dernière réponse (l'appelant gère raise_for_status) ou relève la
+    dernière exception réseau. Aucune attente ne dépasse le budget `deadline`.
+    Les requêtes respectent le débit de l'hôte (RATE_LIMITS) et les appels
+    simultanés de même URL et même budget (timeout, tentatives, backoff,
+    deadline) partagent une seule requête ; chacun reçoit sa propre réponse.
+    Chaque appel est tracé (span "http" : hôte, statut, octets, tentatives).
+
+    Appel bloquant : les attentes du limiteur et du backoff (time.sleep) et
+    l'attente d'une requête coalescée occupent le thread appelant. À réserver
+    aux threads de travail (Streamlit, asyncio.to_thread, scanner) ; depuis une
+    boucle asyncio, seul async_fetcher.get_json est non bloquant.
+    """
+    host = urlsplit(url).hostname or ""
+    if _in_event_loop():
+        logger.warning(f"http_client.get appelé depuis une boucle asyncio ({host}) : boucle bloquée, utiliser async_fetcher.get_json")
+    key = (url, tuple(sorted(params.items())) if isinstance(params, dict) else params, timeout, max_retries, backoff, deadline)
+    with telemetry.span("http", provider=host) as attributes:
+        (response, attempts, throttled), leader = _singleflight.do(
+            key, lambda: _get_with_retries(host, url, params, timeout, max_retries, backoff, deadline)
+        )
+        if not leader:
+            response = _copy_response(response)
+        attributes.update(status=response.status_code, bytes=len(response.content), attempts=attempts,
+                          throttled=round(throttled, 3), coalesced=not leader)
+        return response
+
+def _in_event_loop():
+    """Vrai si le thread courant exécute une boucle asyncio."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+def _copy_response(response):
+    """Réponse d'un suiveur : copie de celle du leader (contenu déjà lu et partagé, en-têtes propres)."""
+    copied = copy.copy(response)
+    copied.headers = response.headers.copy()
+    return copied
+
+def _get_with_retries(host, url, params, timeout, max_retries, backoff, deadline):
+    """Boucle de tentatives de get (attentes par time.sleep) ; renvoie (réponse, nombre de tentatives, attente du limiteur en s)."""
+    session = get_session(host)
+    timeout = timeout or HOST_TIMEOUTS.get(host, DEFAULT_TIMEOUT)
+    give_up_at = time.monotonic() + deadline
+    attempt = 0
+    throttled = 0.0
+    while True:
+        wait = throttle_delay(host, give_up_at - time.monotonic())
+        if wait is None:
+            raise requests.exceptions.Timeout(f"Limite de débit de {host} : budget de {deadline}s insuffisant")
+        if wait:
+            time.sleep(wait)
+            throttled += wait
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+            if response.status_code not in RETRY_STATUSES or attempt >= max_retries - 1:
+                return response, attempt + 1, throttled
+            delay = retry_after(response)
+            if delay is None:
+                delay = backoff_delay(attempt, backoff)
+            if response.status_code == 429:
+                penalize(host, delay)
+            reason = f"HTTP {response.status_code}"
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt >= max_retries - 1:
+                raise
+            response = None
+            delay = backoff_delay(attempt, backoff)
+            reason = str(e)
+
+        if time.monotonic() + delay > give_up_at:
+            logger.warning(f"http_client: budget dépassé pour {host} ({reason}), abandon")
+            if response is not None:
+                return response, attempt + 1, throttled
+            raise requests.exceptions.Timeout(f"Budget de {deadline}s dépassé pour {host}")
+        logger.warning(f"http_client: {reason} sur {host}, tentative {attempt + 2}/{max_retries} dans {delay:.2f}s")
+        time.sleep(delay)
+        attempt += 1
@@ -0,0 +1,290 @@
+VERSION = "1.0.2"  # Incrémenté de 1.0.1 pour recentrage périodique de _RollingWindow (dérive des sommes courantes)
+
+from collections import deque
+import math
+import logging
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Fenêtres RSI possibles : le choix dépend de la volatilité de la dernière bougie
+RSI_WINDOWS = (14, 10)
+DIVERGENCE_WINDOW = 5
+BB_WINDOW = 20
+VOLATILITY_WINDOW = 20
+VOLUME_WINDOW = 20
+
+class _RollingWindow:
+    """Fenêtre glissante (ring buffer) avec sommes courantes pour moyenne, somme et écart-type.
+
+    Toutes les `size` insertions, le décalage est recentré sur la moyenne de la
+    fenêtre et les sommes sont recalculées à partir des valeurs : les erreurs
+    d'arrondi ne s'accumulent pas sur un flux long (série en tendance).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.nan_count = 0
+        self.offset = None  # Décalage pour limiter les erreurs d'annulation sur total_sq
+        self.pushes = 0  # Insertions depuis le dernier recentrage
+
+    def push(self, value):
+        if len(self.values) == self.size:
+            self._remove(self.values[0])
+        self.values.append(value)
+        self.pushes += 1
+        if self.pushes >= self.size:
+            self._reanchor()
+            return
+        if math.isnan(value):
+            self.nan_count += 1
+            return
+        if self.offset is None:
+            self.offset = value
+        shifted = value - self.offset
+        self.total += shifted
+        self.total_sq += shifted * shifted
+
+    def _reanchor(self):
+        """Décalage = moyenne courante ; sommes recalculées exactement (math.fsum) à partir des valeurs."""
+        self.pushes = 0
+        valid = [value for value in self.values if not math.isnan(value)]
+        self.nan_count = len(self.values) - len(valid)
+        if not valid:
+            self.offset = None
+            self.total = self.total_sq = 0.0
+            return
+        self.offset = math.fsum(valid) / len(valid)
+        shifted = [value - self.offset for value in valid]
+        self.total = math.fsum(shifted)
+        self.total_sq = math.fsum(x * x for x in shifted)
+
+    def _remove(self, value):
+        if math.isnan(value):
+            self.nan_count -= 1
+            return
+        shifted = value - self.offset
+        self.total -= shifted
+        self.total_sq -= shifted * shifted
+
+    def is_ready(self):
+        return len(self.values) == self.size and self.nan_count == 0
+
+    def sum(self):
+        if not self.is_ready():
+            return math.nan
+        return self.total + self.offset * self.size
+
+    def mean(self):
+        if not self.is_ready():
+            return math.nan
+        return self.total / self.size + self.offset
+
+    def std(self):
+        """Écart-type échantillon (ddof=1), comme pandas."""
+        if not self.is_ready() or self.size < 2:
+            return math.nan
+        variance = (self.total_sq - self.total * self.total / self.size) / (self.size - 1)
+        return math.sqrt(max(variance, 0.0))
+
+class _RollingExtremum:
+    """Minimum ou maximum glissant via une deque monotone."""
+
+    def __init__(self, size, is_max):
+        self.size = size
+        self.is_max = is_max
+        self.candidates = deque()  # (index, valeur), valeurs monotones
+        self.count = 0
+
+    def push(self, value):
+        while self.candidates and (
+            self.candidates[-1][1] <= value if self.is_max else self.candidates[-1][1] >= value
+        ):
+            self.candidates.pop()
+        self.candidates.append((self.count, value))
+        self.count += 1
+        if self.candidates[0][0] <= self.count - 1 - self.size:
+            self.candidates.popleft()
+
+    def value(self):
+        if self.count < self.size:
+            return math.nan
+        return self.candidates[0][1]
+
+class _Ema:
+    """EMA courante équivalente à ewm(span, adjust=False)."""
+
+    def __init__(self, span):
+        self.alpha = 2 / (span + 1)
+        self.value = math.nan
+
+    def push(self, value):
+        if math.isnan(value):
+            return self.value
+        if math.isnan(self.value):
+            self.value = value
+        else:
+            self.value = self.alpha * value + (1 - self.alpha) * self.value
+        return self.value
+
+class IncrementalIndicators:
+    """Calcule les indicateurs de calculate_indicators bougie par bougie.
+
+    Amorcer avec seed(df) sur l'historique, puis appeler update(candle) à chaque
+    nouvelle bougie clôturée. snapshot() renvoie la dernière ligne et to_frame()
+    l'historique conservé, identiques à la version batch.
+    """
+
+    def __init__(self, interval, history=200):
+        self.interval = interval.upper()
+        self.adx_window = 14 if self.interval in ["1D", "1W"] else 10
+        self.sr_window = 10 if self.interval in ["1H", "4H"] else 20
+        self.rows = deque(maxlen=history)
+        self.count = 0
+        self.prev_close = math.nan
+        self.prev_high = math.nan
+        self.prev_low = math.nan
+
+        self.tr_atr = _RollingWindow(14)
+        self.ema_12 = _Ema(12)
+        self.ema_20 = _Ema(20)
+        self.ema_26 = _Ema(26)
+        self.macd_signal = _Ema(9)
+        self.returns = _RollingWindow(VOLATILITY_WINDOW)
+        self.gains = {w: _RollingWindow(w) for w in RSI_WINDOWS}
+        self.losses = {w: _RollingWindow(w) for w in RSI_WINDOWS}
+        self.rsi_history = {w: deque(maxlen=DIVERGENCE_WINDOW + 1) for w in RSI_WINDOWS}
+        self.close_history = deque(maxlen=DIVERGENCE_WINDOW + 1)
+        self.plus_dm = _RollingWindow(self.adx_window)
+        self.minus_dm = _RollingWindow(self.adx_window)
+        self.tr_adx = _RollingWindow(self.adx_window)
+        self.dx = _RollingWindow(self.adx_window)
+        self.low_min = _RollingExtremum(self.sr_window, is_max=False)
+        self.high_max = _RollingExtremum(self.sr_window, is_max=True)
+        self.support_ema = _Ema(self.sr_window)
+        self.resistance_ema = _Ema(self.sr_window)
+        self.bb = _RollingWindow(BB_WINDOW)
+        self.volume = _RollingWindow(VOLUME_WINDOW)
+
+    def seed(self, df):
+        """Amorce le moteur avec un historique de bougies (une seule passe)."""
+        for candle in df.to_dict("records"):
+            self.update(candle)
+        logger.info(f"IncrementalIndicators: amorcé avec {len(df)} bougies ({self.interval})")
+        return self
+
+    def update(self, candle):
+        """Ajoute une bougie clôturée et met à jour tous les indicateurs en O(1)."""
+        row = dict(candle)
+        for col in ["open", "high", "low", "close", "volume"]:
+            value = float(row[col])
+            if math.isnan(value):
+                raise ValueError(f"Données non numériques ou manquantes dans {col}")
+            row[col] = value
+        high, low, close = row["high"], row["low"], row["close"]
+
+        # ATR (TR indéfini sur la première bougie, comme la version batch)
+        tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close)) if self.count else math.nan
+        row["TR"] = tr
+        self.tr_atr.push(tr)
+        row["ATR_14"] = self.tr_atr.mean()
+
+        # EMA et MACD
+        row["EMA_12"] = self.ema_12.push(close)
+        row["EMA_20"] = self.ema_20.push(close)
+        row["EMA_26"] = self.ema_26.push(close)
+        row["MACD"] = row["EMA_12"] - row["EMA_26"]
+        row["MACD_SIGNAL"] = self.macd_signal.push(row["MACD"])
+
+        # RSI pour chaque fenêtre possible ; delta indéfini sur la première bougie -> 0
+        delta = close - self.prev_close if self.count else math.nan
+        self.returns.push(delta / self.prev_close if self.count and self.prev_close != 0 else math.nan)
+        row["VOLATILITY_20"] = self.returns.std() * 100
+        self.close_history.append(close)
+        for w in RSI_WINDOWS:
+            self.gains[w].push(delta if delta > 0 else 0.0)
+            self.losses[w].push(-delta if delta < 0 else 0.0)
+            gain, loss = self.gains[w].mean(), self.losses[w].mean()
+            rs = gain / loss if loss != 0 else (0.0 if not math.isnan(gain) else math.nan)
+            rsi = 100 - 100 / (1 + rs)
+            row[f"RSI_{w}"] = rsi
+            self.rsi_history[w].append(rsi)
+            row[f"RSI_DIVERGENCE_{w}"] = self._divergence(w)
+
+        # ADX
+        plus_dm = high - self.prev_high if self.count else math.nan
+        minus_dm = low - self.prev_low if self.count else math.nan
+        self.plus_dm.push(max(plus_dm, 0.0) if not math.isnan(plus_dm) else plus_dm)
+        self.minus_dm.push(-min(minus_dm, 0.0) if not math.isnan(minus_dm) else minus_dm)
+        self.tr_adx.push(tr)
+        tr_sum = self.tr_adx.sum()
+        plus_di = 100 * self.plus_dm.sum() / tr_sum if tr_sum != 0 else math.nan
+        minus_di = 100 * self.minus_dm.sum() / tr_sum if tr_sum != 0 else math.nan
+        di_sum = plus_di + minus_di
+        self.dx.push(100 * abs(plus_di - minus_di) / di_sum if di_sum != 0 else math.nan)
+        row["ADX"] = self.dx.mean()
+
+        # Support/résistance et Fibonacci
+        self.low_min.push(low)
+        self.high_max.push(high)
+        row["SUPPORT"] = self.support_ema.push(self.low_min.value())
+        row["RESISTANCE"] = self.resistance_ema.push(self.high_max.value())
+        price_range = row["RESISTANCE"] - row["SUPPORT"]
+        row["FIBO_0.382"] = row["SUPPORT"] + price_range * 0.382
+        row["FIBO_0.618"] = row["SUPPORT"] + price_range * 0.618
+
+        # Bandes de Bollinger
+        self.bb.push(close)
+        row["BB_MID"] = self.bb.mean()
+        row["BB_STD"] = self.bb.std()
+        row["BB_UPPER"] = row["BB_MID"] + 2 * row["BB_STD"]
+        row["BB_LOWER"] = row["BB_MID"] - 2 * row["BB_STD"]
+
+        # Volume moyen (lu par validate_data et l'analyzer)
+        self.volume.push(row["volume"])
+        row["VOLUME_MA_20"] = self.volume.mean()
+
+        self.rows.append(row)
+        self.count += 1
+        self.prev_close, self.prev_high, self.prev_low = close, high, low
+        return self.snapshot()
+
+    def _divergence(self, rsi_window):
+        """Divergence RSI/prix sur DIVERGENCE_WINDOW périodes pour une fenêtre RSI."""
+        rsi = self.rsi_history[rsi_window]
+        if len(rsi) <= DIVERGENCE_WINDOW:
+            return 0
+        price_change = self.close_history[-1] - self.close_history[0]
+        rsi_change = rsi[-1] - rsi[0]
+        if price_change < 0 and rsi_change > 0:
+            return 1
+        if price_change > 0 and rsi_change < 0:
+            return -1
+        return 0
+
+    def rsi_window(self):
+        """Fenêtre RSI retenue, selon la volatilité des 20 dernières périodes."""
+        volatility = self.returns.std() * 100 if self.count >= VOLATILITY_WINDOW else 1.0
+        return RSI_WINDOWS[0] if volatility < 2 else RSI_WINDOWS[1]
+
+    def _select_rsi(self, row, rsi_window):
+        """Expose RSI/RSI_DIVERGENCE pour la fenêtre retenue, sans colonnes internes."""
+        output = {k: v for k, v in row.items() if not k.startswith("RSI_")}
+        output["RSI"] = row[f"RSI_{rsi_window}"]
+        output["RSI_DIVERGENCE"] = row[f"RSI_DIVERGENCE_{rsi_window}"]
+        return output
+
+    def snapshot(self):
+        """Dernière ligne d'indicateurs (équivalent de calculate_indicators(df).iloc[-1])."""
+        if not self.rows:
+            return {}
+        return self._select_rsi(self.rows[-1], self.rsi_window())
+
+    def to_frame(self):
+        """Historique conservé sous forme de DataFrame, au format de calculate_indicators."""
+        rsi_window = self.rsi_window()
+        return pd.DataFrame([self._select_rsi(row, rsi_window) for row in self.rows])
@@ -1,8 +1,10 @@
-VERSION = "1.0.4"  # Incrémenté de 1.0.3 pour corriger assignations pandas dans detect_rsi_divergence
+VERSION = "1.0.13"  # Incrémenté de 1.0.12 pour tolérance documentée entre fenêtres NumPy et pandas (SLIDING_RTOL)
 
 import pandas as pd
 import numpy as np
 import logging
+from functools import cached_property
+import telemetry
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -25,97 +27,387 @@ def validate_data(df):
             return False, "Volatilité soudaine (>10% sur 5 périodes)"
     
     # Vérifier les volumes anormaux (>3x la moyenne sur 20 périodes)
-    avg_volume = df["volume"].rolling(window=20).mean().iloc[-1]
+    avg_volume = df["VOLUME_MA_20"].iloc[-1] if "VOLUME_MA_20" in df.columns else df["volume"].rolling(window=20).mean().iloc[-1]
     if avg_volume != 0 and df["volume"].iloc[-1] > 3 * avg_volume:
         return False, "Volume anormal (>3x la moyenne sur 20 périodes)"
     
     return True, "Données valides"
 
-def detect_rsi_divergence(df, window=5):
-    """Détecte les divergences RSI/prix (haussière ou baissière)."""
-    df["RSI_DIVERGENCE"] = 0
-    for i in range(window, len(df)):
-        price_change = df["close"].iloc[i] - df["close"].iloc[i-window]
-        rsi_change = df["RSI"].iloc[i] - df["RSI"].iloc[i-window]
-        if price_change < 0 and rsi_change > 0:  # Divergence haussière
-            df.loc[df.index[i], "RSI_DIVERGENCE"] = 1
-        elif price_change > 0 and rsi_change < 0:  # Divergence baissière
-            df.loc[df.index[i], "RSI_DIVERGENCE"] = -1
+def _window_divergence(close, rsi, window):
+    """Divergences RSI/prix sur une fenêtre glissante fixe (tableaux NumPy)."""
+    divergence = np.zeros(len(close), dtype=np.int64)
+    if window <= 0 or len(close) <= window:
+        return divergence
+    price_change = close[window:] - close[:-window]
+    rsi_change = rsi[window:] - rsi[:-window]
+    # Les comparaisons avec NaN sont fausses : pas de divergence sans RSI valide
+    divergence[window:] = np.where(
+        (price_change < 0) & (rsi_change > 0), 1,  # Divergence haussière
+        np.where((price_change > 0) & (rsi_change < 0), -1, 0)  # Divergence baissière
+    )
+    return divergence
+
+def _pivot_divergence(low, high, rsi, span):
+    """Divergences RSI/prix entre deux pivots (swing low/high) consécutifs.
+
+    Un pivot en i n'est confirmé qu'en i + span : le signal est placé à cette
+    barre pour ne jamais utiliser de données futures.
+    """
+    n = len(low)
+    divergence = np.zeros(n, dtype=np.int64)
+    size = 2 * span + 1
+    if span <= 0 or n < size:
+        return divergence
+    centers = np.arange(span, n - span)
+    low_windows = np.lib.stride_tricks.sliding_window_view(low, size)
+    high_windows = np.lib.stride_tricks.sliding_window_view(high, size)
+    pivot_lows = centers[low[centers] == low_windows.min(axis=1)]
+    pivot_highs = centers[high[centers] == high_windows.max(axis=1)]
+
+    # Plus bas plus bas du prix mais RSI en hausse : divergence haussière
+    if len(pivot_lows) >= 2:
+        prev, curr = pivot_lows[:-1], pivot_lows[1:]
+        bullish = (low[curr] < low[prev]) & (rsi[curr] > rsi[prev])
+        divergence[curr[bullish] + span] = 1
+    # Plus haut plus haut du prix mais RSI en baisse : divergence baissière
+    if len(pivot_highs) >= 2:
+        prev, curr = pivot_highs[:-1], pivot_highs[1:]
+        bearish = (high[curr] > high[prev]) & (rsi[curr] < rsi[prev])
+        divergence[curr[bearish] + span] = -1
+    return divergence
+
+def detect_rsi_divergence(df, window=5, windows=None, mode="window", pivot_span=3):
+    """Détecte les divergences RSI/prix (haussière ou baissière).
+
+    mode="window" compare le prix et le RSI à `window` périodes d'écart,
+    mode="pivot" compare les pivots (swing low/high) consécutifs. `windows`
+    ajoute une colonne RSI_DIVERGENCE_<n> par fenêtre supplémentaire.
+    """
+    close = df["close"].to_numpy(dtype=float)
+    rsi = df["RSI"].to_numpy(dtype=float)
+    if mode == "window":
+        df["RSI_DIVERGENCE"] = _window_divergence(close, rsi, window)
+    elif mode == "pivot":
+        low = df["low"].to_numpy(dtype=float)
+        high = df["high"].to_numpy(dtype=float)
+        df["RSI_DIVERGENCE"] = _pivot_divergence(low, high, rsi, pivot_span)
+    else:
+        raise ValueError(f"Mode de divergence inconnu : {mode}")
+    for extra_window in windows or []:
+        df[f"RSI_DIVERGENCE_{extra_window}"] = _window_divergence(close, rsi, extra_window)
     return df
 
-def calculate_indicators(df, interval):
-    """Calcule les indicateurs techniques pour l’analyse."""
+# Colonnes conservées en mode compact : celles lues par l'analyzer
+COMPACT_COLUMNS = [
+    "open", "high", "low", "close", "volume",
+    "ATR_14", "EMA_12", "EMA_20", "EMA_26", "MACD", "MACD_SIGNAL", "RSI", "ADX",
+    "SUPPORT", "RESISTANCE", "FIBO_0.382", "FIBO_0.618", "BB_UPPER", "BB_LOWER",
+    "VOLATILITY_20", "VOLUME_MA_20",
+]
+# Colonnes exprimées en prix (comparées entre elles par l'analyzer) : float32 seulement si le pas de prix y est représentable
+PRICE_COLUMNS = [
+    "open", "high", "low", "close", "EMA_12", "EMA_20", "EMA_26",
+    "SUPPORT", "RESISTANCE", "FIBO_0.382", "FIBO_0.618", "BB_UPPER", "BB_LOWER",
+]
+
+MAX_PRICE_DECIMALS = 12  # Au-delà, prix considérés continus (pas de cotation inconnu)
+
+def price_tick(prices):
+    """Pas de cotation : plus petite puissance de dix 10^-k dont tous les prix sont multiples (None si aucune)."""
+    for decimals in range(MAX_PRICE_DECIMALS + 1):
+        scaled = prices * 10.0 ** decimals
+        if np.all(np.abs(scaled - np.round(scaled)) <= 1e-6):
+            return 10.0 ** -decimals
+    return None
+
+def float32_prices_ok(df):
+    """Vrai si float32 distingue deux prix séparés d'un pas de cotation (voir price_tick).
+
+    L'espacement float32 au plus haut prix doit rester inférieur à la moitié du
+    pas (ex. pas de 0,01 : float32 suffit jusqu'à 65 536, pas au-delà).
+    """
+    prices = np.concatenate([pd.to_numeric(df[col]).to_numpy(dtype=float) for col in ("open", "high", "low", "close") if col in df.columns] or [np.empty(0)])
+    prices = prices[np.isfinite(prices)]
+    if not len(prices):
+        return True
+    tick = price_tick(prices)
+    return tick is not None and float(np.spacing(np.float32(np.abs(prices).max()))) <= tick / 2
+
+def compact_frame(df):
+    """Représentation compacte d'une série : timestamp int64 (ms), colonnes utiles en float32, RSI_DIVERGENCE en int8.
+
+    Les colonnes de prix (PRICE_COLUMNS) restent en float64 si float32 ne
+    représente pas le pas de prix de la série (voir float32_prices_ok). Les
+    colonnes brutes inutilisées (close_time, taker_buy_*, ignore...), la date
+    et les intermédiaires (TR, BB_MID, BB_STD) sont abandonnés.
+    """
+    data = {}
+    if "timestamp" in df.columns:
+        data["timestamp"] = pd.to_numeric(df["timestamp"]).to_numpy(dtype="int64")
+    elif "date" in df.columns:
+        data["timestamp"] = df["date"].to_numpy().astype("datetime64[ms]").astype("int64")
+    price_dtype = "float32" if float32_prices_ok(df) else "float64"
+    for col in COMPACT_COLUMNS:
+        if col in df.columns:
+            data[col] = pd.to_numeric(df[col]).to_numpy(dtype=price_dtype if col in PRICE_COLUMNS else "float32")
+    if "RSI_DIVERGENCE" in df.columns:
+        data["RSI_DIVERGENCE"] = df["RSI_DIVERGENCE"].to_numpy(dtype="int8")
+    return pd.DataFrame(data, index=df.index)
+
+def calculate_indicators(df, interval, compact=False, features=None):
+    """Calcule les indicateurs techniques pour l’analyse.
+
+    features limite le calcul aux indicateurs demandés et à leurs dépendances
+    (voir FEATURES) ; tous par défaut. compact=True renvoie la représentation
+    de compact_frame (calculs en float64).
+    """
+    selected = resolve_features(features)
+    with telemetry.span("indicators", interval=interval.lower(), rows=len(df), features=len(selected)):
+        df = _calculate_indicators(df, interval, selected)
+        return compact_frame(df) if compact else df
+
+class _Inputs:
+    """Séries d'entrée du noyau et intermédiaires partagés, calculés au premier usage."""
+
+    def __init__(self, high, low, close, volume, interval):
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.interval = interval
+
+    @cached_property
+    def prev_close(self):
+        prev_close = np.empty(len(self.close))
+        prev_close[:1] = np.nan
+        prev_close[1:] = self.close[:-1]
+        return prev_close
+
+    @cached_property
+    def delta(self):
+        return self.close - self.prev_close
+
+    @cached_property
+    def returns(self):
+        return self.close / self.prev_close - 1
+
+SLIDING_MAX_ROWS = 1000  # Jusqu'à cette longueur, fenêtres glissantes NumPy ; au-delà, pandas (O(n) quelle que soit la fenêtre)
+# Écart relatif maximal entre les deux voies de _rolling (observé : ~1e-10 sur l'écart-type de prix ~60 000, ~1e-13 sinon)
+SLIDING_RTOL = 1e-9
+_SLIDING_REDUCERS = {
+    "mean": np.mean,
+    "sum": np.sum,
+    "min": np.min,
+    "max": np.max,
+    "std": lambda windows, axis: np.std(windows, axis=axis, ddof=1),
+}
+
+def _rolling(values, window, reducer):
+    """Réduction glissante ("mean", "sum", "min", "max", "std") d'un tableau NumPy, NaN tant que la fenêtre est incomplète.
+
+    Sur une série courte, le coût fixe d'un rolling pandas (Series, validation)
+    domine : la réduction passe par sliding_window_view. Au-delà de
+    SLIDING_MAX_ROWS, pandas (Cython, O(n)) reste plus rapide. Les deux voies
+    ne sont pas identiques au bit près : pandas met à jour des sommes courantes
+    (std en ligne), NumPy réduit chaque fenêtre. Elles concordent à SLIDING_RTOL
+    près (atol identique pour les valeurs proches de zéro), de part et d'autre
+    du seuil.
+    """
+    if len(values) > SLIDING_MAX_ROWS:
+        return getattr(pd.Series(values, copy=False).rolling(window=window), reducer)().to_numpy()
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = _SLIDING_REDUCERS[reducer](np.lib.stride_tricks.sliding_window_view(values, window), axis=-1)
+    return out
+
+def _ewm(values, span):
+    return pd.Series(values, copy=False).ewm(span=span, adjust=False).mean().to_numpy()
+
+def _tr(out, s, col):
+    np.subtract(s.high, s.low, out=out)
+    np.maximum(out, np.abs(s.high - s.prev_close), out=out)
+    np.maximum(out, np.abs(s.low - s.prev_close), out=out)
+
+def _rsi_values(delta, window):
+    gain = _rolling(np.where(delta > 0, delta, 0.0), window, "mean")
+    loss = _rolling(-np.where(delta < 0, delta, 0.0), window, "mean")
+    rs = gain / np.where(loss != 0, loss, np.inf)  # Éviter division par zéro
+    return 100 - np.where(rs != np.inf, 100 / (1 + rs), 100)  # RSI = 100 si loss = 0
+
+def _rsi(out, s, col):
+    """RSI à fenêtre adaptative : 14, ou 10 si la volatilité sur 20 périodes dépasse 2 %."""
+    volatility = col["VOLATILITY_20"][-1] if len(s.close) >= 20 else 1.0
+    out[:] = _rsi_values(s.delta, 14 if volatility < 2 else 10)
+
+def _adx(out, s, col):
+    """ADX (tableaux de travail libérés au fur et à mesure)."""
+    window = 14 if s.interval in ["1D", "1W"] else 10
+    n = len(s.high)
+    plus_dm = np.empty(n)
+    plus_dm[:1] = np.nan
+    np.subtract(s.high[1:], s.high[:-1], out=plus_dm[1:])
+    plus_dm[plus_dm < 0] = 0
+    minus_dm = np.empty(n)
+    minus_dm[:1] = np.nan
+    np.subtract(s.low[:-1], s.low[1:], out=minus_dm[1:])  # -diff(low), négatif ramené à 0
+    minus_dm[minus_dm < 0] = 0
+    tr_sum = _rolling(col["TR"], window, "sum")
+    plus_di = 100 * _rolling(plus_dm, window, "sum") / tr_sum
+    del plus_dm
+    minus_di = 100 * _rolling(minus_dm, window, "sum") / tr_sum
+    del minus_dm, tr_sum
+    dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    del plus_di, minus_di
+    out[:] = _rolling(dx, window, "mean")
+
+def _sr_window(s):
+    return 10 if s.interval in ["1H", "4H"] else 20
+
+def _series(compute):
+    """Adapte un calcul renvoyant un tableau (inputs, colonnes) -> tableau à l'écriture dans sa colonne du tampon."""
+    def write(out, s, col):
+        out[:] = compute(s, col)
+    return write
+
+def _fibo(level):
+    def write(out, s, col):
+        np.subtract(col["RESISTANCE"], col["SUPPORT"], out=out)
+        out *= level
+        out += col["SUPPORT"]
+    return write
+
+# Graphe des indicateurs float64, dans l'ordre des colonnes produites :
+# colonne -> (colonnes dont elle dépend, calcul écrivant dans sa colonne du tampon)
+FEATURES = {
+    "TR": ([], _tr),
+    "ATR_14": (["TR"], _series(lambda s, col: _rolling(col["TR"], 14, "mean"))),
+    "EMA_12": ([], _series(lambda s, col: _ewm(s.close, 12))),
+    "EMA_20": ([], _series(lambda s, col: _ewm(s.close, 20))),
+    "EMA_26": ([], _series(lambda s, col: _ewm(s.close, 26))),
+    "MACD": (["EMA_12", "EMA_26"], lambda out, s, col: np.subtract(col["EMA_12"], col["EMA_26"], out=out)),
+    "MACD_SIGNAL": (["MACD"], _series(lambda s, col: _ewm(col["MACD"], 9))),
+    "VOLATILITY_20": ([], _series(lambda s, col: _rolling(s.returns, 20, "std") * 100)),
+    "RSI": (["VOLATILITY_20"], _rsi),
+    "ADX": (["TR"], _adx),
+    "SUPPORT": ([], _series(lambda s, col: _ewm(_rolling(s.low, _sr_window(s), "min"), _sr_window(s)))),
+    "RESISTANCE": ([], _series(lambda s, col: _ewm(_rolling(s.high, _sr_window(s), "max"), _sr_window(s)))),
+    "FIBO_0.382": (["SUPPORT", "RESISTANCE"], _fibo(0.382)),
+    "FIBO_0.618": (["SUPPORT", "RESISTANCE"], _fibo(0.618)),
+    "BB_MID": ([], _series(lambda s, col: _rolling(s.close, 20, "mean"))),
+    "BB_STD": ([], _series(lambda s, col: _rolling(s.close, 20, "std"))),
+    "BB_UPPER": (["BB_MID", "BB_STD"], lambda out, s, col: np.add(col["BB_MID"], 2 * col["BB_STD"], out=out)),
+    "BB_LOWER": (["BB_MID", "BB_STD"], lambda out, s, col: np.subtract(col["BB_MID"], 2 * col["BB_STD"], out=out)),
+    "VOLUME_MA_20": ([], _series(lambda s, col: _rolling(s.volume, 20, "mean"))),
+}
+# Colonne entière calculée après le tampon float64
+DIVERGENCE_DEPENDENCIES = ["RSI"]
+ALL_FEATURES = list(FEATURES) + ["RSI_DIVERGENCE"]
+
+def resolve_features(features=None):
+    """Indicateurs à calculer pour obtenir `features` (tous par défaut), dépendances comprises, dans l'ordre de ALL_FEATURES."""
+    if features is None:
+        return list(ALL_FEATURES)
+    needed = set()
+    pending = list(features)
+    while pending:
+        name = pending.pop()
+        if name in needed:
+            continue
+        if name == "RSI_DIVERGENCE":
+            dependencies = DIVERGENCE_DEPENDENCIES
+        elif name in FEATURES:
+            dependencies = FEATURES[name][0]
+        else:
+            raise ValueError(f"Indicateur inconnu : {name}")
+        needed.add(name)
+        pending.extend(dependencies)
+    return [name for name in ALL_FEATURES if name in needed]
+
+def _indicator_kernel(high, low, close, volume, interval, features=None):
+    """Indicateurs sur des tableaux float64 contigus, écrits dans un tampon 2D pré-alloué.
+
+    Renvoie (tampon (n, k) en ordre Fortran, colonnes du tampon, divergences RSI
+    ou None) : chaque colonne du tampon est contiguë et devient un bloc du
+    DataFrame sans copie. Seuls les indicateurs de resolve_features(features) sont
+    calculés ; les intermédiaires (close décalé, delta, rendements) ne le sont qu'une fois.
+    """
+    selected = resolve_features(features)
+    columns = [name for name in selected if name in FEATURES]
+    buffer = np.empty((len(close), len(columns)), order="F")
+    col = {name: buffer[:, i] for i, name in enumerate(columns)}
+    inputs = _Inputs(high, low, close, volume, interval)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name in columns:
+            FEATURES[name][1](col[name], inputs, col)
+    # Détection des divergences RSI
+    divergence = _window_divergence(close, col["RSI"], 5) if "RSI_DIVERGENCE" in selected else None
+    return buffer, columns, divergence
+
+def point_in_time_rsi(df):
+    """RSI et RSI_DIVERGENCE sans look-ahead, pour les backtests.
+
+    calculate_indicators choisit la fenêtre RSI adaptative d'après la volatilité
+    de la dernière bougie et l'applique à toute la série. Ici, la fenêtre est
+    choisie barre par barre d'après VOLATILITY_20 : chaque ligne vaut celle de
+    calculate_indicators(df.iloc[:t + 1]). Renvoie une copie de df avec RSI,
+    RSI_DIVERGENCE et RSI_WINDOW (fenêtre retenue) remplacés.
+    """
+    close = df["close"].to_numpy(dtype=np.float64)
+    if "VOLATILITY_20" in df.columns:
+        volatility = df["VOLATILITY_20"].to_numpy(dtype=np.float64)
+    else:
+        volatility = df["close"].pct_change().rolling(window=20).std().to_numpy() * 100
+    delta = np.empty(len(close))
+    delta[:1] = np.nan
+    delta[1:] = close[1:] - close[:-1]
+    # Moins de 20 bougies : volatilité 1.0, donc fenêtre 14 (une volatilité NaN donne 10, comme dans _rsi)
+    windows = np.where((np.arange(len(close)) < 19) | (volatility < 2), 14, 10)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = {window: _rsi_values(delta, window) for window in (14, 10)}
+    is_14 = windows == 14
+    return df.assign(
+        RSI=np.where(is_14, rsi[14], rsi[10]),
+        RSI_DIVERGENCE=np.where(is_14, _window_divergence(close, rsi[14], 5), _window_divergence(close, rsi[10], 5)),
+        RSI_WINDOW=windows,
+    )
+
+def _calculate_indicators(df, interval, features=None):
+    """Corps de calculate_indicators (tracé par un span "indicators").
+
+    Renvoie un nouveau DataFrame : colonnes de df (OHLCV converties en nombres)
+    suivies des indicateurs ; un indicateur déjà présent est remplacé sur place.
+    """
     try:
         # Normaliser l’intervalle
         interval = interval.upper()
-        
+
         # Vérifier les colonnes nécessaires
         required_columns = ["open", "high", "low", "close", "volume"]
+        converted = {}
         for col in required_columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-            if df[col].isnull().any():
+            series = df[col]
+            if not pd.api.types.is_numeric_dtype(series):
+                series = converted[col] = pd.to_numeric(series, errors='coerce')
+            if series.isnull().any():
                 logger.error(f"Données non numériques ou manquantes dans {col}")
                 raise ValueError(f"Données non numériques ou manquantes dans {col}")
+        if converted:
+            df = df.assign(**converted)
+
+        buffer, columns, divergence = _indicator_kernel(
+            *(df[col].to_numpy(dtype=np.float64) for col in ["high", "low", "close", "volume"]),
+            interval, features,
+        )
+        indicators = pd.DataFrame(buffer, index=df.index, columns=columns, copy=False)
+        if divergence is not None:
+            indicators["RSI_DIVERGENCE"] = divergence
 
-        # Calcul de l’ATR
-        df["TR"] = np.maximum.reduce([
-            df["high"] - df["low"],
-            (df["high"] - df["close"].shift(1)).abs(),
-            (df["low"] - df["close"].shift(1)).abs()
-        ])
-        df["ATR_14"] = df["TR"].rolling(window=14).mean()
-
-        # Calcul des EMA
-        df["EMA_12"] = df["close"].ewm(span=12, adjust=False).mean()
-        df["EMA_20"] = df["close"].ewm(span=20, adjust=False).mean()
-        df["EMA_26"] = df["close"].ewm(span=26, adjust=False).mean()
-
-        # Calcul du MACD
-        df["MACD"] = df["EMA_12"] - df["EMA_26"]
-        df["MACD_SIGNAL"] = df["MACD"].ewm(span=9, adjust=False).mean()
-
-        # Calcul du RSI avec gestion de division par zéro
-        volatility = df["close"].pct_change().rolling(window=20).std().iloc[-1] * 100 if len(df) >= 20 else 1.0
-        rsi_window = 14 if volatility < 2 else 10
-        delta = df["close"].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=rsi_window).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_window).mean()
-        rs = gain / loss.where(loss != 0, np.inf)  # Éviter division par zéro
-        df["RSI"] = 100 - (100 / (1 + rs)).where(rs != np.inf, 100)  # RSI = 100 si loss = 0
-
-        # Calcul de l’ADX
-        adx_window = 14 if interval in ["1D", "1W"] else 10
-        plus_dm = df["high"].diff()
-        minus_dm = df["low"].diff()
-        plus_dm[plus_dm < 0] = 0
-        minus_dm[minus_dm > 0] = 0
-        tr = df["TR"]
-        plus_di = 100 * plus_dm.rolling(window=adx_window).sum() / tr.rolling(window=adx_window).sum()
-        minus_di = 100 * (-minus_dm).rolling(window=adx_window).sum() / tr.rolling(window=adx_window).sum()
-        dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di)
-        df["ADX"] = dx.rolling(window=adx_window).mean()
-
-        # Calcul des niveaux de support/résistance
-        window = 10 if interval in ["1H", "4H"] else 20
-        df["SUPPORT"] = df["low"].rolling(window=window).min().ewm(span=window, adjust=False).mean()
-        df["RESISTANCE"] = df["high"].rolling(window=window).max().ewm(span=window, adjust=False).mean()
-
-        # Calcul des niveaux de Fibonacci
-        price_range = df["RESISTANCE"] - df["SUPPORT"]
-        df["FIBO_0.382"] = df["SUPPORT"] + price_range * 0.382
-        df["FIBO_0.618"] = df["SUPPORT"] + price_range * 0.618
-
-        # Calcul des bandes de Bollinger
-        bb_window = 20
-        df["BB_MID"] = df["close"].rolling(window=bb_window).mean()
-        df["BB_STD"] = df["close"].rolling(window=bb_window).std()
-        df["BB_UPPER"] = df["BB_MID"] + 2 * df["BB_STD"]
-        df["BB_LOWER"] = df["BB_MID"] - 2 * df["BB_STD"]
-
-        # Détection des divergences RSI
-        df = detect_rsi_divergence(df, window=5)
-
-        return df
+        existing = [col for col in indicators.columns if col in df.columns]
+        if existing:
+            df = df.copy()
+            df[existing] = indicators[existing]
+            indicators = indicators.drop(columns=existing)
+        return pd.concat([df, indicators], axis=1)
 
     except Exception as e:
         logger.error(f"Erreur calcul indicateurs : {e}")
@@ -0,0 +1,131 @@
+VERSION = "1.0.1"  # Incrémenté de 1.0.0 pour parse_row (messages kline du flux websocket)
+
+import logging
+from operator import itemgetter
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Schéma normalisé commun à tous les fournisseurs (et au stockage local)
+SCHEMA = {
+    "timestamp": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+    "close_time": np.int64,
+    "quote_asset_volume": np.float64,
+    "number_of_trades": np.int64,
+    "taker_buy_base": np.float64,
+    "taker_buy_quote": np.float64,
+}
+COLUMNS = list(SCHEMA)
+TIME_COLUMNS = ("timestamp", "close_time")
+
+# Position (index ou clé) de chaque colonne dans une ligne de la réponse ; absente -> 0.
+# Le second élément convertit l'horodatage du fournisseur en millisecondes.
+LAYOUTS = {
+    "binance": ({column: i for i, column in enumerate(COLUMNS)}, 1),
+    "coincap": ({
+        "timestamp": "period", "open": "open", "high": "high", "low": "low",
+        "close": "close", "volume": "volume", "close_time": "period",
+    }, 1),
+    "kraken": ({
+        "timestamp": 0, "open": 1, "high": 2, "low": 3, "close": 4,
+        "volume": 6, "close_time": 0, "number_of_trades": 7,
+    }, 1000),
+    # Objet "k" des messages kline du websocket Binance
+    "binance_ws": ({
+        "timestamp": "t", "open": "o", "high": "h", "low": "l", "close": "c", "volume": "v",
+        "close_time": "T", "quote_asset_volume": "q", "number_of_trades": "n",
+        "taker_buy_base": "V", "taker_buy_quote": "Q",
+    }, 1),
+}
+PROVIDER_LAYOUTS = {
+    "binance_proxy": "binance",
+    "binance_futures": "binance",
+    "coincap": "coincap",
+    "kraken": "kraken",
+}
+
+def _column(rows, key, dtype, column):
+    """Tableau typé pré-alloué pour une colonne, en un passage sur les lignes.
+
+    Les valeurs non numériques (chaînes invalides, null) deviennent NaN (0 pour
+    les colonnes entières), comme pd.to_numeric(errors="coerce").
+    """
+    getter = itemgetter(key)
+    try:
+        if dtype is np.float64:
+            return np.fromiter(map(float, map(getter, rows)), dtype, count=len(rows))
+        return np.fromiter(map(int, map(getter, rows)), dtype, count=len(rows))
+    except (TypeError, ValueError):
+        logger.warning(f"Valeurs non numériques dans {column}, remplacées par NaN")
+        values = pd.to_numeric(pd.Series(list(map(getter, rows)), dtype=object), errors="coerce")
+        if dtype is np.int64:
+            values = values.fillna(0)
+        return values.to_numpy(dtype=dtype)
+
+def from_rows(rows, layout=None, time_scale=1):
+    """DataFrame au schéma normalisé à partir de lignes (listes ou dictionnaires).
+
+    Sans layout, les lignes suivent l'ordre de COLUMNS (réponse Binance, lignes SQLite).
+    """
+    layout = LAYOUTS["binance"][0] if layout is None else layout
+    parsed = {}
+    columns = {}
+    for column, dtype in SCHEMA.items():
+        key = layout.get(column)
+        if key is None:
+            columns[column] = np.zeros(len(rows), dtype)
+        elif (key, dtype) in parsed:
+            columns[column] = parsed[(key, dtype)].copy()
+        else:
+            columns[column] = parsed[(key, dtype)] = _column(rows, key, dtype, column)
+    if time_scale != 1:
+        for column in TIME_COLUMNS:
+            columns[column] *= time_scale
+    return pd.DataFrame(columns, copy=False)
+
+def parse_row(row, layout_name):
+    """Une seule ligne (message temps réel) -> dictionnaire au schéma normalisé."""
+    layout, time_scale = LAYOUTS[layout_name]
+    candle = {}
+    for column, dtype in SCHEMA.items():
+        key = layout.get(column)
+        if dtype is np.int64:
+            candle[column] = int(row[key]) if key is not None else 0
+        else:
+            candle[column] = float(row[key]) if key is not None else 0.0
+    for column in TIME_COLUMNS:
+        candle[column] *= time_scale
+    return candle
+
+def provider_rows(provider, symbol, data):
+    """Lignes de bougies contenues dans la réponse JSON d'un fournisseur."""
+    if provider in ("binance_proxy", "binance_futures"):
+        return data
+    if provider == "coincap":
+        return data.get("data", [])
+    if provider == "kraken":
+        kraken_symbol = symbol.replace("USDT", "USD").replace("BTC", "XBT")
+        return data["result"].get(kraken_symbol, [])
+    raise ValueError(f"Fournisseur de bougies inconnu : {provider}")
+
+def parse(provider, symbol, data):
+    """Réponse JSON d'un fournisseur -> DataFrame normalisé (mêmes colonnes et dtypes pour tous)."""
+    rows = provider_rows(provider, symbol, data)
+    layout, time_scale = LAYOUTS[PROVIDER_LAYOUTS[provider]]
+    return from_rows(rows, layout, time_scale)
+
+def normalize(df):
+    """Ramène un DataFrame de bougies au schéma normalisé (colonnes manquantes à 0, close_time par défaut = timestamp)."""
+    frame = df.reindex(columns=COLUMNS)
+    frame["close_time"] = frame["close_time"].fillna(frame["timestamp"])
+    for column, dtype in SCHEMA.items():
+        if dtype is np.int64:
+            frame[column] = frame[column].fillna(0)
+    return frame.astype(SCHEMA)
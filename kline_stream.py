@@ -0,0 +1,290 @@
+VERSION = "1.0.1"  # Incrémenté de 1.0.0 pour écritures candle_store hors de la boucle asyncio (par lot en reprise)
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+import aiohttp
+from aiohttp import web
+import numpy as np
+import pandas as pd
+import candle_store
+import http_client
+import kline_parser
+import telemetry
+from analyzer import MTFAContext, analyze_technical, generate_recommendation
+from data_fetcher import KLINES_LIMIT, fetch_klines
+from incremental_indicators import IncrementalIndicators
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+STREAM_URL = os.environ.get("KLINE_STREAM_URL", "wss://stream.binance.com:9443/stream")
+STREAM_PROVIDER = "binance_proxy"  # Flux Binance spot : mêmes bougies que le proxy, partagées dans candle_store
+HEARTBEAT = 20.0  # Intervalle (s) des pings websocket
+RECONNECT_BACKOFF = 1.0  # Délai de base (s) du backoff exponentiel de reconnexion
+
+def stream_name(symbol, interval):
+    """Nom du flux combiné Binance, ex : btcusdt@kline_1h."""
+    return f"{symbol.lower()}@kline_{interval.lower()}"
+
+def kline_message(symbol, interval, candle, closed):
+    """Message kline au format du flux combiné Binance pour une bougie (colonnes absentes à 0)."""
+    layout, _ = kline_parser.LAYOUTS["binance_ws"]
+    k = {key: int(candle.get(column, 0)) if kline_parser.SCHEMA[column] is np.int64 else str(candle.get(column, 0.0))
+         for column, key in layout.items()}
+    k.update({"s": symbol, "i": interval.lower(), "x": closed})
+    return {"stream": stream_name(symbol, interval), "data": {"e": "kline", "E": int(time.time() * 1000), "s": symbol, "k": k}}
+
+class KlineStream:
+    """Tampons de bougies par (symbole, intervalle) alimentés par un flux websocket kline.
+
+    Les bougies en cours (x=false) ne déclenchent rien ; à chaque clôture, les
+    indicateurs sont mis à jour en O(1) (IncrementalIndicators) puis la
+    recommandation est recalculée et passée à on_signal. Après une reconnexion
+    ou un trou dans la séquence, les bougies manquantes sont reprises via
+    `backfill` (fetch_klines par défaut, delta depuis candle_store). Les
+    bougies clôturées sont enregistrées dans candle_store depuis un thread
+    (persist=True), une écriture par lot de reprise.
+    """
+
+    def __init__(self, symbols, intervals=("1h",), url=STREAM_URL, on_signal=None, backfill=fetch_klines,
+                 history=KLINES_LIMIT, persist=True):
+        self.symbols = [s.upper() if s.upper().endswith("USDT") else s.upper() + "USDT" for s in symbols]
+        self.intervals = [intv.lower() for intv in intervals]
+        self.url = url
+        self.on_signal = on_signal
+        self.backfill = backfill
+        self.history = history
+        self.persist = persist
+        self.engines = {}
+        self.last_timestamps = {}
+        self.signals = {}
+        self.fundamental_scores = {}  # Score fondamental par symbole (0 par défaut), à tenir à jour par l'appelant
+        self.macro_score = 0.0
+        self.connections = 0
+        self._stop = None
+        self._ws = None
+
+    def stream_url(self):
+        streams = "/".join(stream_name(s, intv) for s in self.symbols for intv in self.intervals)
+        return f"{self.url}?streams={streams}"
+
+    def _add(self, key, candle):
+        """Ajoute une bougie clôturée au tampon ; False si elle est déjà connue."""
+        if candle["timestamp"] <= self.last_timestamps.get(key, -1):
+            return False
+        candle.setdefault("date", pd.Timestamp(candle["timestamp"], unit="ms"))
+        self.engines[key].update(candle)
+        self.last_timestamps[key] = candle["timestamp"]
+        return True
+
+    async def _persist(self, key, candles):
+        """Enregistre des bougies clôturées dans candle_store (SQLite) sans bloquer la boucle."""
+        if self.persist and candles:
+            await asyncio.to_thread(candle_store.append, key[0], key[1], STREAM_PROVIDER, pd.DataFrame(candles))
+
+    async def _backfill(self, key, before_ms=None):
+        """Reprend via REST les bougies clôturées manquantes du tampon (avant before_ms) ; renvoie leur nombre."""
+        symbol, interval = key
+        start_time = datetime.now()
+        df = await asyncio.to_thread(self.backfill, symbol, interval)
+        if df is None or df.empty:
+            logger.warning(f"kline_stream: reprise impossible pour {symbol} ({interval})")
+            return 0
+        if key not in self.engines:
+            self.engines[key] = IncrementalIndicators(interval, self.history)
+        now_ms = int(time.time() * 1000)
+        interval_ms = candle_store.INTERVAL_MS[interval]
+        added = []
+        for candle in df.to_dict("records"):
+            closed = candle["timestamp"] + interval_ms <= now_ms
+            if closed and (before_ms is None or candle["timestamp"] < before_ms) and self._add(key, candle):
+                added.append(candle)
+        await self._persist(key, added)
+        logger.info(f"kline_stream: {len(added)} bougies reprises pour {symbol} ({interval}) en {(datetime.now() - start_time).total_seconds():.2f}s")
+        return len(added)
+
+    async def seed(self):
+        """Amorce (ou complète après reconnexion) tous les tampons via REST."""
+        await asyncio.gather(*(self._backfill((s, intv)) for s in self.symbols for intv in self.intervals))
+
+    async def handle_message(self, payload):
+        """Traite un message du flux ; renvoie le signal recalculé si une bougie vient de clôturer."""
+        data = payload.get("data", payload)
+        if data.get("e") != "kline":
+            return None
+        k = data["k"]
+        if not k.get("x"):
+            return None
+        received = time.perf_counter()
+        key = (k["s"].upper(), k["i"].lower())
+        if key not in self.engines:
+            return None
+        candle = kline_parser.parse_row(k, "binance_ws")
+        expected = self.last_timestamps.get(key, -1) + candle_store.INTERVAL_MS[key[1]]
+        if candle["timestamp"] > expected:
+            logger.warning(f"kline_stream: trou détecté pour {key[0]} ({key[1]}), reprise REST")
+            await self._backfill(key, before_ms=candle["timestamp"])
+        if not self._add(key, candle):
+            return None
+        result = self._evaluate(key, received)
+        await self._persist(key, [candle])
+        return result
+
+    def _evaluate(self, key, received):
+        """Recommandation sur les tampons du symbole après la clôture d'une bougie."""
+        symbol, interval = key
+        with telemetry.span("analysis", symbol=symbol, interval=interval, source="stream") as attributes:
+            price_data_dict = {
+                intv: self.engines[(symbol, intv)].to_frame()
+                for intv in self.intervals if self.engines.get((symbol, intv)) and self.engines[(symbol, intv)].count
+            }
+            price_data = price_data_dict[interval]
+            interval_input = interval.upper()
+            mtfa_context = MTFAContext(price_data_dict)
+            technical_score, technical_details = analyze_technical(price_data, interval_input, price_data_dict, mtfa_context)
+            fundamental_score = self.fundamental_scores.get(symbol, 0.0)
+            signal, confidence, buy_price, sell_price = generate_recommendation(
+                price_data, technical_score, fundamental_score, self.macro_score, interval_input, price_data_dict, mtfa_context
+            )
+            result = {
+                "symbol": symbol,
+                "interval": interval_input,
+                "timestamp": int(price_data["timestamp"].iloc[-1]),
+                "signal": signal,
+                "confidence": float(confidence),
+                "price": float(price_data["close"].iloc[-1]),
+                "buy_price": float(buy_price),
+                "sell_price": float(sell_price),
+                "technical_score": float(technical_score),
+                "technical_details": technical_details,
+                "latency": time.perf_counter() - received,
+            }
+            attributes["latency"] = round(result["latency"], 4)
+        self.signals[key] = result
+        if self.on_signal is not None:
+            self.on_signal(result)
+        return result
+
+    async def run(self):
+        """Boucle de réception : amorçage, connexion, reconnexion avec backoff et reprise des trous."""
+        self._stop = asyncio.Event()
+        await self.seed()
+        attempt = 0
+        async with aiohttp.ClientSession() as session:
+            while not self._stop.is_set():
+                try:
+                    async with session.ws_connect(self.stream_url(), heartbeat=HEARTBEAT) as ws:
+                        self._ws = ws
+                        self.connections += 1
+                        if self.connections > 1:
+                            await self.seed()  # Bougies clôturées pendant la déconnexion
+                        attempt = 0
+                        logger.info(f"kline_stream: connecté ({len(self.symbols)} symboles, {', '.join(self.intervals)})")
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                await self.handle_message(json.loads(msg.data))
+                            elif msg.type == aiohttp.WSMsgType.ERROR:
+                                break
+                            if self._stop.is_set():
+                                break
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                    logger.warning(f"kline_stream: connexion perdue ({e!r})")
+                if self._stop.is_set():
+                    break
+                delay = http_client.backoff_delay(attempt, RECONNECT_BACKOFF)
+                attempt += 1
+                logger.info(f"kline_stream: reconnexion dans {delay:.2f}s (tentative {attempt})")
+                try:
+                    await asyncio.wait_for(self._stop.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    def stop(self):
+        """Demande l'arrêt de run() (à appeler depuis la boucle du flux)."""
+        if self._stop is not None:
+            self._stop.set()
+        if self._ws is not None and not self._ws.closed:
+            asyncio.ensure_future(self._ws.close())
+
+class ReplayServer:
+    """Serveur websocket local rejouant des bougies au format du flux combiné Binance.
+
+    frames : {(symbole, intervalle): DataFrame de bougies}. Chaque bougie est
+    envoyée `ticks` fois en cours puis une fois clôturée, toutes séries
+    confondues par ordre de clôture. drop_after coupe la première connexion
+    après ce nombre de messages et `gap` bougies sont alors sautées, pour
+    exercer la reconnexion et la reprise REST.
+    """
+
+    def __init__(self, frames, host="127.0.0.1", port=8765, delay=0.0, ticks=1, drop_after=None, gap=0):
+        self.frames = {}
+        for (symbol, interval), df in frames.items():
+            frame = kline_parser.normalize(df)
+            frame["close_time"] = frame["timestamp"] + candle_store.INTERVAL_MS[interval.lower()] - 1
+            self.frames[(symbol.upper(), interval.lower())] = frame
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.ticks = ticks
+        self.drop_after = drop_after
+        self.gap = gap
+        self.sent = 0
+        self._position = 0
+        self._runner = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}/stream"
+
+    def _events(self, keys):
+        events = []
+        for key in keys:
+            for candle in self.frames.get(key, pd.DataFrame()).to_dict("records"):
+                events.append((candle["close_time"], key, candle))
+        events.sort(key=lambda event: (event[0], candle_store.INTERVAL_MS[event[1][1]]))
+        return events
+
+    async def _handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        keys = []
+        for name in request.query.get("streams", "").split("/"):
+            symbol, _, interval = name.partition("@kline_")
+            keys.append((symbol.upper(), interval))
+        events = self._events(keys)
+        if self._position:
+            self._position += self.gap
+        while self._position < len(events) and not ws.closed:
+            _, (symbol, interval), candle = events[self._position]
+            for tick in range(self.ticks + 1):
+                closed = tick == self.ticks
+                if not closed:
+                    partial = dict(candle, close=candle["open"] + (candle["close"] - candle["open"]) * (tick + 1) / (self.ticks + 1))
+                await ws.send_str(json.dumps(kline_message(symbol, interval, candle if closed else partial, closed)))
+                self.sent += 1
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+            self._position += 1
+            if self.drop_after is not None and self.sent >= self.drop_after:
+                self.drop_after = None
+                await ws.close()
+                return ws
+        await ws.close()
+        return ws
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/stream", self._handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"kline_stream: serveur de rejeu sur {self.url}")
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
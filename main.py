@@ -1,14 +1,19 @@
-VERSION = "7.2.3"  # Incrémenté pour correction du bug de mise à jour du symbole
+VERSION = "7.5.0"  # Incrémenté pour préchargement en arrière-plan de la watchlist (scheduler.py)
 
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import os
 import logging
+import time
+from contextlib import nullcontext
 from datetime import datetime, timezone
-from data_fetcher import fetch_all_data, VERSION as DATA_FETCHER_VERSION, COINCAP_ID_MAP
-from indicators import calculate_indicators, validate_data, VERSION as INDICATORS_VERSION
-from analyzer import analyze_technical, analyze_fundamental, analyze_macro, generate_recommendation, VERSION as ANALYZER_VERSION
+import telemetry
+import pipeline
+import scheduler
+from data_fetcher import VERSION as DATA_FETCHER_VERSION, COINCAP_ID_MAP
+from indicators import VERSION as INDICATORS_VERSION
+from analyzer import VERSION as ANALYZER_VERSION
 
 # Configurer le logger
 logging.basicConfig(level=logging.INFO)
@@ -24,12 +29,38 @@ logging.getLogger('').addHandler(stream_handler)
 # Clés API
 FRED_API_KEY = os.environ.get("FRED_API_KEY")
 ALPHA_VANTAGE_API_KEY = os.environ.get("ALPHA_VANTAGE_API_KEY")
+# 4h/1d/1w dérivés localement d'un historique 1h (une requête klines par symbole)
+DERIVE_INTERVALS = os.environ.get("DERIVE_INTERVALS", "0") == "1"
+# Export des histogrammes de latence après chaque analyse (.prom : texte Prometheus, sinon JSON)
+TELEMETRY_EXPORT_PATH = os.environ.get("TELEMETRY_EXPORT_PATH")
+PROFILE_PATH = os.environ.get("PROFILE_PATH", "analysis.prof")
+# Symboles préchargés après chaque clôture de bougie (ex : "BTC,ETH,SOL"), vide = désactivé
+PREFETCH_WATCHLIST = [s for s in os.environ.get("PREFETCH_WATCHLIST", "").split(",") if s.strip()]
+
+@st.cache_resource
+def get_fetch_cache():
+    """Cache des données récupérées, partagé entre les sessions Streamlit.
+
+    Bougies par (symbole, intervalle) jusqu'à la prochaine clôture, fondamentaux
+    et macro selon leur TTL : passer de BTC à ETH et revenir ne refait aucun appel.
+    """
+    return pipeline.MemoryCache()
+
+@st.cache_resource
+def get_scheduler():
+    """Préchargement de PREFETCH_WATCHLIST, un seul thread pour toutes les sessions."""
+    return scheduler.PrefetchScheduler(
+        PREFETCH_WATCHLIST, FRED_API_KEY, ALPHA_VANTAGE_API_KEY, get_fetch_cache(), derive=DERIVE_INTERVALS
+    ).start()
 
 # Vérification des clés API
 if not all([FRED_API_KEY, ALPHA_VANTAGE_API_KEY]):
     st.error("❌ Clés API manquantes. Configurez FRED_API_KEY et ALPHA_VANTAGE_API_KEY.")
     st.stop()
 
+if PREFETCH_WATCHLIST:
+    get_scheduler()
+
 # Interface Streamlit
 st.title("Assistant de Trading Crypto")
 st.write("Entrez les paramètres pour générer un plan de trading.")
@@ -38,6 +69,7 @@ st.write("Entrez les paramètres pour générer un plan de trading.")
 with st.form("trading_form"):
     symbol_input = st.text_input("🔍 Entrez la crypto (ex: BTC ou BTCUSDT)", "BTC").upper()
     interval_input = st.selectbox("⏳ Choisissez l’intervalle", ["1H", "4H", "1D", "1W"], index=0)
+    profile_run = st.checkbox("🔬 Profiler cette analyse (cProfile)", value=False)
     submit_button = st.form_submit_button("Lancer l’analyse")
 
 if submit_button:
@@ -53,34 +85,26 @@ if submit_button:
             log_stream.truncate(0)
 
             # Préparation des paramètres
-            symbol = symbol_input if symbol_input.endswith("USDT") else symbol_input + "USDT"
-            symbol_key = symbol_input.upper().replace("USDT", "")
-            coin_id = COINCAP_ID_MAP.get(symbol_key.lower(), symbol_key.lower())
+            symbol_key, symbol = pipeline.normalize_symbol(symbol_input)
             interval = interval_input.lower()
 
             # Vérifier si le symbole existe
             if symbol_key.lower() not in COINCAP_ID_MAP:
                 st.warning(f"⚠️ Symbole {symbol_key} non trouvé dans CoinCap. Tentative avec ID générique.")
 
-            # Purger cache si symbole change
-            if "last_symbol" not in st.session_state or st.session_state.last_symbol != symbol:
-                st.cache_data.clear()
-                st.session_state.last_symbol = symbol
-
-            # Récupération des données (cachée)
-            @st.cache_data(show_spinner=False)
-            def cached_fetch_all_data(_symbol, _interval, _coin_id, _fred_key, _alpha_key, _cache_key=None):
-                return fetch_all_data(_symbol, _interval, _coin_id, _fred_key, _alpha_key, _cache_key=_cache_key)
-
-            logger.info(f"Début de fetch_all_data pour {symbol} ({interval})")
-            price_data, fundamental_data, macro_data, price_data_dict = cached_fetch_all_data(
-                symbol, interval, coin_id, FRED_API_KEY, ALPHA_VANTAGE_API_KEY, _cache_key=symbol
-            )
+            fetch_cache = get_fetch_cache()
+            run_started = time.time()
+            profiler = telemetry.profile(PROFILE_PATH) if profile_run else nullcontext()
+            with profiler as profile_result:
+                # Récupération, indicateurs, analyse MTFA et recommandation (servies par le cache si préchargées)
+                logger.info(f"Début de l'analyse pour {symbol} ({interval})")
+                result, price_data_dict = pipeline.analyze(
+                    symbol, interval_input, FRED_API_KEY, ALPHA_VANTAGE_API_KEY, cache=fetch_cache, derive=DERIVE_INTERVALS
+                )
 
             # Validation des données
-            is_valid, validation_message = validate_data(price_data)
-            if not is_valid:
-                st.error(f"❌ Erreur : {validation_message}")
+            if "error" in result:
+                st.error(f"❌ Erreur : {result['error']}")
                 log_content = log_stream.getvalue()
                 if "451 Client Error" in log_content:
                     st.markdown("**Détails** : Accès à l’API Binance bloqué (erreur 451). Restrictions géographiques ou IP possible.")
@@ -91,48 +115,48 @@ if submit_button:
                 st.markdown("### Logs")
                 st.text("\n".join(log_stream.getvalue().splitlines()[-10:]))
                 st.stop()
-
-            # Calcul des indicateurs
-            price_data = calculate_indicators(price_data, interval_input)
-            for key in price_data_dict:
-                price_data_dict[key] = calculate_indicators(price_data_dict[key], key.upper())
-
-            # Analyse MTFA
-            technical_score, technical_details = analyze_technical(price_data, interval_input, price_data_dict)
-            fundamental_score, fundamental_details = analyze_fundamental(fundamental_data)
-            macro_score, macro_details = analyze_macro(macro_data, interval_input)
-
-            # Recommandation
-            signal, confidence, buy_price, sell_price = generate_recommendation(
-                price_data, technical_score, fundamental_score, macro_score, interval_input, price_data_dict
-            )
-
-            # Résultats
-            st.markdown("### Recommandation de trading")
-            st.markdown(f"**Préconisation** : {signal}")
-            st.markdown(f"**Prix d'achat** : ${buy_price:.2f}")
-            st.markdown(f"**Prix de vente** : ${sell_price:.2f}")
-
-            with st.expander("Détails de l’analyse"):
-                st.markdown(f"**Score technique** : {technical_score}")
-                for detail in technical_details:
-                    st.markdown(f"- {detail}")
-                st.markdown(f"**Score fondamental** : {fundamental_score}")
-                for detail in fundamental_details:
-                    st.markdown(f"- {detail}")
-                st.markdown(f"**Score macro** : {macro_score}")
-                for detail in macro_details:
-                    st.markdown(f"- {detail}")
-
-            # Logs
-            with st.expander("Logs"):
-                st.text("\n".join(log_stream.getvalue().splitlines()[-10:]))
-
-            # Visualisation
-            fig = px.line(price_data, x="date", y="close", title=f"Prix de {symbol}")
-            fig.add_scatter(x=price_data["date"], y=price_data["SUPPORT"], name="Support", line=dict(dash="dash"))
-            fig.add_scatter(x=price_data["date"], y=price_data["RESISTANCE"], name="Résistance", line=dict(dash="dash"))
-            st.plotly_chart(fig, key=f"chart_{symbol}_{interval}")
+            price_data = price_data_dict[interval]
+
+            with telemetry.span("render", symbol=symbol, interval=interval):
+                # Résultats
+                st.markdown("### Recommandation de trading")
+                st.markdown(f"**Préconisation** : {result['signal']}")
+                st.markdown(f"**Prix d'achat** : ${result['buy_price']:.2f}")
+                st.markdown(f"**Prix de vente** : ${result['sell_price']:.2f}")
+
+                with st.expander("Détails de l’analyse"):
+                    st.markdown(f"**Score technique** : {result['technical_score']}")
+                    for detail in result["technical_details"]:
+                        st.markdown(f"- {detail}")
+                    st.markdown(f"**Score fondamental** : {result['fundamental_score']}")
+                    for detail in result["fundamental_details"]:
+                        st.markdown(f"- {detail}")
+                    st.markdown(f"**Score macro** : {result['macro_score']}")
+                    for detail in result["macro_details"]:
+                        st.markdown(f"- {detail}")
+
+                # Logs
+                with st.expander("Logs"):
+                    st.text("\n".join(log_stream.getvalue().splitlines()[-10:]))
+
+                # Visualisation
+                fig = px.line(price_data, x="date", y="close", title=f"Prix de {symbol}")
+                fig.add_scatter(x=price_data["date"], y=price_data["SUPPORT"], name="Support", line=dict(dash="dash"))
+                fig.add_scatter(x=price_data["date"], y=price_data["RESISTANCE"], name="Résistance", line=dict(dash="dash"))
+                st.plotly_chart(fig, key=f"chart_{symbol}_{interval}")
+
+            # Télémétrie
+            with st.expander("Télémétrie"):
+                run_spans = [span for span in telemetry.recent_spans() if span["end"] >= run_started]
+                st.dataframe(pd.DataFrame(run_spans))
+                if profile_result:
+                    st.markdown(f"**Profil cProfile** : `{profile_result['path']}`")
+                    st.text(profile_result["summary"])
+            if TELEMETRY_EXPORT_PATH:
+                if TELEMETRY_EXPORT_PATH.endswith(".prom"):
+                    telemetry.export_prometheus(TELEMETRY_EXPORT_PATH)
+                else:
+                    telemetry.export_json(TELEMETRY_EXPORT_PATH)
 
             # Versions
             st.write(f"Versions : Main v{VERSION}, Analyzer v{ANALYZER_VERSION}, Data Fetcher v{DATA_FETCHER_VERSION}, Indicators v{INDICATORS_VERSION}")
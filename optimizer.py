@@ -0,0 +1,177 @@
+VERSION = "1.0.2"  # Incrémenté de 1.0.1 pour indicateurs sans look-ahead (backtester.prepare_frames)
+
+import argparse
+import dataclasses
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from analyzer import DEFAULT_PARAMS
+from backtester import (DEFAULT_FEE, DEFAULT_SLIPPAGE, compute_metrics, generate_signals, load_history,
+                        prepare_frames, simulate_fills)
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_FOLDS = 4
+DEFAULT_OBJECTIVE = "total_return"  # Clé de compute_metrics à maximiser
+WARMUP_BARS = 50  # Barres initiales exclues des segments (indicateurs incomplets)
+# Espace de recherche par défaut : liste de valeurs (grille ou tirage) ou bornes (min, max) pour le tirage aléatoire.
+# Les clés "champ.intervalle" modifient une entrée des dictionnaires de AnalyzerParams.
+SEARCH_SPACE = {
+    "rsi_overbought": [60, 65, 70, 75],
+    "rsi_oversold": [25, 30, 35, 40],
+    "adx_threshold": [20, 25, 30],
+    "score_threshold": [0.2, 0.3, 0.5, 0.8],
+    "volume_spike": [1.5, 2, 3],
+    "min_upside": [0.01, 0.02, 0.03],
+}
+
+def make_params(overrides, base=DEFAULT_PARAMS):
+    """AnalyzerParams à partir de base et d'un dictionnaire {champ ou "champ.intervalle": valeur}."""
+    changes = {}
+    for name, value in overrides.items():
+        field_name, _, interval = name.partition(".")
+        if interval:
+            changes.setdefault(field_name, dict(getattr(base, field_name)))[interval] = value
+        else:
+            changes[field_name] = value
+    return dataclasses.replace(base, **changes)
+
+def grid(space=SEARCH_SPACE):
+    """Toutes les combinaisons d'un espace {paramètre: liste de valeurs}."""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+def random_search(space=SEARCH_SPACE, samples=500, seed=0):
+    """`samples` combinaisons tirées au hasard (sans doublon) ; (min, max) = tirage uniforme, entier si les bornes le sont."""
+    rng = np.random.default_rng(seed)
+    configs, seen = [], set()
+    for _ in range(samples * 10):
+        if len(configs) >= samples:
+            break
+        config = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                config[name] = int(rng.integers(low, high + 1)) if isinstance(low, int) and isinstance(high, int) else round(float(rng.uniform(low, high)), 4)
+            else:
+                config[name] = values[rng.integers(len(values))]
+        key = tuple(sorted(config.items()))
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+def prepare_history(history):
+    """Indicateurs calculés une fois par (symbole, intervalle), partagés par tous les jeux de paramètres.
+
+    history : {symbole: price_data_dict} (voir backtester.load_history).
+    """
+    return {symbol: prepare_frames(price_data_dict) for symbol, price_data_dict in history.items()}
+
+def segment_bounds(n, folds=DEFAULT_FOLDS, warmup=WARMUP_BARS):
+    """Bornes [début, fin) de folds + 1 segments contigus de même taille après la période de chauffe."""
+    edges = np.linspace(min(warmup, n), n, folds + 2, dtype=int)
+    return list(zip(edges[:-1], edges[1:]))
+
+# Contexte des processus de calcul, transmis une seule fois par _init_worker
+_context = {}
+
+def _init_worker(frames, interval, folds, objective, fee, slippage):
+    _context.update(frames=frames, interval=interval, folds=folds, objective=objective, fee=fee, slippage=slippage)
+    logging.getLogger("analyzer").setLevel(logging.WARNING)
+
+def _evaluate(overrides):
+    """Objectif moyen (sur les symboles) de chaque segment et nombre de trades pour un jeu de paramètres."""
+    params = make_params(overrides)
+    interval = _context["interval"]
+    scores = np.zeros(_context["folds"] + 1)
+    trades = 0
+    for price_data_dict in _context["frames"].values():
+        df, signals = generate_signals(price_data_dict, interval, params=params)
+        for i, (start, stop) in enumerate(segment_bounds(len(df), _context["folds"])):
+            segment = df.iloc[start:stop]
+            equity, segment_trades, in_position, fees_paid = simulate_fills(
+                segment, signals.iloc[start:stop], _context["fee"], _context["slippage"]
+            )
+            metrics = compute_metrics(equity, segment_trades, in_position, fees_paid, segment["close"])
+            scores[i] += metrics[_context["objective"]]
+            trades += metrics["trades"]
+    return scores / len(_context["frames"]), trades
+
+def walk_forward(scores):
+    """Sélection walk-forward : au pli k, meilleur jeu sur les segments [0, k) évalué sur le segment k."""
+    rows = []
+    for k in range(1, scores.shape[1]):
+        train = scores[:, :k].mean(axis=1)
+        best = int(np.argmax(train))
+        rows.append({"fold": k, "config": best, "train": float(train[best]), "test": float(scores[best, k])})
+    return pd.DataFrame(rows)
+
+def optimize(history, interval="1H", configs=None, folds=DEFAULT_FOLDS, objective=DEFAULT_OBJECTIVE, workers=None,
+             fee=DEFAULT_FEE, slippage=DEFAULT_SLIPPAGE):
+    """Évalue chaque jeu de paramètres sur l'historique et les classe.
+
+    L'historique de l'intervalle principal est découpé en folds + 1 segments
+    (backtest indépendant par segment). Renvoie un dictionnaire :
+    - "ranking" : un jeu par ligne (0 = réglage par défaut), classé sur la moyenne
+      des folds premiers segments ("train"), avec le dernier segment en test
+      hors échantillon ("test") ;
+    - "walk_forward" : jeu retenu à chaque pli et son résultat sur le segment suivant ;
+    - "walk_forward_score" : moyenne de ces résultats hors échantillon.
+    Les jeux sont répartis par lots sur `workers` processus (tous les cœurs par défaut).
+    """
+    start_time = datetime.now()
+    configs = [{}] + [config for config in (grid() if configs is None else configs) if config]
+    frames = prepare_history(history)
+    interval = interval.upper()
+    workers = workers or os.cpu_count() or 1
+    init_args = (frames, interval, folds, objective, fee, slippage)
+    if workers == 1:
+        _init_worker(*init_args)
+        results = [_evaluate(config) for config in configs]
+    else:
+        chunksize = max(1, len(configs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as executor:
+            results = list(executor.map(_evaluate, configs, chunksize=chunksize))
+    scores = np.array([segment_scores for segment_scores, _ in results])
+
+    ranking = pd.DataFrame(configs)
+    ranking.insert(0, "config", range(len(configs)))
+    ranking["train"] = scores[:, :folds].mean(axis=1)
+    ranking["test"] = scores[:, folds]
+    for i in range(folds + 1):
+        ranking[f"segment_{i}"] = scores[:, i]
+    ranking["trades"] = [trades for _, trades in results]
+    wf = walk_forward(scores)
+    ranking["folds_won"] = ranking["config"].map(wf["config"].value_counts()).fillna(0).astype(int)
+    ranking = ranking.sort_values(["train", "test"], ascending=False).reset_index(drop=True)
+
+    logger.info(f"optimize: {len(configs)} jeux de paramètres, {len(frames)} symboles ({interval}), {workers} processus en {(datetime.now() - start_time).total_seconds():.2f}s")
+    return {"ranking": ranking, "walk_forward": wf, "walk_forward_score": float(wf["test"].mean()) if len(wf) else 0.0}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Optimisation des paramètres de l'analyzer sur l'historique local")
+    parser.add_argument("symbols", nargs="+", help="Paires, ex : BTCUSDT ETHUSDT")
+    parser.add_argument("--interval", default="1H", choices=["1H", "4H", "1D", "1W"])
+    parser.add_argument("--provider", default="binance_proxy")
+    parser.add_argument("--samples", type=int, default=0, help="Recherche aléatoire de N jeux (grille complète par défaut)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--objective", default=DEFAULT_OBJECTIVE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    history = {symbol.upper(): load_history(symbol.upper(), args.provider) for symbol in args.symbols}
+    configs = random_search(samples=args.samples, seed=args.seed) if args.samples else grid()
+    result = optimize(history, args.interval, configs, args.folds, args.objective, args.workers)
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(result["ranking"].head(args.top).to_string(index=False))
+        print(result["walk_forward"].to_string(index=False))
+    print(f"walk_forward_score: {result['walk_forward_score']:.4f}")
@@ -0,0 +1,258 @@
+VERSION = "1.0.2"  # Incrémenté de 1.0.1 pour conversion panel <-> DataFrames sans copies intermédiaires, alignée sur calculate_indicators
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import telemetry
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+OHLCV = ["open", "high", "low", "close", "volume"]
+RSI_WINDOWS = (14, 10)  # Fenêtre retenue par symbole selon la volatilité, comme calculate_indicators
+VOLATILITY_WINDOW = 20
+VOLUME_WINDOW = 20
+BB_WINDOW = 20
+DIVERGENCE_WINDOW = 5
+MIN_CHUNK = 64  # Nombre minimal de symboles par thread
+
+def _rolling(x, window, reducer):
+    """Réduction glissante sur l'axe du temps ; NaN tant que la fenêtre est incomplète ou contient un NaN."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(x, window, axis=1)
+        out[:, window - 1:] = reducer(windows)
+    return out
+
+def _rolling_sum(x, window):
+    return _rolling(x, window, lambda w: w.sum(axis=-1))
+
+def _rolling_mean(x, window):
+    return _rolling(x, window, lambda w: w.mean(axis=-1))
+
+def _rolling_std(x, window):
+    return _rolling(x, window, lambda w: w.std(axis=-1, ddof=1))
+
+def _rolling_min(x, window):
+    return _rolling(x, window, lambda w: w.min(axis=-1))
+
+def _rolling_max(x, window):
+    return _rolling(x, window, lambda w: w.max(axis=-1))
+
+def _ema(x, span):
+    """ewm(span, adjust=False).mean() ligne par ligne : récurrence sur le temps, vectorisée sur les symboles.
+
+    Les NaN de tête (remplissage, fenêtres incomplètes) prennent la première
+    valeur valide de la ligne, ce qui laisse la récurrence inchangée, puis sont
+    remis à NaN.
+    """
+    alpha = 2 / (span + 1)
+    leading = np.cumsum(~np.isnan(x), axis=1) == 0
+    first = np.argmax(~leading, axis=1)
+    # Colonne par colonne sur une copie (temps, symboles) contiguë
+    filled = np.ascontiguousarray(np.where(leading, x[np.arange(x.shape[0]), first][:, None], x).T)
+    for t in range(1, filled.shape[0]):
+        filled[t] *= alpha
+        filled[t] += (1 - alpha) * filled[t - 1]
+    out = filled.T.copy()
+    out[leading] = np.nan
+    return out
+
+def _diff(x):
+    out = np.full(x.shape, np.nan)
+    out[:, 1:] = x[:, 1:] - x[:, :-1]
+    return out
+
+def _rsi(delta, valid, window):
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    # Les positions de remplissage (séries plus courtes) restent hors fenêtre
+    gain[~valid] = np.nan
+    loss[~valid] = np.nan
+    gain = _rolling_mean(gain, window)
+    loss = _rolling_mean(loss, window)
+    rs = gain / np.where(loss != 0, loss, np.inf)
+    return 100 - np.where(rs != np.inf, 100 / (1 + rs), 100)
+
+def _volatility(close):
+    """Volatilité (%) des rendements sur VOLATILITY_WINDOW périodes, pour chaque barre (VOLATILITY_20)."""
+    returns = np.full(close.shape, np.nan)
+    returns[:, 1:] = close[:, 1:] / close[:, :-1] - 1
+    return _rolling_std(returns, VOLATILITY_WINDOW) * 100
+
+def rsi_windows(close, volatility=None):
+    """Fenêtre RSI de chaque symbole : 14 si la volatilité des 20 derniers rendements est < 2 %, sinon 10."""
+    lengths = (~np.isnan(close)).sum(axis=1)
+    if volatility is None:
+        volatility = _volatility(close[:, -(VOLATILITY_WINDOW + 1):])
+    volatility = np.where(lengths >= VOLATILITY_WINDOW, volatility[:, -1], 1.0)
+    return np.where(volatility < 2, RSI_WINDOWS[0], RSI_WINDOWS[1])
+
+def _divergence(close, rsi, window):
+    divergence = np.zeros(close.shape, dtype=np.int64)
+    if close.shape[1] <= window:
+        return divergence
+    price_change = close[:, window:] - close[:, :-window]
+    rsi_change = rsi[:, window:] - rsi[:, :-window]
+    divergence[:, window:] = np.where(
+        (price_change < 0) & (rsi_change > 0), 1,
+        np.where((price_change > 0) & (rsi_change < 0), -1, 0)
+    )
+    return divergence
+
+def _calculate_chunk(panel, interval):
+    """Indicateurs d'un bloc de symboles (tableaux (symboles, temps))."""
+    high, low, close = panel["high"], panel["low"], panel["close"]
+    out = dict(panel)
+    valid = ~np.isnan(close)
+
+    prev_close = np.full(close.shape, np.nan)
+    prev_close[:, 1:] = close[:, :-1]
+    tr = np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+    out["TR"] = tr
+    out["ATR_14"] = _rolling_mean(tr, 14)
+
+    out["EMA_12"] = _ema(close, 12)
+    out["EMA_20"] = _ema(close, 20)
+    out["EMA_26"] = _ema(close, 26)
+    out["MACD"] = out["EMA_12"] - out["EMA_26"]
+    out["MACD_SIGNAL"] = _ema(out["MACD"], 9)
+
+    delta = _diff(close)
+    out["VOLATILITY_20"] = _volatility(close)
+    windows = rsi_windows(close, out["VOLATILITY_20"])
+    rsi = np.empty(close.shape)
+    for window in RSI_WINDOWS:
+        rows = windows == window
+        if rows.any():
+            rsi[rows] = _rsi(delta[rows], valid[rows], window)
+    out["RSI"] = rsi
+    out["RSI_WINDOW"] = windows
+
+    adx_window = 14 if interval in ["1D", "1W"] else 10
+    plus_dm = _diff(high)
+    minus_dm = _diff(low)
+    plus_dm[plus_dm < 0] = 0
+    minus_dm[minus_dm > 0] = 0
+    tr_sum = _rolling_sum(tr, adx_window)
+    plus_di = 100 * _rolling_sum(plus_dm, adx_window) / tr_sum
+    minus_di = 100 * _rolling_sum(-minus_dm, adx_window) / tr_sum
+    dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    out["ADX"] = _rolling_mean(dx, adx_window)
+
+    window = 10 if interval in ["1H", "4H"] else 20
+    out["SUPPORT"] = _ema(_rolling_min(low, window), window)
+    out["RESISTANCE"] = _ema(_rolling_max(high, window), window)
+    price_range = out["RESISTANCE"] - out["SUPPORT"]
+    out["FIBO_0.382"] = out["SUPPORT"] + price_range * 0.382
+    out["FIBO_0.618"] = out["SUPPORT"] + price_range * 0.618
+
+    out["BB_MID"] = _rolling_mean(close, BB_WINDOW)
+    out["BB_STD"] = _rolling_std(close, BB_WINDOW)
+    out["BB_UPPER"] = out["BB_MID"] + 2 * out["BB_STD"]
+    out["BB_LOWER"] = out["BB_MID"] - 2 * out["BB_STD"]
+
+    out["VOLUME_MA_20"] = _rolling_mean(panel["volume"], VOLUME_WINDOW)
+    out["RSI_DIVERGENCE"] = _divergence(close, rsi, DIVERGENCE_WINDOW)
+    return out
+
+def calculate_panel(panel, interval, workers=None):
+    """Indicateurs de calculate_indicators pour un panel {colonne OHLCV: tableau (symboles, temps)}.
+
+    Renvoie un dictionnaire colonne -> tableau (symboles, temps), plus RSI_WINDOW
+    (symboles,) : la fenêtre RSI adaptative retenue pour chaque symbole. Les
+    séries plus courtes sont complétées à gauche par des NaN (voir panel_from_frames).
+    Au-delà de MIN_CHUNK symboles, les blocs sont répartis sur `workers` threads
+    (NumPy libère le GIL pendant les calculs).
+    """
+    interval = interval.upper()
+    panel = {col: np.asarray(panel[col], dtype=np.float64) for col in OHLCV if col in panel}
+    n_symbols = panel["close"].shape[0]
+    workers = workers or os.cpu_count() or 1
+    chunks = max(1, min(workers, n_symbols // MIN_CHUNK))
+    with telemetry.span("indicators", interval=interval.lower(), rows=panel["close"].size, symbols=n_symbols, chunks=chunks):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if chunks == 1:
+                return _calculate_chunk(panel, interval)
+            bounds = np.linspace(0, n_symbols, chunks + 1, dtype=int)
+            parts = [{col: values[start:stop] for col, values in panel.items()} for start, stop in zip(bounds[:-1], bounds[1:])]
+            with ThreadPoolExecutor(max_workers=chunks) as executor:
+                results = list(executor.map(lambda part: _calculate_chunk(part, interval), parts))
+    return {col: np.concatenate([result[col] for result in results]) for col in results[0]}
+
+def panel_from_frames(frames, length=None):
+    """Aligne des DataFrames OHLCV sur leur dernière bougie ; renvoie (symboles, panel).
+
+    `length` (par défaut la plus longue série) fixe le nombre de bougies ; les
+    séries plus courtes sont complétées à gauche par des NaN.
+    """
+    symbols = list(frames)
+    length = length or max((len(df) for df in frames.values()), default=0)
+    panel = {col: np.full((len(symbols), length), np.nan) for col in OHLCV}
+    timestamps = np.zeros((len(symbols), length), dtype=np.int64)
+    for i, symbol in enumerate(symbols):
+        df = frames[symbol]
+        n = min(len(df), length)
+        if not n:
+            continue
+        # Colonne par colonne : pas de sous-DataFrame ni de découpe iloc intermédiaires
+        for col in OHLCV:
+            values = df[col]
+            if not pd.api.types.is_numeric_dtype(values):
+                values = pd.to_numeric(values, errors="coerce")
+            panel[col][i, length - n:] = values.to_numpy(dtype=np.float64)[-n:]
+        if "timestamp" in df.columns:
+            timestamps[i, length - n:] = df["timestamp"].to_numpy(dtype=np.int64)[-n:]
+    panel["timestamp"] = timestamps
+    return symbols, panel
+
+def panel_to_frames(symbols, result, frames):
+    """Reconstitue un DataFrame par symbole (format de calculate_indicators) à partir d'un panel calculé.
+
+    Chaque DataFrame est assemblé en une concaténation : colonnes d'origine
+    (OHLCV converties en nombres), bloc float des indicateurs et RSI_DIVERGENCE,
+    découpés sans copie dans des blocs (symboles, temps, colonnes) préparés une
+    fois. Un indicateur déjà présent est remplacé sur place, comme calculate_indicators.
+    """
+    length = result["close"].shape[1]
+    columns = [col for col in result if col not in OHLCV and col not in ("timestamp", "RSI_WINDOW", "RSI_DIVERGENCE")]
+    block = np.stack([result[col] for col in columns], axis=-1)
+    divergence = result["RSI_DIVERGENCE"][:, :, None]
+    indicator_columns, divergence_columns = pd.Index(columns), pd.Index(["RSI_DIVERGENCE"])
+    computed = set(columns) | {"RSI_DIVERGENCE"}
+    out = {}
+    for i, symbol in enumerate(symbols):
+        df = frames[symbol]
+        if len(df) > length:
+            df = df.iloc[len(df) - length:]
+        start = length - len(df)
+        indicators = pd.DataFrame(block[i, start:], index=df.index, columns=indicator_columns, copy=False)
+        divergences = pd.DataFrame(divergence[i, start:], index=df.index, columns=divergence_columns, copy=False)
+        converted = {col: pd.to_numeric(df[col], errors="coerce") for col, dtype in df.dtypes.items()
+                     if col in OHLCV and not pd.api.types.is_numeric_dtype(dtype)}
+        if converted:
+            df = df.assign(**converted)
+        existing = [col for col in df.columns if col in computed]
+        if existing:
+            indicators = pd.concat([indicators, divergences], axis=1)
+            df = df.copy()
+            df[existing] = indicators[existing]
+            out[symbol] = pd.concat([df, indicators.drop(columns=existing)], axis=1)
+        else:
+            out[symbol] = pd.concat([df, indicators, divergences], axis=1)
+    return out
+
+def calculate_indicators_many(frames, interval, workers=None):
+    """Équivalent de {symbole: calculate_indicators(df, interval)} en un seul passage panel.
+
+    Le gain d'un ordre de grandeur vaut pour calculate_panel seul ; ici,
+    l'aller-retour DataFrame (un assemblage pandas par symbole) domine et le
+    gain tombe à environ 5x (100 symboles x 200 bougies). Pour une watchlist,
+    travailler directement sur le panel quand les DataFrames ne sont pas requis.
+    """
+    symbols, panel = panel_from_frames(frames)
+    result = calculate_panel(panel, interval, workers)
+    logger.info(f"panel_indicators: {len(symbols)} symboles ({interval}) calculés")
+    return panel_to_frames(symbols, result, frames)
@@ -0,0 +1,229 @@
+VERSION = "1.0.7"  # Incrémenté de 1.0.6 pour délai de grâce limité aux analyses surveillées et plafonné
+
+import logging
+import sys
+import threading
+import time
+from datetime import datetime
+import cachetools
+import pandas as pd
+import resampler
+import telemetry
+from async_fetcher import INTERVALS, fetch_parts_sync
+from data_fetcher import COINCAP_ID_MAP, TTL_CACHE_SECONDS
+from indicators import calculate_indicators, validate_data
+from analyzer import REQUIRED_FEATURES, MTFAContext, analyze_technical, analyze_fundamental, analyze_macro, generate_recommendation
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_CACHE_TTL = 300  # Durée de vie (s) des entrées sans règle propre dans MemoryCache
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024  # Plafond mémoire de MemoryCache (octets)
+FUNDAMENTAL_CACHE_TTL = 600  # Durée de vie (s) des données fondamentales
+MACRO_CACHE_TTL = TTL_CACHE_SECONDS  # Durée de vie (s) des données macro
+# Une analyse dépend des quatre intervalles (MTFA) : elle expire à la clôture du plus court
+ANALYSIS_REFRESH_INTERVAL = min(INTERVALS, key=resampler.interval_ms)
+# Délai de grâce maximal (s) d'une analyse après la clôture : un quart de bougie, jamais l'analyse d'avant-dernière clôture
+MAX_ANALYSIS_GRACE = resampler.interval_ms(ANALYSIS_REFRESH_INTERVAL) / 1000 / 4
+
+def _sizeof(value):
+    """Taille approximative (octets) d'une valeur mise en cache."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+class MemoryCache:
+    """Cache mémoire LRU thread-safe, plafonné en octets.
+
+    L'expiration dépend de la clé (voir fetch) : ("klines", symbole, intervalle, ...)
+    expire à la prochaine clôture de bougie de l'intervalle, ("analysis", ...) à celle
+    de ANALYSIS_REFRESH_INTERVAL, ("fundamental", ...) et ("macro", ...) après leur
+    propre TTL, les autres clés après `ttl`. Une analyse surveillée (clé de
+    `analysis_grace`, renseignée par PrefetchScheduler) reste servie quelques
+    secondes de plus, au plus MAX_ANALYSIS_GRACE, le temps que le scheduler la remplace.
+    Tout objet exposant get(key) (None si absent) et set(key, value) peut être
+    passé comme `cache` au pipeline (Redis, disque...).
+    """
+
+    def __init__(self, ttl=DEFAULT_CACHE_TTL, max_bytes=DEFAULT_CACHE_BYTES,
+                 fundamental_ttl=FUNDAMENTAL_CACHE_TTL, macro_ttl=MACRO_CACHE_TTL, timer=time.time):
+        self.ttl = ttl
+        self.fundamental_ttl = fundamental_ttl
+        self.macro_ttl = macro_ttl
+        self.analysis_grace = {}  # Clé ("analysis", ...) -> délai de grâce (s) après la clôture
+        self._cache = cachetools.TLRUCache(maxsize=max_bytes, ttu=self._expires_at, timer=timer, getsizeof=_sizeof)
+        self._lock = threading.Lock()
+
+    def _expires_at(self, key, value, now):
+        kind = key[0] if isinstance(key, tuple) and key else None
+        if kind == "klines":
+            return resampler.next_close_ms(key[2], int(now * 1000)) / 1000
+        if kind == "analysis":
+            grace = min(self.analysis_grace.get(key, 0.0), MAX_ANALYSIS_GRACE)
+            return resampler.next_close_ms(ANALYSIS_REFRESH_INTERVAL, int(now * 1000)) / 1000 + grace
+        if kind == "fundamental":
+            return now + self.fundamental_ttl
+        if kind == "macro":
+            return now + self.macro_ttl
+        return now + self.ttl
+
+    def get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+
+    def set(self, key, value):
+        with self._lock:
+            try:
+                self._cache[key] = value
+            except ValueError:
+                logger.warning(f"MemoryCache: valeur trop volumineuse pour le cache ({_sizeof(value)} octets), ignorée")
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    @property
+    def currsize(self):
+        """Taille totale (octets) des entrées en cache."""
+        with self._lock:
+            self._cache.expire()
+            return self._cache.currsize
+
+def normalize_symbol(symbol_input):
+    """Renvoie (clé, paire USDT) : "btc" et "BTCUSDT" donnent ("BTC", "BTCUSDT")."""
+    symbol_key = symbol_input.upper()
+    if symbol_key.endswith("USDT") and len(symbol_key) > 4:
+        symbol_key = symbol_key[:-4]
+    return symbol_key, symbol_key + "USDT"
+
+def fetch(symbol, interval, fred_api_key, alpha_vantage_api_key, cache=None, derive=False, hedged=True):
+    """Récupère bougies, fondamentaux et macro (même valeur de retour que fetch_all_data).
+
+    Avec un cache, chaque partie est stockée sous sa propre clé : bougies par
+    (symbole, intervalle), fondamentaux par coin_id, macro partagée entre symboles.
+    Seules les parties absentes ou expirées sont récupérées.
+    """
+    symbol_key, symbol = normalize_symbol(symbol)
+    interval = interval.lower()
+    coin_id = COINCAP_ID_MAP.get(symbol_key.lower(), symbol_key.lower())
+    klines_keys = {intv: ("klines", symbol, intv, derive) for intv in INTERVALS}
+    fundamental_key = ("fundamental", coin_id)
+    macro_key = ("macro", fred_api_key, alpha_vantage_api_key)
+    with telemetry.span("fetch", symbol=symbol, interval=interval, cache="miss") as attributes:
+        price_data_dict = {intv: cache.get(key) if cache is not None else None for intv, key in klines_keys.items()}
+        fundamental_data = cache.get(fundamental_key) if cache is not None else None
+        macro_data = cache.get(macro_key) if cache is not None else None
+        missing = [intv for intv, df in price_data_dict.items() if df is None]
+        if not missing and fundamental_data is not None and macro_data is not None:
+            attributes["cache"] = "hit"
+            return price_data_dict.get(interval, pd.DataFrame()), fundamental_data, macro_data, price_data_dict
+        if len(missing) < len(INTERVALS) or fundamental_data is not None or macro_data is not None:
+            attributes["cache"] = "partial"
+
+        fetched_prices, fetched_fundamental, fetched_macro = fetch_parts_sync(
+            symbol, coin_id, fred_api_key, alpha_vantage_api_key, missing,
+            fundamental=fundamental_data is None, macro=macro_data is None, hedged=hedged, derive=derive
+        )
+        if fetched_macro == {}:  # Clés API manquantes, comme fetch_all_data
+            return pd.DataFrame(), {}, {}, {}
+        for intv in missing:
+            df = fetched_prices.get(intv, pd.DataFrame())
+            price_data_dict[intv] = df
+            if cache is not None and not df.empty:
+                cache.set(klines_keys[intv], df)
+        if fetched_fundamental is not None:
+            fundamental_data = fetched_fundamental
+            if cache is not None:
+                cache.set(fundamental_key, fundamental_data)
+        if fetched_macro is not None:
+            macro_data = fetched_macro
+            if cache is not None:
+                cache.set(macro_key, macro_data)
+        return price_data_dict.get(interval, pd.DataFrame()), fundamental_data, macro_data, price_data_dict
+
+def analyze_data(symbol, interval_input, price_data_dict, fundamental_data, macro_data, compact=False):
+    """Indicateurs, analyses et recommandation sur des données déjà récupérées.
+
+    Les indicateurs sont ajoutés aux DataFrames de price_data_dict (remplacés par
+    leur version compacte si compact=True, voir indicators.compact_frame).
+    Renvoie un dictionnaire sérialisable (signal "ERROR" et "error" si les
+    données sont invalides).
+    """
+    interval_input = interval_input.upper()
+    result = {"symbol": symbol, "interval": interval_input, "signal": "ERROR", "confidence": 0.0}
+    is_valid, validation_message = validate_data(price_data_dict.get(interval_input.lower(), pd.DataFrame()))
+    if not is_valid:
+        result["error"] = validation_message
+        return result
+
+    for key in price_data_dict:
+        if not price_data_dict[key].empty:
+            price_data_dict[key] = calculate_indicators(price_data_dict[key], key.upper(), compact=compact, features=REQUIRED_FEATURES)
+    price_data = price_data_dict[interval_input.lower()]
+
+    with telemetry.span("analysis", symbol=symbol, interval=interval_input.lower()):
+        mtfa_context = MTFAContext(price_data_dict)
+        technical_score, technical_details = analyze_technical(price_data, interval_input, price_data_dict, mtfa_context)
+        fundamental_score, fundamental_details = analyze_fundamental(fundamental_data)
+        macro_score, macro_details = analyze_macro(macro_data, interval_input)
+        signal, confidence, buy_price, sell_price = generate_recommendation(
+            price_data, technical_score, fundamental_score, macro_score, interval_input, price_data_dict, mtfa_context
+        )
+
+    result.update({
+        "signal": signal,
+        "confidence": float(confidence),
+        "price": float(price_data["close"].iloc[-1]),
+        "buy_price": float(buy_price),
+        "sell_price": float(sell_price),
+        "technical_score": float(technical_score),
+        "fundamental_score": float(fundamental_score),
+        "macro_score": float(macro_score),
+        "technical_details": technical_details,
+        "fundamental_details": fundamental_details,
+        "macro_details": macro_details,
+    })
+    return result
+
+def analysis_key(symbol_input, interval_input="1H", derive=False, compact=False):
+    """Clé de cache de l'analyse renvoyée par analyze."""
+    _, symbol = normalize_symbol(symbol_input)
+    return ("analysis", symbol, interval_input.upper(), derive, compact)
+
+def analyze(symbol_input, interval_input="1H", fred_api_key=None, alpha_vantage_api_key=None, cache=None, derive=False, hedged=True, compact=False,
+            refresh=False):
+    """Analyse complète ; renvoie (résultat, price_data_dict avec indicateurs).
+
+    Avec un cache, le couple est mis en cache jusqu'à la prochaine clôture
+    (voir MemoryCache) et resservi tel quel : ne pas modifier les DataFrames.
+    refresh=True ignore l'analyse en cache et la remplace (bougies toujours
+    lues via le cache).
+    """
+    _, symbol = normalize_symbol(symbol_input)
+    key = analysis_key(symbol, interval_input, derive, compact)
+    cached = cache.get(key) if cache is not None and not refresh else None
+    if cached is not None:
+        telemetry.record("analysis", 0.0, attributes={"symbol": symbol, "interval": interval_input.lower(), "cache": "hit"})
+        return cached
+    _, fundamental_data, macro_data, price_data_dict = fetch(
+        symbol, interval_input, fred_api_key, alpha_vantage_api_key, cache, derive, hedged
+    )
+    # calculate_indicators renvoie de nouveaux DataFrames : seul le dictionnaire, dont
+    # analyze_data remplace les entrées, est copié ; les bougies en cache restent intactes
+    price_data_dict = dict(price_data_dict)
+    result = analyze_data(symbol, interval_input, price_data_dict, fundamental_data, macro_data, compact)
+    if cache is not None and "error" not in result:
+        cache.set(key, (result, price_data_dict))
+    return result, price_data_dict
+
+def run(symbol_input, interval_input="1H", fred_api_key=None, alpha_vantage_api_key=None, cache=None, derive=False, hedged=True, compact=False):
+    """Analyse complète d'un symbole, de la récupération à la recommandation."""
+    start_time = datetime.now()
+    _, symbol = normalize_symbol(symbol_input)
+    result, _ = analyze(symbol, interval_input, fred_api_key, alpha_vantage_api_key, cache, derive, hedged, compact)
+    logger.info(f"pipeline.run: {symbol} ({interval_input}) -> {result['signal']} en {(datetime.now() - start_time).total_seconds():.2f}s")
+    return result
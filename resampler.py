@@ -0,0 +1,102 @@
+VERSION = "1.0.1"  # Incrémenté de 1.0.0 pour next_close_ms (expiration alignée sur la clôture des bougies)
+
+import logging
+import time
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+HOUR_MS = 3_600_000
+DAY_MS = 24 * HOUR_MS
+
+# Durée (ms) des intervalles dérivables, y compris ceux absents de l'interface
+INTERVAL_MS = {
+    "1h": HOUR_MS,
+    "2h": 2 * HOUR_MS,
+    "4h": 4 * HOUR_MS,
+    "12h": 12 * HOUR_MS,
+    "1d": DAY_MS,
+    "3d": 3 * DAY_MS,
+    "1w": 7 * DAY_MS,
+}
+
+# Décalage des bornes par rapport à l'époque Unix (UTC) : les semaines commencent
+# le lundi (1970-01-05), comme sur Binance ; les autres intervalles partent de l'époque
+INTERVAL_OFFSET_MS = {"1w": 4 * DAY_MS}
+
+# Agrégation OHLCV des colonnes normalisées (voir candle_store.COLUMNS)
+AGGREGATIONS = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+    "quote_asset_volume": "sum",
+    "number_of_trades": "sum",
+    "taker_buy_base": "sum",
+    "taker_buy_quote": "sum",
+}
+
+def interval_ms(interval):
+    """Durée d'un intervalle en millisecondes (ValueError s'il n'est pas dérivable)."""
+    try:
+        return INTERVAL_MS[interval.lower()]
+    except KeyError:
+        raise ValueError(f"Intervalle non dérivable : {interval}")
+
+def next_close_ms(interval, now_ms=None):
+    """Horodatage (ms) de la prochaine clôture de bougie de l'intervalle, bornes alignées comme resample_klines."""
+    target_ms = interval_ms(interval)
+    offset = INTERVAL_OFFSET_MS.get(interval.lower(), 0)
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    return ((now_ms - offset) // target_ms + 1) * target_ms + offset
+
+def required_bars(intervals, limit=200, base_interval="1h"):
+    """Nombre de bougies de base nécessaires pour obtenir `limit` bougies de chaque intervalle."""
+    base_ms = interval_ms(base_interval)
+    # Une bougie de plus pour compenser la première, généralement incomplète
+    return max((limit + 1) * interval_ms(intv) // base_ms for intv in intervals)
+
+def resample_klines(df, interval, base_interval="1h"):
+    """Agrège des bougies normalisées (timestamp en ms) en bougies de l'intervalle demandé.
+
+    Les bornes sont alignées sur l'UTC (minuit, lundi pour 1w, époque Unix pour 3d).
+    La première bougie est écartée si elle est incomplète ; la dernière, en cours,
+    est conservée comme le ferait la plateforme.
+    """
+    target_ms = interval_ms(interval)
+    base_ms = interval_ms(base_interval)
+    if target_ms % base_ms:
+        raise ValueError(f"{interval} n'est pas un multiple de {base_interval}")
+    if df.empty:
+        return df.copy()
+    if target_ms == base_ms:
+        return df.reset_index(drop=True)
+
+    offset = INTERVAL_OFFSET_MS.get(interval.lower(), 0)
+    timestamps = df["timestamp"].astype("int64")
+    bins = (timestamps - offset) // target_ms * target_ms + offset
+    grouped = df.groupby(bins.to_numpy(), sort=True)
+    out = grouped.agg({col: how for col, how in AGGREGATIONS.items() if col in df.columns})
+    counts = grouped.size()
+
+    if counts.iloc[0] < target_ms // base_ms:
+        out = out.iloc[1:]
+    out.index.name = "timestamp"
+    out = out.reset_index()
+    out["close_time"] = out["timestamp"] + target_ms - 1
+    out["date"] = pd.to_datetime(out["timestamp"], unit="ms")
+    columns = ["timestamp", "open", "high", "low", "close", "volume", "close_time"]
+    columns += [col for col in AGGREGATIONS if col in out.columns and col not in columns]
+    return out[columns + ["date"]]
+
+def derive_intervals(df, intervals, limit=200, base_interval="1h"):
+    """Dérive chaque intervalle demandé d'une même série de base (MTFA cohérente).
+
+    Renvoie {intervalle: DataFrame des `limit` dernières bougies}.
+    """
+    return {
+        intv: resample_klines(df, intv, base_interval).tail(limit).reset_index(drop=True)
+        for intv in intervals
+    }
@@ -0,0 +1,73 @@
+VERSION = "1.0.5"  # Incrémenté de 1.0.4 pour récupération groupée (fetch_many_async) et analyse via pipeline.analyze_data
+
+import argparse
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import pandas as pd
+import pipeline
+from async_fetcher import fetch_many_async, run_sync
+from data_fetcher import COINCAP_ID_MAP
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+SIGNAL_RANK = {"BUY": 0, "SELL": 1, "HOLD": 2, "ERROR": 3}
+DEFAULT_MAX_WORKERS = 16
+# Détails textuels de pipeline.analyze_data, absents du classement
+DETAIL_FIELDS = ("interval", "technical_details", "fundamental_details", "macro_details")
+
+def scan_symbol(symbol_key, interval_input, price_data_dict, fundamental_data, macro_data):
+    """Ligne du classement pour un symbole dont les données sont déjà récupérées (pipeline.analyze_data)."""
+    try:
+        result = pipeline.analyze_data(symbol_key, interval_input, dict(price_data_dict), fundamental_data, macro_data)
+    except Exception as e:
+        logger.error(f"Erreur scan_symbol ({symbol_key}) : {e}")
+        result = {"symbol": symbol_key, "signal": "ERROR", "confidence": 0.0, "error": str(e)}
+    return {k: v for k, v in result.items() if k not in DETAIL_FIELDS}
+
+def scan_market(watchlist=None, interval_input="1H", fred_api_key=None, alpha_vantage_api_key=None, max_workers=DEFAULT_MAX_WORKERS,
+                derive=False, hedged=True):
+    """Analyse une liste de symboles et classe les signaux.
+
+    Les données de tous les symboles sont récupérées ensemble sur une seule
+    boucle (async_fetcher.fetch_many_async : macro et DeFiLlama une seule fois,
+    requêtes concurrentes bornées par les limiteurs de débit des hôtes), puis
+    analysées sur `max_workers` threads. Renvoie un DataFrame trié : BUY puis
+    SELL puis HOLD, par confiance décroissante.
+    """
+    start_time = datetime.now()
+    COINCAP_ID_MAP.wait_ready()  # Démarrage à froid : univers complet plutôt que DEFAULT_IDS
+    watchlist = list(watchlist) if watchlist else list(COINCAP_ID_MAP)
+    symbols = dict(pipeline.normalize_symbol(symbol_input) for symbol_input in watchlist)  # Clé -> paire, sans doublon
+    macro_data, fetched = run_sync(fetch_many_async(list(symbols.values()), fred_api_key, alpha_vantage_api_key, hedged, derive))
+    fetched_at = datetime.now()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(
+            lambda item: scan_symbol(item[0], interval_input, *fetched[item[1]], macro_data), symbols.items()
+        ))
+
+    ranking = pd.DataFrame(results)
+    ranking["_rank"] = ranking["signal"].map(SIGNAL_RANK)
+    ranking = ranking.sort_values(["_rank", "confidence"], ascending=[True, False]).drop(columns="_rank").reset_index(drop=True)
+    logger.info(f"scan_market: {len(symbols)} symboles ({interval_input}) en {(datetime.now() - start_time).total_seconds():.2f}s "
+                f"(récupération {(fetched_at - start_time).total_seconds():.2f}s)")
+    return ranking
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scanner multi-symboles Crypto Swinger")
+    parser.add_argument("--interval", default="1H", choices=["1H", "4H", "1D", "1W"])
+    parser.add_argument("--symbols", default="", help="Liste séparée par des virgules (défaut : tout COINCAP_ID_MAP)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--derive", action="store_true", help="Dériver 4h/1d/1w d'un historique 1h")
+    parser.add_argument("--no-hedge", action="store_true", help="Chaîne de repli séquentielle des fournisseurs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    watchlist = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    ranking = scan_market(
+        watchlist, args.interval, os.environ.get("FRED_API_KEY"), os.environ.get("ALPHA_VANTAGE_API_KEY"), max_workers=args.workers, derive=args.derive, hedged=not args.no_hedge
+    )
+    print(ranking.to_string())
@@ -0,0 +1,125 @@
+VERSION = "1.0.2"  # Incrémenté de 1.0.1 pour délai de grâce limité aux analyses de la watchlist et plafonné
+
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+import pipeline
+import resampler
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+ANALYSIS_INTERVALS = ["1H", "4H", "1D", "1W"]
+CLOSE_DELAY = 5.0  # Attente (s) après la clôture, le temps que les fournisseurs publient la bougie
+JITTER = 10.0  # Décalage aléatoire maximal (s) du réveil, pour ne pas tomber pile avec les autres clients
+STAGGER = 1.0  # Écart (s) entre deux symboles de la watchlist
+REFRESH_MARGIN = 30.0  # Durée (s) prévue pour analyser un symbole sur tous ses intervalles
+
+class PrefetchScheduler:
+    """Rafraîchit une watchlist juste après chaque clôture 1H et met les analyses en cache.
+
+    Les clôtures 4H, 1D et 1W (UTC) tombent toutes sur une clôture 1H.
+    Chaque réveil appelle pipeline.analyze pour chaque symbole et intervalle :
+    seules les bougies dont l'intervalle vient de clôturer ont expiré dans le
+    cache (requêtes delta), les analyses sont recalculées et resservies telles
+    quelles aux requêtes interactives jusqu'à la clôture suivante.
+    Au démarrage, les analyses de la watchlist reçoivent dans le cache un délai
+    de grâce (analysis_grace, s'il existe) de max_delay(), plafonné à
+    pipeline.MAX_ANALYSIS_GRACE : entre la clôture et leur rafraîchissement, les
+    requêtes reçoivent l'analyse précédente au lieu de tout recalculer. Les
+    autres analyses expirent toujours à la clôture.
+    """
+
+    def __init__(self, watchlist, fred_api_key, alpha_vantage_api_key, cache, intervals=ANALYSIS_INTERVALS,
+                 derive=False, hedged=True, close_delay=CLOSE_DELAY, jitter=JITTER, stagger=STAGGER,
+                 refresh_margin=REFRESH_MARGIN):
+        self.watchlist = [symbol.strip().upper() for symbol in watchlist if symbol.strip()]
+        self.fred_api_key = fred_api_key
+        self.alpha_vantage_api_key = alpha_vantage_api_key
+        self.cache = cache
+        self.intervals = [intv.upper() for intv in intervals]
+        self.derive = derive
+        self.hedged = hedged
+        self.close_delay = close_delay
+        self.jitter = jitter
+        self.stagger = stagger
+        self.refresh_margin = refresh_margin
+        self.last_run = None
+        self.last_results = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def next_wake(self, now_ms=None):
+        """Délai (s) jusqu'au prochain réveil : clôture de ANALYSIS_REFRESH_INTERVAL + délai + jitter."""
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        close_ms = resampler.next_close_ms(pipeline.ANALYSIS_REFRESH_INTERVAL, now_ms)
+        return (close_ms - now_ms) / 1000 + self.close_delay + random.uniform(0, self.jitter)
+
+    def max_delay(self):
+        """Retard maximal (s) du remplacement d'une analyse après la clôture : délai, jitter, décalages et calcul."""
+        count = len(self.watchlist)
+        return self.close_delay + self.jitter + max(count - 1, 0) * self.stagger + count * self.refresh_margin
+
+    def analysis_keys(self):
+        """Clés de cache des analyses rafraîchies par run_once."""
+        return [pipeline.analysis_key(symbol, interval, self.derive) for symbol in self.watchlist for interval in self.intervals]
+
+    def run_once(self):
+        """Rafraîchit toute la watchlist, un symbole toutes les `stagger` secondes ; renvoie {symbole: {intervalle: signal}}."""
+        start_time = datetime.now()
+        results = {}
+        for i, symbol in enumerate(self.watchlist):
+            if i and self._stop.wait(self.stagger):
+                break
+            results[symbol] = {}
+            for interval in self.intervals:
+                try:
+                    result, _ = pipeline.analyze(
+                        symbol, interval, self.fred_api_key, self.alpha_vantage_api_key,
+                        cache=self.cache, derive=self.derive, hedged=self.hedged, refresh=True
+                    )
+                    results[symbol][interval] = result["signal"]
+                except Exception as e:
+                    logger.error(f"scheduler: erreur pour {symbol} ({interval}) : {e}")
+                    results[symbol][interval] = "ERROR"
+        self.last_run = datetime.now()
+        self.last_results = results
+        logger.info(f"scheduler: {len(results)} symboles rafraîchis en {(datetime.now() - start_time).total_seconds():.2f}s")
+        return results
+
+    def _loop(self):
+        self.run_once()  # Cache chaud dès le démarrage
+        while not self._stop.is_set():
+            delay = self.next_wake()
+            logger.info(f"scheduler: prochain rafraîchissement dans {delay:.0f}s")
+            if self._stop.wait(delay):
+                break
+            self.run_once()
+
+    def start(self):
+        """Lance le thread de préchargement (démon) s'il ne tourne pas déjà."""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        if hasattr(self.cache, "analysis_grace"):
+            grace = self.max_delay()
+            if grace > pipeline.MAX_ANALYSIS_GRACE:
+                logger.warning(f"scheduler: rafraîchissement complet estimé à {grace:g}s, délai de grâce plafonné à "
+                               f"{pipeline.MAX_ANALYSIS_GRACE:g}s (réduire la watchlist ou refresh_margin)")
+                grace = pipeline.MAX_ANALYSIS_GRACE
+            self.cache.analysis_grace.update(dict.fromkeys(self.analysis_keys(), grace))
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="prefetch-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"scheduler: préchargement de {', '.join(self.watchlist)} ({', '.join(self.intervals)})")
+        return self
+
+    def stop(self, timeout=None):
+        """Arrête le thread après le symbole en cours ; les analyses de la watchlist expirent de nouveau à la clôture."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if hasattr(self.cache, "analysis_grace"):
+            for key in self.analysis_keys():
+                self.cache.analysis_grace.pop(key, None)
@@ -0,0 +1,149 @@
+VERSION = "1.0.2"  # Incrémenté de 1.0.1 pour DEFAULT_IDS servis sans attente au démarrage à froid (wait_ready pour le scan)
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Mapping
+import http_client
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+REGISTRY_PATH = os.environ.get("COINCAP_IDS_PATH", "coincap_ids.json")
+REGISTRY_TTL = 24 * 3600  # Âge (s) au-delà duquel le fichier est rafraîchi en arrière-plan
+INITIAL_REFRESH_TIMEOUT = 10.0  # Attente maximale (s) du premier rafraîchissement dans wait_ready
+COINCAP_ASSETS_URL = "https://rest.coincap.io/v3/assets?limit=100&apiKey={api_key}"
+
+# Correspondances minimales tant qu'aucun fichier n'est disponible
+DEFAULT_IDS = {
+    "btc": "bitcoin",
+    "eth": "ethereum",
+    "bnb": "binance-coin",
+    "ada": "cardano",
+    "tao": "bittensor",
+}
+
+def fetch_coincap_ids():
+    """Récupère les 100 plus grandes cryptos et leurs ID via l'API CoinCap v3 (None en cas d'échec)."""
+    coincap_api_key = os.environ.get("COINCAP_API_KEY")
+    if not coincap_api_key:
+        logger.warning("Clé API CoinCap manquante, registre des symboles non rafraîchi.")
+        return None
+    try:
+        response = http_client.get(COINCAP_ASSETS_URL.format(api_key=coincap_api_key))
+        response.raise_for_status()
+        coincap_id_map = {asset["symbol"].lower(): asset["id"] for asset in response.json()["data"]}
+        logger.info(f"Récupéré {len(coincap_id_map)} cryptos depuis CoinCap")
+        return coincap_id_map
+    except Exception as e:
+        logger.error(f"Erreur récupération ID CoinCap : {e}")
+        return None
+
+class SymbolRegistry(Mapping):
+    """Correspondance symbole (minuscules) -> ID CoinCap, avec index inverse ID -> symbole.
+
+    Le fichier n'est lu qu'au premier accès ; s'il date de plus de `ttl`
+    secondes, un thread le rafraîchit depuis CoinCap sans bloquer l'appelant.
+    S'il manque (démarrage à froid), les accès servent DEFAULT_IDS pendant le
+    premier rafraîchissement. Les appelants qui ont besoin de l'univers complet
+    (scan_market) l'attendent avec wait_ready.
+    """
+
+    def __init__(self, path=REGISTRY_PATH, ttl=REGISTRY_TTL, fetcher=fetch_coincap_ids, initial_timeout=INITIAL_REFRESH_TIMEOUT):
+        self.path = path
+        self.ttl = ttl
+        self.initial_timeout = initial_timeout
+        self._fetcher = fetcher
+        self._lock = threading.Lock()
+        self._ready = threading.Event()  # Registre complet, ou premier rafraîchissement terminé (ou abandonné)
+        self._ids = None
+        self._reverse = {}
+        self._loaded_at = 0.0
+        self._refresh_thread = None
+
+    def _set(self, ids, loaded_at):
+        self._ids = ids
+        self._reverse = {coin_id: symbol for symbol, coin_id in ids.items()}
+        self._loaded_at = loaded_at
+
+    def _load(self):
+        """Charge le fichier au premier accès et lance un rafraîchissement s'il est périmé."""
+        if self._ids is None:
+            with self._lock:
+                if self._ids is None:
+                    try:
+                        with open(self.path, encoding="utf-8") as f:
+                            ids = {symbol.lower(): coin_id for symbol, coin_id in json.load(f).items()}
+                        self._set(ids or dict(DEFAULT_IDS), os.path.getmtime(self.path) if ids else 0.0)
+                        if ids:
+                            self._ready.set()
+                    except (OSError, ValueError, AttributeError) as e:
+                        logger.warning(f"Registre {self.path} illisible ({e}), ID par défaut")
+                        self._set(dict(DEFAULT_IDS), 0.0)
+        if time.time() - self._loaded_at > self.ttl:
+            self.refresh_async()
+        return self._ids
+
+    def wait_ready(self, timeout=None):
+        """Attend le premier rafraîchissement si le fichier manquait (au plus `timeout`, défaut initial_timeout) ; renvoie self."""
+        self._load()
+        timeout = self.initial_timeout if timeout is None else timeout
+        if not self._ready.is_set():
+            if not self._ready.wait(timeout):
+                logger.warning(f"Registre {self.path} non rafraîchi après {timeout:g}s, {len(self._ids)} ID disponibles")
+            self._ready.set()  # Une seule attente : les appels suivants se contentent des ID disponibles
+        return self
+
+    def refresh(self):
+        """Rafraîchit depuis CoinCap et réécrit le fichier (écriture atomique) ; renvoie True si réussi."""
+        try:
+            ids = self._fetcher()
+            if not ids:
+                return False
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(ids, f, indent=4)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Écriture de {self.path} impossible : {e}")
+            with self._lock:
+                self._set(ids, time.time())
+            return True
+        finally:
+            self._ready.set()  # Échec compris : ne plus faire attendre les accès
+
+    def refresh_async(self):
+        """Lance refresh dans un thread démon, sauf si un rafraîchissement est déjà en cours."""
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            # Évite de relancer un rafraîchissement à chaque accès en cas d'échec
+            self._loaded_at = time.time() - self.ttl + min(self.ttl, 300)
+            self._refresh_thread = threading.Thread(target=self.refresh, name="symbol-registry-refresh", daemon=True)
+            self._refresh_thread.start()
+
+    def symbol_for(self, coin_id):
+        """Symbole (minuscules) d'un ID CoinCap, ou None."""
+        self._load()
+        return self._reverse.get(coin_id)
+
+    def resolve(self, symbol_or_id):
+        """ID CoinCap pour un symbole ou un ID déjà résolu (inchangé s'il est inconnu)."""
+        return self._load().get(symbol_or_id.lower(), symbol_or_id)
+
+    def __getitem__(self, symbol):
+        return self._load()[symbol]
+
+    def __contains__(self, symbol):
+        return symbol in self._load()
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+registry = SymbolRegistry()
@@ -0,0 +1,139 @@
+VERSION = "1.0.1"  # Incrémenté de 1.0.0 pour échappement des valeurs de labels Prometheus
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+ENABLED = os.environ.get("TELEMETRY", "1") != "0"
+SPAN_HISTORY = 1000  # Nombre de spans conservés en mémoire
+# Bornes (s) des histogrammes de latence, façon Prometheus
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+METRIC_NAME = "crypto_swinger_stage_seconds"
+
+_lock = threading.Lock()
+_spans = deque(maxlen=SPAN_HISTORY)
+_histograms = {}
+
+@contextmanager
+def span(stage, **attributes):
+    """Mesure une étape (fetch, parse, indicators, analysis, render...).
+
+    Les attributs (provider, symbol, interval, cache, bytes...) peuvent être
+    complétés dans le bloc via le dictionnaire renvoyé. La durée alimente
+    l'histogramme (étape, provider).
+    """
+    if not ENABLED:
+        yield attributes
+        return
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield attributes
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        record(stage, time.perf_counter() - start, status, attributes)
+
+def record(stage, seconds, status="ok", attributes=None):
+    """Enregistre un span terminé et met à jour l'histogramme correspondant."""
+    attributes = attributes or {}
+    entry = {"stage": stage, "seconds": seconds, "status": status, "end": time.time(), **attributes}
+    key = (stage, str(attributes.get("provider", "")))
+    with _lock:
+        _spans.append(entry)
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][i] += 1
+        histogram["sum"] += seconds
+        histogram["count"] += 1
+
+def recent_spans(stage=None, limit=None):
+    """Derniers spans enregistrés (les plus récents en dernier), éventuellement filtrés par étape."""
+    with _lock:
+        spans = [dict(entry) for entry in _spans if stage is None or entry["stage"] == stage]
+    return spans[-limit:] if limit else spans
+
+def histograms():
+    """Copie des histogrammes : {(étape, provider): {"buckets", "sum", "count"}}."""
+    with _lock:
+        return {key: {"buckets": list(h["buckets"]), "sum": h["sum"], "count": h["count"]} for key, h in _histograms.items()}
+
+def reset():
+    """Vide les spans et les histogrammes."""
+    with _lock:
+        _spans.clear()
+        _histograms.clear()
+
+def _write(text, path):
+    if path:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)  # Écriture atomique pour le collecteur
+    return text
+
+def export_json(path=None):
+    """Histogrammes et spans récents en JSON (écrits dans path si fourni)."""
+    payload = {
+        "buckets": [str(bound) for bound in LATENCY_BUCKETS],
+        "histograms": [
+            {"stage": stage, "provider": provider, **histogram}
+            for (stage, provider), histogram in sorted(histograms().items())
+        ],
+        "spans": recent_spans(),
+    }
+    return _write(json.dumps(payload, indent=2, default=str), path)
+
+def _label_value(value):
+    """Valeur de label Prometheus : antislash, guillemet et saut de ligne échappés."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def export_prometheus(path=None):
+    """Histogrammes au format texte Prometheus (pour le textfile collector de node_exporter)."""
+    lines = [
+        f"# HELP {METRIC_NAME} Durée des étapes par fournisseur",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for (stage, provider), histogram in sorted(histograms().items()):
+        labels = f'stage="{_label_value(stage)}",provider="{_label_value(provider)}"'
+        for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{le}"}} {count}')
+        lines.append(f"{METRIC_NAME}_sum{{{labels}}} {histogram['sum']:.6f}")
+        lines.append(f"{METRIC_NAME}_count{{{labels}}} {histogram['count']}")
+    return _write("\n".join(lines) + "\n", path)
+
+@contextmanager
+def profile(path=None, top=30):
+    """Profil cProfile du bloc ; résumé texte dans result["summary"].
+
+    Avec path, les statistiques brutes sont écrites (.prof), exploitables par
+    snakeviz ou flameprof pour un flamegraph.
+    """
+    profiler = cProfile.Profile()
+    result = {"path": path, "summary": ""}
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+            logger.info(f"telemetry: profil écrit dans {path}")
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+        result["summary"] = stream.getvalue()
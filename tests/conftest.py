@@ -0,0 +1,32 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Modules à la racine du dépôt (pas de paquet installable)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HOUR_MS = 3_600_000
+INTERVAL_HOURS = {"1h": 1, "4h": 4, "1d": 24, "1w": 168}
+
+def make_candles(n, seed=0, interval="1h", sigma=0.004, start_ms=1_600_000_000_000):
+    """Bougies OHLCV synthétiques (marche aléatoire log-normale) ; sigma peut varier par barre (tableau)."""
+    rng = np.random.default_rng(seed)
+    step = HOUR_MS * INTERVAL_HOURS[interval]
+    close = 60_000 * np.exp(np.cumsum(rng.normal(0, 1, n) * sigma))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.002, n))
+    timestamps = start_ms // step * step + np.arange(n, dtype="int64") * step
+    return pd.DataFrame({
+        "timestamp": timestamps,
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + spread),
+        "low": np.minimum(open_, close) * (1 - spread),
+        "close": close,
+        "volume": rng.uniform(10, 1000, n),
+        "date": pd.to_datetime(timestamps, unit="ms"),
+    })
+
+def regime_sigma(n, period=60, calm=0.004, volatile=0.03):
+    """Volatilité alternant calme/agitée toutes les `period` barres (fenêtre RSI adaptative 14 <-> 10)."""
+    return np.where((np.arange(n) // period) % 2 == 0, calm, volatile)
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from conftest import make_candles, regime_sigma
+import analyzer
+import resampler
+from analyzer import (DEFAULT_PARAMS, TECHNICAL_RULES, AnalyzerParams, MTFAContext, analyze_technical, analyze_technical_series,
+                      generate_recommendation)
+from indicators import calculate_indicators
+
+INTERVALS = ["1h", "4h", "1d", "1w"]
+
+def frames(n=2400, seed=7, stop=None):
+    """Indicateurs des quatre intervalles, dérivés d'une même série 1h (arrêtée à la bougie stop)."""
+    base = make_candles(n, seed=seed, sigma=regime_sigma(n, period=150, volatile=0.02)).iloc[:stop]
+    return {intv: calculate_indicators(resampler.resample_klines(base, intv), intv.upper()) for intv in INTERVALS}
+
+PARAMS = [
+    DEFAULT_PARAMS,
+    AnalyzerParams(rsi_overbought=55, rsi_oversold=45, adx_threshold=15, volume_spike=1.2, mtfa_points=3),
+]
+
+@pytest.mark.parametrize("params", PARAMS)
+@pytest.mark.parametrize("interval", ["1H", "4H", "1D"])
+@pytest.mark.parametrize("stop", [1500, 1913, 2400])
+def test_last_row_matches_analyze_technical(params, interval, stop):
+    price_data_dict = frames(stop=stop)
+    df = price_data_dict[interval.lower()]
+    series = analyze_technical_series(df, interval, price_data_dict, alignment="open", params=params)
+    score, _ = analyze_technical(df, interval, price_data_dict, params=params)
+    assert series["score"].iloc[-1] == score
+
+@pytest.mark.parametrize("alignment", ["open", "close"])
+@pytest.mark.parametrize("interval", ["1H", "4H", "1D", "1W"])
+def test_rule_contributions_sum_to_score(alignment, interval):
+    price_data_dict = frames()
+    series = analyze_technical_series(price_data_dict[interval.lower()], interval, price_data_dict, alignment=alignment)
+    assert list(series.columns) == TECHNICAL_RULES + ["score"]
+    np.testing.assert_array_equal(series[TECHNICAL_RULES].sum(axis=1).to_numpy(), series["score"].to_numpy())
+    assert (series[TECHNICAL_RULES] != 0).any().sum() >= 4  # Plusieurs règles actives sur l'historique
+
+def test_every_bar_matches_analyze_technical_on_truncated_frames():
+    price_data_dict = frames(n=800, seed=3)
+    df = price_data_dict["1h"]
+    series = analyze_technical_series(df, "1H", price_data_dict, alignment="open")
+    for stop in range(60, len(df) + 1, 37):
+        last_ms = df["timestamp"].iloc[stop - 1]
+        truncated = {intv: frame[frame["timestamp"] <= last_ms] for intv, frame in price_data_dict.items()}
+        score, _ = analyze_technical(truncated["1h"], "1H", truncated)
+        assert series["score"].iloc[stop - 1] == score, stop
+
+def test_unknown_alignment():
+    price_data_dict = frames(n=500)
+    with pytest.raises(ValueError):
+        analyze_technical_series(price_data_dict["1h"], "1H", price_data_dict, alignment="mid")
+
+def test_params_conflicting_with_context_rejected():
+    price_data_dict = frames(n=800)
+    df = price_data_dict["1h"]
+    tuned = PARAMS[1]
+    context = MTFAContext(price_data_dict, tuned)
+    score, _ = analyze_technical(df, "1H", price_data_dict, context, params=tuned)
+    with pytest.raises(ValueError):
+        analyze_technical(df, "1H", price_data_dict, context, params=DEFAULT_PARAMS)
+    with pytest.raises(ValueError):
+        generate_recommendation(df, score, 0, 0, "1H", price_data_dict, context, params=AnalyzerParams())
+    assert generate_recommendation(df, score, 0, 0, "1H", price_data_dict, context, params=tuned) == \
+        generate_recommendation(df, score, 0, 0, "1H", price_data_dict, params=tuned)
+
+def test_align_cache_keyed_on_date_content(monkeypatch):
+    monkeypatch.setattr(analyzer, "_align_cache", analyzer.cachetools.LRUCache(maxsize=analyzer.ALIGN_CACHE_SIZE))
+    price_data_dict = frames(n=800)
+    df, tf_df = price_data_dict["1h"], price_data_dict["4h"]
+    positions = analyzer._align_positions(df, "1H", tf_df, "4h", "close")
+    assert analyzer._align_positions(df.copy(), "1H", tf_df.copy(), "4h", "close") is positions  # Même contenu : entrée réutilisée
+    assert len(analyzer._align_cache) == 1
+    # Même longueur, dates décalées d'une heure : nouvelle entrée, positions recalculées
+    shifted = df.assign(timestamp=df["timestamp"] + resampler.interval_ms("1h"), date=df["date"] + np.timedelta64(1, "h"))
+    shifted_positions = analyzer._align_positions(shifted, "1H", tf_df, "4h", "close")
+    assert len(analyzer._align_cache) == 2
+    analyzer._align_cache.clear()
+    np.testing.assert_array_equal(shifted_positions, analyzer._align_positions(shifted, "1H", tf_df, "4h", "close"))
+    assert not np.array_equal(shifted_positions, positions)
+
+def test_fingerprint_includes_length():
+    dates = analyzer.bar_dates(frames(n=200)["1h"])
+    assert analyzer._fingerprint(dates) == analyzer._fingerprint(dates.copy())
+    assert analyzer._fingerprint(dates[:-1]) != analyzer._fingerprint(dates)
+    assert analyzer._fingerprint(dates[::-1]) != analyzer._fingerprint(dates)
+    assert analyzer._fingerprint(dates)[0] == len(dates)
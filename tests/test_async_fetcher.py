@@ -0,0 +1,103 @@
+import asyncio
+import time
+from collections import defaultdict, deque
+import pandas as pd
+import pytest
+import async_fetcher
+
+HEDGE_DELAY = 0.2
+SLOW = 3.0  # Bien au-delà du budget : le fournisseur ne répond jamais dans le test
+
+class Providers:
+    """fetch_klines_provider_async simulé : (délai, résultat) par fournisseur, lancements et annulations enregistrés."""
+
+    def __init__(self, **behaviours):
+        self.behaviours = behaviours
+        self.started = {}
+        self.cancelled = []
+        self.origin = time.monotonic()
+
+    async def __call__(self, session, provider, symbol, interval):
+        self.started[provider] = time.monotonic() - self.origin
+        delay, result = self.behaviours[provider]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(provider)
+            raise
+        return result
+
+def frame(provider):
+    return pd.DataFrame({"close": [1.0], "provider": [provider]})
+
+@pytest.fixture(autouse=True)
+def hedging(monkeypatch):
+    monkeypatch.setattr(async_fetcher, "KLINE_PROVIDERS", ["a", "b", "c"])
+    monkeypatch.setattr(async_fetcher, "DEFAULT_HEDGE_DELAY", HEDGE_DELAY)
+    monkeypatch.setattr(async_fetcher, "_provider_latencies", defaultdict(lambda: deque(maxlen=async_fetcher.LATENCY_HISTORY)))
+
+def run(monkeypatch, **behaviours):
+    providers = Providers(**behaviours)
+    monkeypatch.setattr(async_fetcher, "fetch_klines_provider_async", providers)
+    df = asyncio.run(async_fetcher.fetch_klines_hedged_async(None, "BTCUSDT", "1h"))
+    return df, providers, time.monotonic() - providers.origin
+
+def test_fast_provider_is_not_hedged(monkeypatch):
+    df, providers, _ = run(monkeypatch, a=(0.01, frame("a")), b=(0, frame("b")), c=(0, frame("c")))
+    assert df["provider"].tolist() == ["a"]
+    assert list(providers.started) == ["a"]
+
+def test_slow_provider_is_hedged_after_budget_and_cancelled(monkeypatch):
+    df, providers, elapsed = run(monkeypatch, a=(SLOW, frame("a")), b=(0.01, frame("b")), c=(0, frame("c")))
+    assert df["provider"].tolist() == ["b"]
+    assert list(providers.started) == ["a", "b"]
+    assert HEDGE_DELAY <= providers.started["b"] < SLOW / 2
+    assert providers.cancelled == ["a"]  # Requête perdante annulée
+    assert elapsed < SLOW / 2
+
+def test_hedge_budget_follows_observed_latency(monkeypatch):
+    for _ in range(async_fetcher.HEDGE_MIN_SAMPLES):
+        async_fetcher.record_latency("a", 0.02)
+    assert async_fetcher.latency_budget("a") == pytest.approx(0.02)
+    assert async_fetcher.latency_budget("b") == HEDGE_DELAY
+    _, providers, _ = run(monkeypatch, a=(SLOW, frame("a")), b=(0.01, frame("b")), c=(0, frame("c")))
+    assert providers.started["b"] < HEDGE_DELAY
+
+def test_first_valid_response_wins_after_hedging(monkeypatch):
+    # a dépasse son budget mais répond avant b : b est annulé
+    df, providers, _ = run(monkeypatch, a=(HEDGE_DELAY * 1.5, frame("a")), b=(SLOW, frame("b")), c=(0, frame("c")))
+    assert df["provider"].tolist() == ["a"]
+    assert list(providers.started) == ["a", "b"]
+    assert providers.cancelled == ["b"]
+
+def test_failure_hedges_immediately(monkeypatch):
+    df, providers, _ = run(monkeypatch, a=(0, None), b=(0.01, frame("b")), c=(0, frame("c")))
+    assert df["provider"].tolist() == ["b"]
+    assert providers.started["b"] < HEDGE_DELAY  # Pas d'attente du budget après un échec
+    assert "c" not in providers.started
+
+def test_all_providers_failing_returns_empty_frame(monkeypatch):
+    df, providers, elapsed = run(monkeypatch, a=(0, None), b=(0.01, None), c=(0, None))
+    assert df.empty
+    assert list(providers.started) == ["a", "b", "c"]
+    assert providers.cancelled == []
+    assert elapsed < HEDGE_DELAY
+
+def test_slow_failures_fall_back_to_empty_frame(monkeypatch):
+    df, providers, _ = run(monkeypatch, a=(HEDGE_DELAY * 2, None), b=(HEDGE_DELAY * 2, None), c=(HEDGE_DELAY * 2, None))
+    assert df.empty
+    assert list(providers.started) == ["a", "b", "c"]
+
+def test_caller_cancellation_cancels_every_request(monkeypatch):
+    providers = Providers(a=(SLOW, frame("a")), b=(SLOW, frame("b")), c=(SLOW, frame("c")))
+    monkeypatch.setattr(async_fetcher, "fetch_klines_provider_async", providers)
+
+    async def scenario():
+        task = asyncio.ensure_future(async_fetcher.fetch_klines_hedged_async(None, "BTCUSDT", "1h"))
+        await asyncio.sleep(HEDGE_DELAY * 1.5)  # a et b lancés
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert sorted(providers.cancelled) == sorted(providers.started) == ["a", "b"]
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import make_candles, regime_sigma
+import resampler
+from backtester import generate_signals, prepare_frames, run_backtest
+from indicators import calculate_indicators
+
+INTERVALS = ["1h", "4h", "1d", "1w"]
+
+def history(n=2400, seed=5):
+    """Intervalles dérivés d'une même série 1h dont la volatilité alterne (fenêtre RSI 14 <-> 10)."""
+    base = make_candles(n, seed=seed, sigma=regime_sigma(n, period=150, volatile=0.02))
+    return {intv: resampler.resample_klines(base, intv) for intv in INTERVALS}
+
+def truncate(price_data_dict, interval, stop):
+    """Historique tel qu'il était à la clôture de la barre stop - 1 de l'intervalle (bougies ouvertes avant)."""
+    close_ms = price_data_dict[interval]["timestamp"].iloc[stop - 1] + resampler.interval_ms(interval)
+    return {intv: df[df["timestamp"] < close_ms].reset_index(drop=True) for intv, df in price_data_dict.items()}
+
+def test_rsi_window_varies_over_history():
+    assert set(prepare_frames(history())["1h"]["RSI_WINDOW"]) == {10, 14}
+
+@pytest.mark.parametrize("interval", ["1H", "4H", "1D"])
+def test_truncating_history_does_not_change_earlier_signals(interval):
+    data = history()
+    _, full = generate_signals(data, interval, 2, -1)
+    n = len(data[interval.lower()])
+    for stop in range(n // 5, n, n // 7):  # Coupures dans les deux régimes de volatilité
+        _, truncated = generate_signals(truncate(data, interval.lower(), stop), interval, 2, -1)
+        pd.testing.assert_frame_equal(truncated, full.iloc[:stop])
+
+def test_prepared_frames_are_reused():
+    frames = prepare_frames(history())
+    assert prepare_frames(frames)["1h"] is frames["1h"]
+
+def test_backtest_on_compact_frames():
+    data = history()
+    compact = {intv: calculate_indicators(df, intv.upper(), compact=True) for intv, df in data.items()}
+    assert "date" not in compact["1h"].columns
+    result = run_backtest(compact, "4H")
+    reference = run_backtest(data, "4H")
+    expected_dates = pd.to_datetime(data["4h"]["timestamp"], unit="ms")
+    np.testing.assert_array_equal(result["equity"].index.to_numpy(), expected_dates.to_numpy())
+    assert result["metrics"]["trades"] == len(result["trades"])
+    assert set(result["metrics"]) == set(reference["metrics"])
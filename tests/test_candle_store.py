@@ -0,0 +1,119 @@
+import time
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+import pytest
+from conftest import HOUR_MS, make_candles
+import candle_store
+import data_fetcher
+import kline_parser
+
+SYMBOL = "BTCUSDT"
+PROVIDER = "binance_proxy"
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(candle_store, "STORE_PATH", str(tmp_path / "candles.db"))
+
+def hours_ago(n):
+    return (int(time.time() * 1000) // HOUR_MS - n) * HOUR_MS
+
+def candles(n, start_ms, seed=0):
+    return make_candles(n, seed=seed, start_ms=start_ms).drop(columns=["date"])
+
+def test_append_replaces_overlap_and_loads_sorted():
+    first = candles(10, hours_ago(20))
+    assert candle_store.append(SYMBOL, "1h", PROVIDER, first) == 10
+    second = candles(10, int(first["timestamp"].iloc[5]), seed=1)  # 5 bougies déjà connues, revues par le fournisseur
+    assert candle_store.append(SYMBOL, "1h", PROVIDER, second) == 10
+    stored = candle_store.load(SYMBOL, "1h", PROVIDER, limit=None)
+    assert len(stored) == 15
+    assert stored["timestamp"].is_monotonic_increasing and stored["timestamp"].is_unique
+    np.testing.assert_array_equal(stored["close"].to_numpy()[:5], first["close"].to_numpy()[:5])
+    np.testing.assert_array_equal(stored["close"].to_numpy()[5:], second["close"].to_numpy())
+    assert {col: stored[col].dtype for col in kline_parser.COLUMNS} == kline_parser.SCHEMA
+    last = candle_store.load(SYMBOL, "1h", PROVIDER, limit=4)
+    np.testing.assert_array_equal(last["timestamp"].to_numpy(), stored["timestamp"].to_numpy()[-4:])
+    assert candle_store.append(SYMBOL, "1h", PROVIDER, first.iloc[:0]) == 0
+
+def test_series_are_kept_per_symbol_interval_and_provider():
+    candle_store.append(SYMBOL, "1h", PROVIDER, candles(10, hours_ago(20)))
+    assert candle_store.first_timestamp(SYMBOL, "1h", PROVIDER) == hours_ago(20)
+    assert candle_store.last_timestamp(SYMBOL, "1h", PROVIDER) == hours_ago(11)
+    for other in [("ETHUSDT", "1h", PROVIDER), (SYMBOL, "4h", PROVIDER), (SYMBOL, "1h", "kraken")]:
+        assert candle_store.last_timestamp(*other) is None
+        assert candle_store.load(*other).empty
+
+def test_delta_start():
+    assert candle_store.delta_start(SYMBOL, "1h", PROVIDER) is None  # Premier passage : chargement complet
+    candle_store.append(SYMBOL, "1h", PROVIDER, candles(10, hours_ago(9)))
+    assert candle_store.delta_start(SYMBOL, "1h", PROVIDER) == hours_ago(0)  # Dernière bougie (en cours) redemandée
+    candle_store.append("ETHUSDT", "1h", PROVIDER, candles(10, hours_ago(300)))
+    assert candle_store.delta_start("ETHUSDT", "1h", PROVIDER, limit=200) is None  # Écart > limit : rechargement complet
+    assert candle_store.delta_start("ETHUSDT", "1h", PROVIDER, limit=400) == hours_ago(291)
+
+class Exchange:
+    """API klines paginée façon Binance, servant une série qui se termine par la bougie en cours."""
+
+    def __init__(self, n=3000):
+        self.candles = candles(n, hours_ago(n - 1), seed=5)
+        self.requests = []
+
+    def __call__(self, provider, symbol, interval, url, **kwargs):
+        query = parse_qs(urlsplit(url).query)
+        since = int(query["startTime"][0]) if "startTime" in query else None
+        limit = int(query["limit"][0])
+        self.requests.append(since)
+        df = self.candles if since is None else self.candles[self.candles["timestamp"] >= since]
+        df = df.iloc[:limit] if since is not None else df.iloc[-limit:]
+        return Response([
+            [int(t), str(o), str(h), str(l), str(c), str(v), int(t) + HOUR_MS - 1, "0", 10, "0", "0", "0"]
+            for t, o, h, l, c, v in zip(df["timestamp"], df["open"], df["high"], df["low"], df["close"], df["volume"])
+        ])
+
+class Response:
+    status_code = 200
+    content = b"[]"
+
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+    def raise_for_status(self):
+        pass
+
+@pytest.fixture
+def exchange(monkeypatch):
+    exchange = Exchange()
+    monkeypatch.setattr(data_fetcher, "kline_request", exchange)
+    return exchange
+
+def test_history_first_run_fetches_everything(exchange):
+    history = data_fetcher.fetch_klines_history(SYMBOL, "1h", bars=2500)
+    np.testing.assert_array_equal(history["timestamp"].to_numpy(), exchange.candles["timestamp"].to_numpy()[-2500:])
+    needed_start = hours_ago(2499)
+    assert exchange.requests == [needed_start, needed_start + 1000 * HOUR_MS, needed_start + 2000 * HOUR_MS]
+
+def test_history_steady_state_fetches_after_last_timestamp(exchange):
+    data_fetcher.fetch_klines_history(SYMBOL, "1h", bars=2500)
+    exchange.requests.clear()
+    history = data_fetcher.fetch_klines_history(SYMBOL, "1h", bars=2500)
+    assert exchange.requests == [hours_ago(0)]  # Une seule page, depuis la dernière bougie stockée
+    assert len(history) == 2500
+
+def test_history_refetches_when_store_starts_too_late(exchange):
+    data_fetcher.fetch_klines_history(SYMBOL, "1h", bars=500)
+    assert candle_store.first_timestamp(SYMBOL, "1h", PROVIDER) == hours_ago(499)
+    exchange.requests.clear()
+    history = data_fetcher.fetch_klines_history(SYMBOL, "1h", bars=1500)
+    assert exchange.requests == [hours_ago(1499), hours_ago(499)]  # first_timestamp > needed_start : reprise complète
+    np.testing.assert_array_equal(history["timestamp"].to_numpy(), exchange.candles["timestamp"].to_numpy()[-1500:])
+
+def test_fetch_klines_requests_only_the_delta(exchange):
+    first = data_fetcher.fetch_klines(SYMBOL, "1h")
+    assert exchange.requests == [None]
+    assert len(first) == data_fetcher.KLINES_LIMIT
+    second = data_fetcher.fetch_klines(SYMBOL, "1h")
+    assert exchange.requests == [None, hours_ago(0)]
+    np.testing.assert_array_equal(second["timestamp"].to_numpy(), first["timestamp"].to_numpy())
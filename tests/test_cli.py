@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import pandas as pd
+import pytest
+import cli
+import pipeline
+import scanner
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def result(symbol, signal="BUY", error=None):
+    if error:
+        return {"symbol": symbol, "interval": "1H", "signal": "ERROR", "confidence": 0.0, "error": error}
+    return {
+        "symbol": symbol, "interval": "1H", "signal": signal, "confidence": 0.75, "price": 60000.0,
+        "buy_price": 59000.0, "sell_price": 63000.0, "technical_score": 4.0, "fundamental_score": 1.0, "macro_score": -0.5,
+        "technical_details": ["RSI survendu"], "fundamental_details": [], "macro_details": ["VIX élevé"],
+    }
+
+@pytest.fixture(autouse=True)
+def restore_logging():
+    yield
+    logging.disable(logging.NOTSET)  # main() coupe les journaux INFO sans --verbose
+
+@pytest.fixture
+def runs(monkeypatch):
+    """pipeline.run simulé : enregistre ses arguments ; ETH échoue."""
+    calls = []
+
+    def fake_run(symbol_input, interval_input="1H", fred_api_key=None, alpha_vantage_api_key=None, cache=None, derive=False,
+                 hedged=True, compact=False):
+        calls.append({"symbol": symbol_input, "interval": interval_input, "cache": cache, "derive": derive,
+                      "hedged": hedged, "compact": compact})
+        return result(symbol_input.upper(), error="Pas assez de données" if symbol_input == "eth" else None)
+
+    monkeypatch.setattr(pipeline, "run", fake_run)
+    return calls
+
+def test_parser_defaults_and_normalization():
+    parser = cli.build_parser()
+    args = parser.parse_args(["analyze", "btc", "eth", "--interval", "4h"])
+    assert (args.command, args.symbols, args.interval) == ("analyze", ["btc", "eth"], "4H")
+    assert not (args.json or args.derive or args.no_hedge or args.compact or args.verbose)
+    args = parser.parse_args(["-v", "scan", "--symbols", "BTC,ETH", "--workers", "4", "--json"])
+    assert (args.symbols, args.workers, args.json, args.verbose, args.interval) == ("BTC,ETH", 4, True, True, "1H")
+    args = parser.parse_args(["stream", "btc", "--intervals", "1h,4h"])
+    assert (args.symbols, args.intervals, args.url) == (["btc"], "1h,4h", None)
+
+@pytest.mark.parametrize("argv", [[], ["analyze"], ["analyze", "btc", "--interval", "2H"], ["scan", "--workers", "many"], ["unknown"]])
+def test_invalid_arguments_exit_with_usage_error(argv, capsys):
+    with pytest.raises(SystemExit) as exc:
+        cli.build_parser().parse_args(argv)
+    assert exc.value.code == 2
+    assert "usage:" in capsys.readouterr().err
+
+def test_help_does_not_import_pipeline():
+    code = "import sys, cli\ntry:\n    cli.main(['--help'])\nexcept SystemExit:\n    pass\nprint('pipeline' in sys.modules, 'pandas' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    assert "analyze" in output and output.strip().endswith("False False")
+
+def test_analyze_prints_text_result(runs, capsys):
+    assert cli.main(["analyze", "btc", "--interval", "4h", "--derive", "--no-hedge", "--compact"]) == 0
+    assert runs == [{"symbol": "btc", "interval": "4H", "cache": runs[0]["cache"], "derive": True, "hedged": False, "compact": True}]
+    assert isinstance(runs[0]["cache"], pipeline.MemoryCache)
+    out = capsys.readouterr().out
+    assert "BTC (1H) : BUY (confiance 75.00%)" in out
+    assert "- RSI survendu" in out and "- VIX élevé" in out
+
+def test_analyze_json_and_exit_code(runs, capsys):
+    assert cli.main(["analyze", "btc", "--json"]) == 0
+    assert json.loads(capsys.readouterr().out)["signal"] == "BUY"
+    assert cli.main(["analyze", "btc", "eth", "--json"]) == 1  # Un symbole en erreur
+    results = json.loads(capsys.readouterr().out)
+    assert [r["signal"] for r in results] == ["BUY", "ERROR"]
+    assert runs[-1]["cache"] is runs[-2]["cache"]  # Cache partagé entre les symboles d'un appel
+    assert cli.main(["analyze", "eth"]) == 1
+    assert "ETH (1H) : ERREUR - Pas assez de données" in capsys.readouterr().out
+
+def test_scan_outputs_ranking(monkeypatch, capsys):
+    calls = []
+
+    def fake_scan(watchlist, interval_input, fred_api_key, alpha_vantage_api_key, max_workers, derive):
+        calls.append((watchlist, interval_input, max_workers, derive))
+        return pd.DataFrame([{"symbol": "BTC", "signal": "BUY", "confidence": 0.8}, {"symbol": "ETH", "signal": "HOLD", "confidence": 0.1}])
+
+    monkeypatch.setattr(scanner, "scan_market", fake_scan)
+    assert cli.main(["scan", "--symbols", "btc, eth,", "--interval", "1d", "--workers", "3", "--json"]) == 0
+    assert calls == [(["btc", "eth"], "1D", 3, False)]
+    assert [row["symbol"] for row in json.loads(capsys.readouterr().out)] == ["BTC", "ETH"]
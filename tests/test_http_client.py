@@ -0,0 +1,238 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import CancelledError
+import pytest
+import requests
+import async_fetcher
+import http_client
+from http_client import SingleFlight, TokenBucket
+
+URL = "https://api.example.test/klines"
+N = 8
+
+class CountingFlight(SingleFlight):
+    """SingleFlight comptant les join, pour libérer le leader une fois tous les appels arrivés."""
+
+    def __init__(self):
+        super().__init__()
+        self.joined = 0
+
+    def join(self, key):
+        with self._lock:
+            self.joined += 1
+        return super().join(key)
+
+def wait_for(condition, timeout=5.0):
+    give_up_at = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < give_up_at, "délai dépassé"
+        time.sleep(0.001)
+
+def make_response(body=b'{"ok": 1}'):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = body
+    response.headers["X-Source"] = "leader"
+    return response
+
+@pytest.fixture
+def flight(monkeypatch):
+    flight = CountingFlight()
+    monkeypatch.setattr(http_client, "_singleflight", flight)
+    return flight
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """_get_with_retries bloqué jusqu'à release ; compte les appels amont."""
+    state = {"calls": [], "release": threading.Event(), "result": make_response(), "error": None}
+
+    def fake(host, url, params, timeout, max_retries, backoff, deadline):
+        state["calls"].append((url, params, timeout, max_retries, backoff, deadline))
+        state["release"].wait(5)
+        if state["error"] is not None:
+            raise state["error"]
+        return state["result"], 1, 0.0
+
+    monkeypatch.setattr(http_client, "_get_with_retries", fake)
+    return state
+
+def run_callers(calls, flight, release):
+    results, errors = [None] * len(calls), [None] * len(calls)
+
+    def call(i):
+        try:
+            results[i] = calls[i]()
+        except BaseException as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(calls))]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: flight.joined == len(calls))
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+def test_concurrent_gets_make_one_upstream_call(flight, upstream):
+    results, errors = run_callers([lambda: http_client.get(URL, params={"limit": 200})] * N, flight, upstream["release"])
+    assert errors == [None] * N
+    assert len(upstream["calls"]) == 1
+    assert all(response.json() == {"ok": 1} for response in results)
+    assert flight._inflight == {}
+
+def test_followers_get_their_own_headers(flight, upstream):
+    results, _ = run_callers([lambda: http_client.get(URL)] * N, flight, upstream["release"])
+    assert len({id(response) for response in results}) == N
+    assert len({id(response.headers) for response in results}) == N
+    results[1].headers["X-Source"] = "changed"
+    assert [response.headers["X-Source"] for response in results].count("leader") == N - 1
+
+def test_different_budgets_are_not_coalesced(flight, upstream):
+    calls = [lambda: http_client.get(URL, deadline=30.0), lambda: http_client.get(URL, deadline=5.0),
+             lambda: http_client.get(URL, timeout=2), lambda: http_client.get(URL, max_retries=1)]
+    _, errors = run_callers(calls, flight, upstream["release"])
+    assert errors == [None] * len(calls)
+    assert len(upstream["calls"]) == len(calls)
+
+def test_leader_exception_reaches_followers(flight, upstream):
+    upstream["error"] = requests.exceptions.ConnectionError("amont injoignable")
+    _, errors = run_callers([lambda: http_client.get(URL)] * N, flight, upstream["release"])
+    assert len(upstream["calls"]) == 1
+    assert all(isinstance(e, requests.exceptions.ConnectionError) for e in errors)
+    assert flight._inflight == {}
+
+class Warnings:
+    def __init__(self):
+        self.messages = []
+
+    def warning(self, message):
+        self.messages.append(message)
+
+def test_get_warns_when_blocking_an_event_loop(monkeypatch, upstream):
+    warnings = Warnings()
+    monkeypatch.setattr(http_client, "logger", warnings)
+    upstream["release"].set()
+    http_client.get(URL)
+    assert warnings.messages == []
+
+    async def scenario():
+        return http_client.get(URL)
+
+    assert asyncio.run(scenario()).status_code == 200
+    assert len(warnings.messages) == 1 and "async_fetcher.get_json" in warnings.messages[0]
+
+def test_leader_interruption_cancels_followers():
+    flight = SingleFlight()
+    future, leader = flight.join("key")
+    follower, is_leader = flight.join("key")
+    assert leader and not is_leader and follower is future
+    flight.finish("key", future, exception=KeyboardInterrupt())
+    assert future.cancelled()
+    with pytest.raises(CancelledError):
+        follower.result()
+    assert flight._inflight == {}
+
+def test_key_removed_after_finish():
+    flight = SingleFlight()
+    future, _ = flight.join("key")
+    flight.finish("key", future, "résultat")
+    assert flight._inflight == {}
+    second, leader = flight.join("key")
+    assert leader and second is not future
+    assert flight.do("other", lambda: 42) == (42, True)
+    assert "other" not in flight._inflight
+
+def test_penalize_delays_reserve():
+    bucket = TokenBucket(rate=10.0, capacity=5)
+    assert bucket.reserve() == 0.0
+    bucket.penalize(2.0)
+    assert bucket.reserve(max_wait=1.0) is None  # Refusé sans consommer de jeton
+    assert bucket.reserve() == pytest.approx(2.1, abs=0.05)
+    assert bucket.reserve() == pytest.approx(2.2, abs=0.05)
+
+def test_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=1000.0, capacity=2)
+    assert [bucket.reserve(), bucket.reserve()] == [0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.001, abs=0.001)
+
+class Upstream:
+    """_get_json_with_retries asynchrone : la première requête bloque jusqu'à annulation ou libération."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = None
+        self.error = None
+
+    async def __call__(self, session, host, url, max_retries, backoff, deadline):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return 200, {"ok": 1}, 9, 1, 0.0
+
+@pytest.fixture
+def json_upstream(monkeypatch):
+    monkeypatch.setattr(async_fetcher, "_singleflight", SingleFlight())
+    upstream = Upstream()
+    monkeypatch.setattr(async_fetcher, "_get_json_with_retries", upstream)
+    return upstream
+
+def test_concurrent_get_json_make_one_upstream_call(json_upstream):
+    async def scenario():
+        json_upstream.release = asyncio.Event()
+        tasks = [asyncio.ensure_future(async_fetcher.get_json(None, URL)) for _ in range(N)]
+        await asyncio.sleep(0.01)
+        json_upstream.release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(scenario()) == [(200, {"ok": 1})] * N
+    assert json_upstream.calls == 1
+    assert async_fetcher._singleflight._inflight == {}
+
+def test_get_json_leader_exception_reaches_followers(json_upstream):
+    json_upstream.error = asyncio.TimeoutError("délai dépassé")
+
+    async def scenario():
+        json_upstream.release = asyncio.Event()
+        tasks = [asyncio.ensure_future(async_fetcher.get_json(None, URL)) for _ in range(N)]
+        await asyncio.sleep(0.01)
+        json_upstream.release.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(e, asyncio.TimeoutError) for e in asyncio.run(scenario()))
+    assert json_upstream.calls == 1
+
+def test_get_json_follower_takes_over_cancelled_leader(json_upstream):
+    async def scenario():
+        json_upstream.release = asyncio.Event()
+        leader = asyncio.ensure_future(async_fetcher.get_json(None, URL))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(async_fetcher.get_json(None, URL))
+        await asyncio.sleep(0.01)
+        leader.cancel()  # Requête couverte perdante
+        await asyncio.sleep(0.01)
+        json_upstream.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == (200, {"ok": 1})
+    assert json_upstream.calls == 2  # Le suiveur relance la requête pour son propre compte
+    assert async_fetcher._singleflight._inflight == {}
+
+def test_cancelled_follower_does_not_cancel_leader(json_upstream):
+    async def scenario():
+        json_upstream.release = asyncio.Event()
+        leader = asyncio.ensure_future(async_fetcher.get_json(None, URL))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(async_fetcher.get_json(None, URL))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        await asyncio.sleep(0.01)
+        json_upstream.release.set()
+        return await leader, follower.cancelled()
+
+    assert asyncio.run(scenario()) == ((200, {"ok": 1}), True)
+    assert json_upstream.calls == 1
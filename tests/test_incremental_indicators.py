@@ -0,0 +1,71 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import make_candles, regime_sigma
+from incremental_indicators import IncrementalIndicators, _RollingWindow
+from indicators import ALL_FEATURES, calculate_indicators
+
+FLOAT_COLUMNS = [col for col in ALL_FEATURES if col != "RSI_DIVERGENCE"]
+
+def assert_matches_batch(frame, batch):
+    np.testing.assert_allclose(
+        frame[FLOAT_COLUMNS].to_numpy(dtype=float), batch[FLOAT_COLUMNS].to_numpy(dtype=float),
+        rtol=1e-9, atol=1e-9, equal_nan=True,
+    )
+    np.testing.assert_array_equal(frame["RSI_DIVERGENCE"].to_numpy(), batch["RSI_DIVERGENCE"].to_numpy())
+
+@pytest.mark.parametrize("interval", ["1H", "4H", "1D", "1W"])
+@pytest.mark.parametrize("sigma", [0.004, 0.03])  # Fenêtre RSI 14 puis 10
+def test_stream_matches_batch(interval, sigma):
+    df = make_candles(300, seed=1, interval=interval.lower(), sigma=sigma)
+    engine = IncrementalIndicators(interval, history=len(df)).seed(df.iloc[:100])
+    for candle in df.iloc[100:].to_dict("records"):
+        engine.update(candle)
+    batch = calculate_indicators(df, interval)
+    assert engine.rsi_window() == (14 if sigma < 0.01 else 10)
+    assert_matches_batch(engine.to_frame(), batch)
+
+def test_bounded_history_matches_batch_tail():
+    df = make_candles(400, seed=2)
+    engine = IncrementalIndicators("1H", history=200).seed(df)
+    assert_matches_batch(engine.to_frame(), calculate_indicators(df, "1H").iloc[-200:])
+
+def test_rsi_window_flips_while_streaming():
+    df = make_candles(360, seed=4, sigma=regime_sigma(360))
+    engine = IncrementalIndicators("1H", history=len(df)).seed(df.iloc[:30])
+    windows = set()
+    for stop, candle in enumerate(df.iloc[30:].to_dict("records"), start=31):
+        snapshot = engine.update(candle)
+        if stop % 5 == 0 or stop == len(df):
+            batch = calculate_indicators(df.iloc[:stop], "1H")
+            windows.add(engine.rsi_window())
+            assert_matches_batch(engine.to_frame(), batch)
+            last = batch.iloc[-1]
+            np.testing.assert_allclose([snapshot[col] for col in FLOAT_COLUMNS], last[FLOAT_COLUMNS].to_numpy(dtype=float),
+                                       rtol=1e-9, atol=1e-9, equal_nan=True)
+            assert snapshot["RSI_DIVERGENCE"] == last["RSI_DIVERGENCE"]
+    assert windows == {10, 14}
+
+def test_invalid_candle_rejected():
+    engine = IncrementalIndicators("1H").seed(make_candles(30))
+    candle = make_candles(31).iloc[-1].to_dict()
+    candle["close"] = float("nan")
+    with pytest.raises(ValueError):
+        engine.update(candle)
+
+def test_rolling_window_does_not_drift_on_long_trending_stream():
+    n, size = 2_000_003, 20
+    rng = np.random.default_rng(0)
+    values = 100 + 0.05 * np.arange(n) + rng.normal(0, 0.1, n)  # Tendance forte, faible dispersion
+    values[1_000_000] = math.nan
+    series = pd.Series(values)
+    window = _RollingWindow(size)
+    for i, value in enumerate(values.tolist()):
+        window.push(value)
+        if i >= size and (i % 99_991 == 0 or i >= n - size - 2 or 1_000_000 <= i <= 1_000_000 + size):
+            # Référence pandas recalculée sur la fenêtre seule (le rolling de pandas dérive lui aussi)
+            expected = series.iloc[i - size + 1:i + 1]
+            expected_sum = expected.sum() if expected.notna().all() else math.nan
+            np.testing.assert_allclose(window.mean(), expected_sum / size, rtol=1e-12, equal_nan=True, err_msg=str(i))
+            np.testing.assert_allclose(window.std(), expected.std(skipna=False), rtol=1e-9, equal_nan=True, err_msg=str(i))
@@ -0,0 +1,223 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import make_candles
+from analyzer import REQUIRED_FEATURES
+import indicators
+from indicators import (ALL_FEATURES, PRICE_COLUMNS, SLIDING_MAX_ROWS, SLIDING_RTOL, calculate_indicators, compact_frame, detect_rsi_divergence,
+                        float32_prices_ok, resolve_features)
+
+OHLCV = ["open", "high", "low", "close", "volume"]
+
+def reference_divergence(close, rsi, window):
+    """Boucle d'origine de detect_rsi_divergence (avant vectorisation)."""
+    divergence = np.zeros(len(close), dtype=np.int64)
+    for i in range(window, len(close)):
+        price_change = close[i] - close[i - window]
+        rsi_change = rsi[i] - rsi[i - window]
+        if price_change < 0 and rsi_change > 0:
+            divergence[i] = 1
+        elif price_change > 0 and rsi_change < 0:
+            divergence[i] = -1
+    return divergence
+
+def reference_indicators(df, interval):
+    """Formules pandas d'origine de calculate_indicators (plus VOLATILITY_20 et VOLUME_MA_20), sur une copie."""
+    df = df.copy()
+    for col in OHLCV:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    close, high, low = df["close"], df["high"], df["low"]
+    df["TR"] = np.maximum.reduce([high - low, (high - close.shift(1)).abs(), (low - close.shift(1)).abs()])
+    df["ATR_14"] = df["TR"].rolling(window=14).mean()
+    for span in (12, 20, 26):
+        df[f"EMA_{span}"] = close.ewm(span=span, adjust=False).mean()
+    df["MACD"] = df["EMA_12"] - df["EMA_26"]
+    df["MACD_SIGNAL"] = df["MACD"].ewm(span=9, adjust=False).mean()
+    df["VOLATILITY_20"] = close.pct_change().rolling(window=20).std() * 100
+    volatility = df["VOLATILITY_20"].iloc[-1] if len(df) >= 20 else 1.0
+    rsi_window = 14 if volatility < 2 else 10
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=rsi_window).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_window).mean()
+    rs = gain / loss.where(loss != 0, np.inf)
+    df["RSI"] = 100 - (100 / (1 + rs)).where(rs != np.inf, 100)
+    adx_window = 14 if interval in ["1D", "1W"] else 10
+    plus_dm, minus_dm = high.diff(), low.diff()
+    plus_dm[plus_dm < 0] = 0
+    minus_dm[minus_dm > 0] = 0
+    tr_sum = df["TR"].rolling(window=adx_window).sum()
+    plus_di = 100 * plus_dm.rolling(window=adx_window).sum() / tr_sum
+    minus_di = 100 * (-minus_dm).rolling(window=adx_window).sum() / tr_sum
+    df["ADX"] = (100 * (plus_di - minus_di).abs() / (plus_di + minus_di)).rolling(window=adx_window).mean()
+    window = 10 if interval in ["1H", "4H"] else 20
+    df["SUPPORT"] = low.rolling(window=window).min().ewm(span=window, adjust=False).mean()
+    df["RESISTANCE"] = high.rolling(window=window).max().ewm(span=window, adjust=False).mean()
+    price_range = df["RESISTANCE"] - df["SUPPORT"]
+    df["FIBO_0.382"] = df["SUPPORT"] + price_range * 0.382
+    df["FIBO_0.618"] = df["SUPPORT"] + price_range * 0.618
+    df["BB_MID"] = close.rolling(window=20).mean()
+    df["BB_STD"] = close.rolling(window=20).std()
+    df["BB_UPPER"] = df["BB_MID"] + 2 * df["BB_STD"]
+    df["BB_LOWER"] = df["BB_MID"] - 2 * df["BB_STD"]
+    df["VOLUME_MA_20"] = df["volume"].rolling(window=20).mean()
+    df["RSI_DIVERGENCE"] = reference_divergence(close.to_numpy(), df["RSI"].to_numpy(), 5)
+    return df
+
+def assert_matches_reference(df, interval):
+    pd.testing.assert_frame_equal(calculate_indicators(df, interval), reference_indicators(df, interval),
+                                  check_exact=False, rtol=1e-9, atol=1e-9)
+
+@pytest.mark.parametrize("n", [300, SLIDING_MAX_ROWS + 200])  # Fenêtres NumPy puis pandas
+@pytest.mark.parametrize("interval", ["1H", "4H", "1D", "1W"])
+@pytest.mark.parametrize("sigma", [0.004, 0.03])  # Fenêtre RSI 14 puis 10
+def test_indicators_match_reference(interval, sigma, n):
+    assert_matches_reference(make_candles(n, seed=6, interval=interval.lower(), sigma=sigma), interval)
+
+@pytest.mark.parametrize("n", [1, 2, 5, 13, 15, 19, 20, 21, 27])
+def test_short_series_match_reference(n):
+    assert_matches_reference(make_candles(n, seed=n, sigma=0.03), "1D")
+
+def test_string_ohlcv_matches_reference():
+    df = make_candles(120, seed=8).astype({col: str for col in OHLCV})
+    result = calculate_indicators(df, "4H")
+    assert all(result[col].dtype == np.float64 for col in OHLCV)
+    assert_matches_reference(df, "4H")
+
+def test_existing_indicator_columns_replaced_in_place():
+    df = calculate_indicators(make_candles(150, seed=9, sigma=0.03), "1H")
+    df[ALL_FEATURES] = 0
+    df["EXTRA"] = 1.0  # Colonne étrangère après les indicateurs : l'ordre est conservé
+    assert_matches_reference(df, "1H")
+    assert list(calculate_indicators(df, "1H").columns) == list(df.columns)
+
+@pytest.mark.parametrize("interval", ["1H", "4H", "1D", "1W"])
+@pytest.mark.parametrize("sigma", [0.004, 0.03])
+def test_required_features_match_full_computation(interval, sigma):
+    df = make_candles(300, seed=11, interval=interval.lower(), sigma=sigma)
+    partial = calculate_indicators(df, interval, features=REQUIRED_FEATURES)
+    full = calculate_indicators(df, interval)
+    assert set(REQUIRED_FEATURES) <= set(partial.columns)
+    pd.testing.assert_frame_equal(partial[REQUIRED_FEATURES], full[REQUIRED_FEATURES], check_exact=True)
+
+def test_features_pull_their_dependencies():
+    assert resolve_features(["MACD_SIGNAL"]) == ["EMA_12", "EMA_26", "MACD", "MACD_SIGNAL"]
+    assert resolve_features(["RSI_DIVERGENCE"]) == ["VOLATILITY_20", "RSI", "RSI_DIVERGENCE"]
+    result = calculate_indicators(make_candles(100), "1H", features=["FIBO_0.618"])
+    assert [col for col in result.columns if col in ALL_FEATURES] == ["SUPPORT", "RESISTANCE", "FIBO_0.618"]
+
+@pytest.mark.parametrize("features", [["RSI", "MACD_HIST"], ["rsi"], ["RSI_DIVERGENCE_3"]])
+def test_unknown_feature_rejected(features):
+    with pytest.raises(ValueError, match="Indicateur inconnu"):
+        calculate_indicators(make_candles(50), "1H", features=features)
+
+def random_rsi_frame(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    rsi = rng.uniform(0, 100, n)
+    rsi[:rng.integers(0, 15)] = np.nan  # RSI indéfini en début de série
+    return pd.DataFrame({"close": close, "high": close + 0.5, "low": close - 0.5, "RSI": rsi})
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("window", [1, 3, 5, 8])
+def test_window_divergence_matches_reference_loop(seed, window):
+    df = random_rsi_frame(300, seed)
+    result = detect_rsi_divergence(df.copy(), window=window)
+    expected = reference_divergence(df["close"].to_numpy(), df["RSI"].to_numpy(), window)
+    np.testing.assert_array_equal(result["RSI_DIVERGENCE"].to_numpy(), expected)
+
+def test_window_divergence_on_indicators_matches_reference_loop():
+    df = calculate_indicators(make_candles(500, seed=3), "1H")
+    expected = reference_divergence(df["close"].to_numpy(), df["RSI"].to_numpy(), 5)
+    np.testing.assert_array_equal(df["RSI_DIVERGENCE"].to_numpy(), expected)
+
+def test_window_divergence_short_series():
+    df = random_rsi_frame(4, 0)
+    assert (detect_rsi_divergence(df.copy(), window=5)["RSI_DIVERGENCE"] == 0).all()
+
+def test_extra_windows_add_columns():
+    df = random_rsi_frame(200, 1)
+    result = detect_rsi_divergence(df.copy(), window=5, windows=[3, 10])
+    close, rsi = df["close"].to_numpy(), df["RSI"].to_numpy()
+    np.testing.assert_array_equal(result["RSI_DIVERGENCE"].to_numpy(), reference_divergence(close, rsi, 5))
+    for window in (3, 10):
+        np.testing.assert_array_equal(result[f"RSI_DIVERGENCE_{window}"].to_numpy(), reference_divergence(close, rsi, window))
+
+def pivot_frame():
+    """Deux creux (barres 4 et 12), le second plus bas avec un RSI plus haut, puis deux sommets (20 et 28)."""
+    # Bases strictement monotones : aucun autre pivot que ceux placés ci-dessous
+    low = 100 + 0.01 * np.arange(36)
+    high = 110 - 0.01 * np.arange(36)
+    rsi = np.full(36, 50.0)
+    low[4], rsi[4] = 90.0, 30.0
+    low[12], rsi[12] = 85.0, 40.0  # Plus bas plus bas, RSI plus haut : haussière
+    high[20], rsi[20] = 120.0, 70.0
+    high[28], rsi[28] = 125.0, 60.0  # Plus haut plus haut, RSI plus bas : baissière
+    close = (low + high) / 2
+    return pd.DataFrame({"close": close, "high": high, "low": low, "RSI": rsi})
+
+def test_pivot_divergence_signals_after_confirmation():
+    df = pivot_frame()
+    span = 3
+    divergence = detect_rsi_divergence(df.copy(), mode="pivot", pivot_span=span)["RSI_DIVERGENCE"].to_numpy()
+    expected = np.zeros(len(df), dtype=np.int64)
+    expected[12 + span] = 1
+    expected[28 + span] = -1
+    np.testing.assert_array_equal(divergence, expected)
+
+def test_pivot_divergence_uses_no_future_bars():
+    df = make_candles(300, seed=2)
+    df = calculate_indicators(df, "1H")
+    full = detect_rsi_divergence(df.copy(), mode="pivot", pivot_span=3)["RSI_DIVERGENCE"].to_numpy()
+    for stop in range(20, len(df) + 1, 7):
+        truncated = detect_rsi_divergence(df.iloc[:stop].copy(), mode="pivot", pivot_span=3)["RSI_DIVERGENCE"].to_numpy()
+        np.testing.assert_array_equal(truncated, full[:stop])
+
+def test_unknown_divergence_mode():
+    with pytest.raises(ValueError):
+        detect_rsi_divergence(random_rsi_frame(20, 0), mode="zigzag")
+
+def ticked_candles(n, price, tick, seed=0):
+    """Bougies cotées au pas `tick` autour de `price`."""
+    df = make_candles(n, seed=seed)
+    for col in ["open", "high", "low", "close"]:
+        df[col] = np.round(df[col] / 60_000 * price / tick) * tick
+    return df
+
+@pytest.mark.parametrize("price, tick, expected", [
+    (60_000, 0.01, True), (50_000, 0.01, True), (120_000, 0.01, False), (120_000, 0.1, True),
+    (0.00002, 1e-8, True), (3.5, 0.0001, True),
+])
+def test_float32_prices_ok_depends_on_tick_and_scale(price, tick, expected):
+    df = ticked_candles(200, price, tick)
+    assert float32_prices_ok(df) is expected
+    compact = compact_frame(calculate_indicators(df, "1H"))
+    price_dtype = np.float32 if expected else np.float64
+    assert all(compact[col].dtype == price_dtype for col in PRICE_COLUMNS)
+    assert compact["RSI"].dtype == np.float32 and compact["VOLUME_MA_20"].dtype == np.float32
+    # Deux prix voisins restent distincts
+    assert compact["close"].nunique() == df["close"].nunique()
+
+def test_float32_prices_ok_edge_cases():
+    assert not float32_prices_ok(make_candles(200))  # Prix continus : pas inconnu, float64 conservé
+    assert float32_prices_ok(make_candles(200).iloc[:0])
+    flat = ticked_candles(3, 100, 1)
+    flat[["open", "high", "low", "close"]] = 100.0
+    assert float32_prices_ok(flat)
+
+def sliding_reference(values, window, reducer):
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = indicators._SLIDING_REDUCERS[reducer](np.lib.stride_tricks.sliding_window_view(values, window), axis=-1)
+    return out
+
+@pytest.mark.parametrize("n", [SLIDING_MAX_ROWS - 1, SLIDING_MAX_ROWS, SLIDING_MAX_ROWS + 1])
+@pytest.mark.parametrize("reducer", ["mean", "sum", "min", "max", "std"])
+def test_rolling_paths_agree_around_threshold(n, reducer):
+    candles = make_candles(n, seed=n, sigma=0.03)
+    for values in [candles["close"].to_numpy(), candles["volume"].to_numpy(), np.diff(candles["close"].to_numpy(), prepend=np.nan)]:
+        for window in [10, 14, 20]:
+            result = indicators._rolling(values, window, reducer)
+            numpy_path = sliding_reference(values, window, reducer)
+            pandas_path = getattr(pd.Series(values).rolling(window), reducer)().to_numpy()
+            np.testing.assert_array_equal(result, numpy_path if n <= SLIDING_MAX_ROWS else pandas_path)
+            np.testing.assert_allclose(numpy_path, pandas_path, rtol=SLIDING_RTOL, atol=SLIDING_RTOL, equal_nan=True)
@@ -0,0 +1,78 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import HOUR_MS
+import kline_parser
+from benchmark import synthetic_candles, synthetic_payload
+
+PROVIDERS = ["binance_proxy", "binance_futures", "coincap", "kraken"]
+N = 50
+
+def assert_schema(df):
+    assert list(df.columns) == kline_parser.COLUMNS
+    assert {col: df[col].dtype for col in df.columns} == kline_parser.SCHEMA
+
+@pytest.mark.parametrize("provider", PROVIDERS)
+def test_parse_matches_source_series(provider):
+    df = kline_parser.parse(provider, "BTCUSDT", json.loads(synthetic_payload(provider, "BTCUSDT", N, seed=4)))
+    source = synthetic_candles(N, seed=4)
+    assert_schema(df)
+    np.testing.assert_array_equal(df["timestamp"].to_numpy(), source["timestamp"].to_numpy())  # Kraken : secondes -> ms
+    for col in ["open", "high", "low", "close"]:
+        np.testing.assert_allclose(df[col].to_numpy(), source[col].to_numpy(), atol=0.005, err_msg=col)
+    np.testing.assert_allclose(df["volume"].to_numpy(), source["volume"].to_numpy(), atol=5e-5)
+
+def test_provider_specific_columns():
+    payload = lambda provider: json.loads(synthetic_payload(provider, "BTCUSDT", N))
+    binance = kline_parser.parse("binance_proxy", "BTCUSDT", payload("binance_proxy"))
+    np.testing.assert_array_equal(binance["close_time"].to_numpy(), binance["timestamp"].to_numpy() + HOUR_MS - 1)
+    assert (binance["number_of_trades"] == 100).all() and (binance["taker_buy_base"] > 0).all()
+    kraken = kline_parser.parse("kraken", "BTCUSDT", payload("kraken"))
+    np.testing.assert_array_equal(kraken["close_time"].to_numpy(), kraken["timestamp"].to_numpy())
+    assert (kraken["number_of_trades"] == 100).all() and (kraken["quote_asset_volume"] == 0).all()
+    coincap = kline_parser.parse("coincap", "BTCUSDT", payload("coincap"))
+    assert (coincap["number_of_trades"] == 0).all() and (coincap["taker_buy_quote"] == 0).all()
+
+@pytest.mark.parametrize("provider, data", [
+    ("binance_proxy", []),
+    ("binance_futures", []),
+    ("coincap", {"data": []}),
+    ("coincap", {}),
+    ("kraken", {"error": [], "result": {"XXBTZUSD": [], "last": 0}}),
+    ("kraken", {"error": [], "result": {"last": 0}}),
+])
+def test_empty_payloads(provider, data):
+    df = kline_parser.parse(provider, "BTCUSDT", data)
+    assert df.empty
+    assert_schema(df)
+
+def test_unknown_provider():
+    with pytest.raises(ValueError):
+        kline_parser.parse("bitstamp", "BTCUSDT", [])
+
+def test_from_rows_coerces_invalid_values():
+    rows = json.loads(synthetic_payload("binance_proxy", "BTCUSDT", 3))
+    rows[1][4] = "n/a"
+    rows[2][8] = None
+    df = kline_parser.from_rows(rows)
+    assert_schema(df)
+    assert np.isnan(df["close"].iloc[1]) and df["close"].notna().sum() == 2
+    assert df["number_of_trades"].tolist() == [100, 100, 0]
+
+def test_parse_row_matches_from_rows():
+    message = {"t": 1_600_000_000_000, "T": 1_600_003_599_999, "o": "1.5", "h": "2", "l": "1", "c": "1.75",
+               "v": "10", "q": "17.5", "n": 7, "V": "4", "Q": "7", "x": True}
+    candle = kline_parser.parse_row(message, "binance_ws")
+    frame = kline_parser.from_rows([message], kline_parser.LAYOUTS["binance_ws"][0])
+    assert candle == frame.iloc[0].to_dict()
+    assert type(candle["number_of_trades"]) is int and type(candle["close"]) is float
+
+def test_normalize_fills_missing_columns():
+    df = pd.DataFrame({"timestamp": [2, 1], "open": [1, 2], "high": [1, 2], "low": [1, 2], "close": [1, 2],
+                       "volume": [3, 4], "extra": ["x", "y"]})
+    normalized = kline_parser.normalize(df)
+    assert_schema(normalized)
+    assert normalized["close_time"].tolist() == [2, 1]
+    assert normalized["number_of_trades"].tolist() == [0, 0]
+    assert normalized["quote_asset_volume"].isna().all()
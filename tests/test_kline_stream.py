@@ -0,0 +1,88 @@
+import asyncio
+import socket
+import time
+import numpy as np
+import pytest
+from conftest import HOUR_MS, make_candles
+import candle_store
+from kline_stream import STREAM_PROVIDER, KlineStream, ReplayServer
+
+SEEDED = 200
+STREAMED = 40
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def candles():
+    """Bougies 1h toutes clôturées : SEEDED amorcées par REST, STREAMED rejouées par le flux."""
+    start_ms = (int(time.time() * 1000) // HOUR_MS - SEEDED - STREAMED - 2) * HOUR_MS
+    return make_candles(SEEDED + STREAMED, seed=3, start_ms=start_ms).drop(columns=["date"])
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(candle_store, "STORE_PATH", str(tmp_path / "candles.db"))
+
+class Backfill:
+    """REST simulé : l'amorçage ne connaît que les SEEDED premières bougies, les reprises voient tout l'historique clôturé."""
+
+    def __init__(self, candles):
+        self.candles = candles
+        self.calls = 0
+
+    def __call__(self, symbol, interval):
+        self.calls += 1
+        return self.candles.iloc[:SEEDED] if self.calls == 1 else self.candles
+
+async def replay(candles, replayed, backfill, **server_options):
+    server = await ReplayServer({("BTCUSDT", "1h"): replayed}, port=free_port(), **server_options).start()
+    stream = KlineStream(["BTC"], ("1h",), url=server.url, backfill=backfill, history=SEEDED + STREAMED)
+    task = asyncio.ensure_future(stream.run())
+    last_ms = int(candles["timestamp"].iloc[-1])
+    try:
+        await wait_until(lambda: stream.last_timestamps.get(("BTCUSDT", "1h")) == last_ms)
+        # Le serveur ferme la connexion après la dernière bougie : compteurs relevés avant toute reconnexion
+        counts = {"connections": stream.connections, "backfills": backfill.calls}
+        await wait_until(lambda: len(candle_store.load("BTCUSDT", "1h", STREAM_PROVIDER, limit=None)) == len(candles))
+    finally:
+        stream.stop()
+        await asyncio.wait_for(task, 10)
+        await server.stop()
+    return stream, counts
+
+async def wait_until(condition, timeout=30.0):
+    give_up_at = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < give_up_at, "flux incomplet"
+        await asyncio.sleep(0.01)
+
+def assert_complete(stream, candles):
+    frame = stream.engines[("BTCUSDT", "1h")].to_frame()
+    np.testing.assert_array_equal(frame["timestamp"].to_numpy(), candles["timestamp"].to_numpy())
+    np.testing.assert_allclose(frame["close"].to_numpy(), candles["close"].to_numpy())
+    stored = candle_store.load("BTCUSDT", "1h", STREAM_PROVIDER, limit=None)
+    np.testing.assert_array_equal(stored["timestamp"].to_numpy(), candles["timestamp"].to_numpy())
+
+def test_stream_signals_every_closed_candle(candles):
+    backfill = Backfill(candles)
+    stream, counts = asyncio.run(replay(candles, candles.iloc[SEEDED:], backfill, ticks=2))
+    assert_complete(stream, candles)
+    assert counts == {"connections": 1, "backfills": 1}
+    assert stream.signals[("BTCUSDT", "1h")]["timestamp"] == candles["timestamp"].iloc[-1]
+
+def test_gap_in_stream_is_backfilled(candles):
+    backfill = Backfill(candles)
+    missing = SEEDED + 10
+    replayed = candles.iloc[SEEDED:].drop(index=[missing, missing + 1])
+    stream, counts = asyncio.run(replay(candles, replayed, backfill))
+    assert counts == {"connections": 1, "backfills": 2}  # Amorçage, puis reprise du trou
+    assert_complete(stream, candles)
+
+def test_reconnect_resumes_after_dropped_connection(candles):
+    backfill = Backfill(candles)
+    stream, counts = asyncio.run(replay(candles, candles.iloc[SEEDED:], backfill, drop_after=2 * 15, gap=5, ticks=1))
+    assert counts["connections"] == 2
+    assert counts["backfills"] >= 2  # Reprise des bougies sautées pendant la déconnexion
+    assert_complete(stream, candles)
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import make_candles, regime_sigma
+import optimizer
+import resampler
+
+INTERVALS = ["1h", "4h", "1d", "1w"]
+CONFIGS = [{"score_threshold": 0.2}, {"score_threshold": 0.5, "adx_threshold": 20}, {"rsi_oversold": 40, "volume_spike": 1.5}]
+
+def history(n=2400, seed=7, shock_from=None):
+    """Historique d'un symbole : intervalles dérivés d'une série 1h ; shock_from multiplie par 1.5 les prix à partir de cette barre."""
+    base = make_candles(n, seed=seed, sigma=regime_sigma(n, period=150, volatile=0.02))
+    if shock_from is not None:
+        for col in ["open", "high", "low", "close"]:
+            base.loc[shock_from:, col] *= 1.5
+    return {"BTCUSDT": {intv: resampler.resample_klines(base, intv) for intv in INTERVALS}}
+
+@pytest.mark.parametrize("n, folds", [(2400, 4), (1000, 3), (57, 6), (30, 4)])
+def test_segments_are_contiguous_and_disjoint(n, folds):
+    bounds = optimizer.segment_bounds(n, folds)
+    assert len(bounds) == folds + 1
+    assert bounds[0][0] == min(optimizer.WARMUP_BARS, n) and bounds[-1][1] == n
+    for (_, stop), (start, _) in zip(bounds, bounds[1:]):
+        assert stop == start
+    assert all(start <= stop for start, stop in bounds)
+
+def test_walk_forward_tests_only_on_later_segment():
+    rng = np.random.default_rng(0)
+    scores = rng.normal(size=(20, 5))
+    wf = optimizer.walk_forward(scores)
+    assert wf["fold"].tolist() == [1, 2, 3, 4]
+    bounds = optimizer.segment_bounds(2400, folds=4)
+    for row in wf.itertuples():
+        assert row.config == int(np.argmax(scores[:, :row.fold].mean(axis=1)))
+        assert row.test == scores[row.config, row.fold]
+        assert bounds[row.fold - 1][1] <= bounds[row.fold][0]  # Segment de test après toutes les barres d'entraînement
+        # Les scores hors échantillon (segments >= fold) n'influencent pas le choix
+        shuffled = scores.copy()
+        shuffled[:, row.fold:] = rng.normal(size=shuffled[:, row.fold:].shape)
+        assert optimizer.walk_forward(shuffled).loc[row.Index, "config"] == row.config
+
+def test_later_prices_do_not_change_earlier_segments():
+    bounds = optimizer.segment_bounds(2400)
+    last_start = bounds[-1][0]
+    base = optimizer.optimize(history(), configs=CONFIGS, workers=1)["ranking"].sort_values("config")
+    shocked = optimizer.optimize(history(shock_from=last_start), configs=CONFIGS, workers=1)["ranking"].sort_values("config")
+    in_sample = [f"segment_{i}" for i in range(optimizer.DEFAULT_FOLDS)] + ["train"]
+    pd.testing.assert_frame_equal(base[in_sample], shocked[in_sample])
+    assert not np.allclose(base["test"], shocked["test"])
+
+def test_results_are_deterministic_for_a_seed():
+    assert optimizer.random_search(samples=20, seed=3) == optimizer.random_search(samples=20, seed=3)
+    assert optimizer.random_search(samples=20, seed=3) != optimizer.random_search(samples=20, seed=4)
+    space = {"score_threshold": (0.1, 0.9), "adx_threshold": (15, 35)}
+    configs = optimizer.random_search(space, samples=4, seed=1)
+    assert configs == optimizer.random_search(space, samples=4, seed=1)
+    first = optimizer.optimize(history(), configs=configs, workers=1)
+    second = optimizer.optimize(history(), configs=configs, workers=2)
+    pd.testing.assert_frame_equal(first["ranking"], second["ranking"])
+    pd.testing.assert_frame_equal(first["walk_forward"], second["walk_forward"])
+    assert first["walk_forward_score"] == second["walk_forward_score"]
+
+def test_random_search_bounds():
+    configs = optimizer.random_search({"adx_threshold": (15, 35), "score_threshold": (0.1, 0.9), "volume_spike": [2, 3]}, samples=50)
+    assert len(configs) == 50 and len({tuple(sorted(c.items())) for c in configs}) == 50
+    assert all(isinstance(c["adx_threshold"], int) and 15 <= c["adx_threshold"] <= 35 for c in configs)
+    assert all(0.1 <= c["score_threshold"] <= 0.9 for c in configs)
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import make_candles, regime_sigma
+from indicators import calculate_indicators
+from panel_indicators import calculate_indicators_many, calculate_panel, panel_from_frames
+
+def watchlist(interval):
+    """Séries de longueurs différentes (complétées à gauche dans le panel), calmes et agitées (RSI 14 et 10)."""
+    lengths = [300, 240, 120, 45, 21, 12]
+    frames = {f"S{i}": make_candles(n, seed=i, interval=interval, sigma=0.004 if i % 2 else 0.03)
+              for i, n in enumerate(lengths)}
+    frames["FLIP"] = make_candles(300, seed=9, interval=interval, sigma=regime_sigma(300))
+    return frames
+
+@pytest.mark.parametrize("interval", ["1H", "4H", "1D", "1W"])
+def test_many_matches_per_symbol(interval):
+    frames = watchlist(interval.lower())
+    result = calculate_indicators_many(frames, interval)
+    assert list(result) == list(frames)
+    for symbol, df in frames.items():
+        pd.testing.assert_frame_equal(result[symbol], calculate_indicators(df, interval), check_exact=False, rtol=1e-9, atol=1e-9)
+
+def test_rsi_windows_differ_across_symbols():
+    _, panel = panel_from_frames(watchlist("1h"))
+    assert set(calculate_panel(panel, "1H")["RSI_WINDOW"]) == {10, 14}
+
+def test_many_converts_strings_and_replaces_existing_indicators():
+    frames = watchlist("1h")
+    frames["S0"] = frames["S0"].astype({col: str for col in ["open", "high", "low", "close", "volume"]})
+    frames["S1"] = calculate_indicators(frames["S1"], "1H")
+    frames["S1"]["RSI"] = 0.0  # Valeurs périmées à remplacer sur place
+    result = calculate_indicators_many(frames, "1H")
+    for symbol in ("S0", "S1"):
+        pd.testing.assert_frame_equal(result[symbol], calculate_indicators(frames[symbol], "1H"), check_exact=False, rtol=1e-9, atol=1e-9)
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import make_candles, regime_sigma
+import pipeline
+import resampler
+from benchmark import MACRO_DATA
+
+NOW_MS = 1_700_000_000_000
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class Warnings:
+    def __init__(self):
+        self.messages = []
+
+    def warning(self, message):
+        self.messages.append(message)
+
+@pytest.fixture
+def clock():
+    return Clock(NOW_MS / 1000)
+
+@pytest.mark.parametrize("interval", ["1h", "4h", "1d", "1w"])
+def test_klines_expire_at_interval_close(clock, interval):
+    cache = pipeline.MemoryCache(timer=clock)
+    key = ("klines", "BTCUSDT", interval, False)
+    cache.set(key, make_candles(10))
+    close = resampler.next_close_ms(interval, NOW_MS) / 1000
+    clock.now = close - 1
+    assert cache.get(key) is not None
+    clock.now = close
+    assert cache.get(key) is None
+
+def test_analysis_expires_at_shortest_interval_close(clock):
+    cache = pipeline.MemoryCache(timer=clock)
+    key = pipeline.analysis_key("BTC", "1W")
+    cache.set(key, ({"signal": "HOLD"}, {}))
+    clock.now = resampler.next_close_ms(pipeline.ANALYSIS_REFRESH_INTERVAL, NOW_MS) / 1000 - 1
+    assert cache.get(key) is not None
+    clock.now += 1
+    assert cache.get(key) is None
+
+@pytest.mark.parametrize("key, ttl", [
+    (("fundamental", "bitcoin"), 600), (("macro", "fred", "av"), 3600), (("other",), 300), ("plain", 300),
+])
+def test_other_keys_use_their_ttl(clock, key, ttl):
+    cache = pipeline.MemoryCache(ttl=300, fundamental_ttl=600, macro_ttl=3600, timer=clock)
+    cache.set(key, {"value": 1})
+    clock.now += ttl - 1
+    assert cache.get(key) == {"value": 1}
+    clock.now += 1
+    assert cache.get(key) is None
+
+def test_byte_cap_evicts_least_recently_used(clock):
+    frame = make_candles(100)
+    size = pipeline._sizeof(frame)
+    cache = pipeline.MemoryCache(max_bytes=3 * size + size // 2, timer=clock)
+    keys = [("klines", f"S{i}USDT", "1d", False) for i in range(4)]
+    for key in keys[:3]:
+        cache.set(key, make_candles(100, seed=len(key[1])))
+    assert cache.currsize == 3 * size
+    assert cache.get(keys[0]) is not None  # keys[0] devient le plus récemment utilisé
+    cache.set(keys[3], make_candles(100))
+    assert cache.get(keys[1]) is None
+    assert all(cache.get(key) is not None for key in [keys[0], keys[2], keys[3]])
+    assert cache.currsize <= 3 * size + size // 2
+
+def test_currsize_drops_expired_entries(clock):
+    cache = pipeline.MemoryCache(timer=clock)
+    cache.set(("klines", "BTCUSDT", "1h", False), make_candles(100))
+    assert cache.currsize > 0
+    clock.now = resampler.next_close_ms("1h", NOW_MS) / 1000
+    assert cache.currsize == 0
+
+def test_oversized_value_is_rejected_with_warning(clock, monkeypatch):
+    warnings = Warnings()
+    monkeypatch.setattr(pipeline, "logger", warnings)
+    small = make_candles(10)
+    cache = pipeline.MemoryCache(max_bytes=pipeline._sizeof(small) * 2, timer=clock)
+    cache.set(("klines", "BTCUSDT", "1h", False), small)
+    cache.set(("klines", "ETHUSDT", "1h", False), make_candles(1000))
+    assert cache.get(("klines", "ETHUSDT", "1h", False)) is None
+    assert cache.get(("klines", "BTCUSDT", "1h", False)) is not None  # Entrées existantes conservées
+    assert len(warnings.messages) == 1 and "volumineuse" in warnings.messages[0]
+
+def test_sizeof_counts_nested_frames():
+    frame = make_candles(100)
+    nested = ({"signal": "HOLD"}, {"1h": frame, "4h": frame})
+    assert pipeline._sizeof(nested) > 2 * int(frame.memory_usage(deep=True).sum())
+    assert pipeline._sizeof(pd.DataFrame()) < pipeline._sizeof(frame)
+
+def quoted_history(seed, price, tick, n=24 * 7 * 30):
+    """Intervalles dérivés d'une série 1h cotée au pas `tick` autour de `price`."""
+    base = make_candles(n, seed=seed, sigma=regime_sigma(n, period=90, volatile=0.01))
+    for col in ["open", "high", "low", "close"]:
+        base[col] = np.round(base[col] / 60_000 * price / tick) * tick
+    return {intv: resampler.resample_klines(base, intv) for intv in ["1h", "4h", "1d", "1w"]}
+
+@pytest.mark.parametrize("price, tick", [(60_000, 0.01), (120_000, 0.01), (0.35, 0.0001)])
+@pytest.mark.parametrize("interval", ["1H", "4H", "1D"])
+def test_compact_analysis_matches_full_precision(price, tick, interval):
+    fundamental = {"market_cap": 1.2e12, "volume_24h": 3.5e10, "tvl": 0}
+    compared = 0
+    for seed in range(6):
+        data = quoted_history(seed, price, tick)
+        full = pipeline.analyze_data("BTC", interval, dict(data), fundamental, MACRO_DATA)
+        compact = pipeline.analyze_data("BTC", interval, dict(data), fundamental, MACRO_DATA, compact=True)
+        if "error" in full:  # Série rejetée par validate_data (volatilité soudaine)
+            assert compact["error"] == full["error"]
+            continue
+        compared += 1
+        assert compact["signal"] == full["signal"], seed
+        assert compact["technical_score"] == full["technical_score"], seed
+        assert compact["technical_details"] == full["technical_details"], seed
+        for field in ["confidence", "price", "buy_price", "sell_price"]:
+            assert compact[field] == pytest.approx(full[field], rel=1e-5), (seed, field)
+    assert compared >= 4
@@ -0,0 +1,96 @@
+import json
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import HOUR_MS, make_candles
+import kline_parser
+import resampler
+from benchmark import synthetic_payload
+
+def provider_hourly(n):
+    """Bougies 1h au format Binance (toutes les colonnes), analysées comme une réponse du proxy."""
+    return kline_parser.parse("binance_proxy", "BTCUSDT", json.loads(synthetic_payload("binance_proxy", "BTCUSDT", n)))
+
+def bin_start(timestamp_ms, interval):
+    """Ouverture calendaire (UTC) de la bougie contenant timestamp_ms, comme la calcule la plateforme."""
+    moment = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
+    if interval == "4h":
+        start = moment.replace(hour=moment.hour - moment.hour % 4, minute=0, second=0, microsecond=0)
+    elif interval == "1d":
+        start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    else:
+        start = moment.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=moment.weekday())
+    return int(start.timestamp() * 1000)
+
+def reference_klines(hourly, interval):
+    """Bougies de l'intervalle agrégées ligne à ligne par bornes calendaires ; première bougie incomplète écartée."""
+    per_bin = resampler.interval_ms(interval) // HOUR_MS
+    bins = {}
+    for row in hourly.to_dict("records"):
+        bins.setdefault(bin_start(row["timestamp"], interval), []).append(row)
+    out = []
+    for i, (start, rows) in enumerate(sorted(bins.items())):
+        if i == 0 and len(rows) < per_bin:
+            continue
+        out.append({
+            "timestamp": start,
+            "open": rows[0]["open"],
+            "high": max(row["high"] for row in rows),
+            "low": min(row["low"] for row in rows),
+            "close": rows[-1]["close"],
+            "volume": sum(row["volume"] for row in rows),
+            "quote_asset_volume": sum(row["quote_asset_volume"] for row in rows),
+            "number_of_trades": sum(row["number_of_trades"] for row in rows),
+        })
+    return pd.DataFrame(out)
+
+@pytest.mark.parametrize("interval", ["4h", "1d", "1w"])
+def test_aggregation_matches_calendar_reference(interval):
+    hourly = provider_hourly(24 * 7 * 5 + 37)  # Début un dimanche midi, dernière semaine en cours
+    result = resampler.resample_klines(hourly, interval)
+    expected = reference_klines(hourly, interval)
+    np.testing.assert_array_equal(result["timestamp"].to_numpy(), expected["timestamp"].to_numpy())
+    for col in ["open", "high", "low", "close", "volume", "quote_asset_volume"]:
+        np.testing.assert_allclose(result[col].to_numpy(), expected[col].to_numpy(), rtol=1e-12, err_msg=col)
+    np.testing.assert_array_equal(result["number_of_trades"].to_numpy(), expected["number_of_trades"].to_numpy())
+    np.testing.assert_array_equal(result["close_time"].to_numpy(), result["timestamp"].to_numpy() + resampler.interval_ms(interval) - 1)
+    assert result["number_of_trades"].dtype == np.int64
+
+def test_weekly_bins_start_on_monday():
+    weekly = resampler.resample_klines(make_candles(24 * 7 * 6, seed=1), "1w")
+    assert (weekly["date"].dt.dayofweek == 0).all()
+    assert (weekly["date"].dt.hour == 0).all()
+    assert resampler.next_close_ms("1w", int(weekly["timestamp"].iloc[-1])) == weekly["close_time"].iloc[-1] + 1
+
+def test_incomplete_first_bin_dropped_last_kept():
+    monday_ms = bin_start(1_600_000_000_000, "1w") + 7 * 24 * HOUR_MS
+    aligned = make_candles(24 * 7 * 2 + 5, seed=2, start_ms=monday_ms)
+    weekly = resampler.resample_klines(aligned, "1w")
+    assert weekly["timestamp"].tolist() == [monday_ms + k * 7 * 24 * HOUR_MS for k in range(3)]  # Dernière semaine en cours conservée
+    late = aligned.iloc[3:]  # Première semaine amputée de 3 heures
+    assert resampler.resample_klines(late, "1w")["timestamp"].tolist() == weekly["timestamp"].tolist()[1:]
+    daily = resampler.resample_klines(late, "1d")
+    assert daily["timestamp"].iloc[0] == monday_ms + 24 * HOUR_MS
+
+def test_same_interval_and_invalid_targets():
+    hourly = make_candles(50)
+    pd.testing.assert_frame_equal(resampler.resample_klines(hourly, "1h"), hourly)
+    with pytest.raises(ValueError):
+        resampler.resample_klines(hourly, "90m")
+    with pytest.raises(ValueError):
+        resampler.resample_klines(hourly, "1h", base_interval="4h")  # Pas un multiple de la base
+
+def test_required_bars():
+    assert resampler.required_bars(["1h"], limit=200) == 201
+    assert resampler.required_bars(["4h", "1d"], limit=200) == 201 * 24
+    assert resampler.required_bars(["1h", "4h", "1d", "1w"], limit=200) == 201 * 168
+    assert resampler.required_bars(["1w"], limit=10, base_interval="4h") == 11 * 42
+
+@pytest.mark.parametrize("start_hour", [0, 5, 100])  # Début aligné ou non sur un lundi
+def test_required_bars_yield_limit_candles(start_hour):
+    intervals = ["1h", "4h", "1d", "1w"]
+    bars = resampler.required_bars(intervals, limit=20)
+    monday_ms = bin_start(1_600_000_000_000, "1w") + 7 * 24 * HOUR_MS
+    derived = resampler.derive_intervals(make_candles(bars, start_ms=monday_ms + start_hour * HOUR_MS), intervals, limit=20)
+    assert {intv: len(df) for intv, df in derived.items()} == dict.fromkeys(intervals, 20)
@@ -0,0 +1,71 @@
+import json
+import pandas as pd
+import pytest
+from conftest import make_candles
+import pipeline
+import resampler
+import scanner
+from benchmark import MACRO_DATA
+from symbol_registry import SymbolRegistry
+
+INTERVALS = ["1h", "4h", "1d", "1w"]
+FUNDAMENTAL_DATA = {"market_cap": 1.2e12, "volume_24h": 3.5e10, "tvl": 0}
+
+def price_data(seed):
+    base = make_candles(24 * 7 * 40, seed=seed, sigma=0.01)
+    return {intv: resampler.resample_klines(base, intv) for intv in INTERVALS}
+
+class FetchMany:
+    """fetch_many_async simulé : un seul appel attendu pour toute la liste."""
+
+    def __init__(self, data):
+        self.data = data
+        self.calls = []
+
+    async def __call__(self, symbols, fred_api_key, alpha_vantage_api_key, hedged=True, derive=False):
+        self.calls.append((list(symbols), hedged, derive))
+        return MACRO_DATA, {symbol: (self.data.get(symbol, {}), FUNDAMENTAL_DATA) for symbol in symbols}
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    path = tmp_path / "coincap_ids.json"
+    path.write_text(json.dumps({"btc": "bitcoin", "eth": "ethereum", "sol": "solana"}), encoding="utf-8")
+    registry = SymbolRegistry(str(path), fetcher=lambda: None)
+    monkeypatch.setattr(scanner, "COINCAP_ID_MAP", registry)
+    return registry
+
+@pytest.fixture
+def fetch_many(monkeypatch):
+    fetch_many = FetchMany({"BTCUSDT": price_data(1), "ETHUSDT": price_data(2), "SOLUSDT": price_data(3)})
+    monkeypatch.setattr(scanner, "fetch_many_async", fetch_many)
+    return fetch_many
+
+def test_scan_fetches_every_symbol_at_once(registry, fetch_many):
+    ranking = scanner.scan_market(["btc", "ETHUSDT", "BTC"], "4H", "fred", "av", max_workers=2, derive=True)
+    assert fetch_many.calls == [(["BTCUSDT", "ETHUSDT"], True, True)]
+    assert sorted(ranking["symbol"]) == ["BTC", "ETH"]
+
+def test_scan_defaults_to_registry_universe(registry, fetch_many):
+    ranking = scanner.scan_market(interval_input="1H", hedged=False)
+    assert fetch_many.calls == [(["BTCUSDT", "ETHUSDT", "SOLUSDT"], False, False)]
+    assert len(ranking) == 3
+
+def test_scan_rows_match_pipeline_analysis(registry, fetch_many):
+    ranking = scanner.scan_market(["BTC", "ETH", "SOL"], "1H").set_index("symbol")
+    for symbol_key in ["BTC", "ETH", "SOL"]:
+        expected = pipeline.analyze_data(symbol_key, "1H", dict(fetch_many.data[symbol_key + "USDT"]), FUNDAMENTAL_DATA, MACRO_DATA)
+        row = ranking.loc[symbol_key]
+        for field in ["signal", "confidence", "price", "buy_price", "sell_price", "technical_score", "fundamental_score", "macro_score"]:
+            assert row[field] == expected[field], field
+    assert not set(scanner.DETAIL_FIELDS) & set(ranking.columns)
+    assert "RSI_14" not in fetch_many.data["BTCUSDT"]["1h"].columns  # Données récupérées non modifiées
+
+def test_scan_ranks_signals_and_reports_errors(registry, fetch_many):
+    fetch_many.data["ETHUSDT"] = {intv: pd.DataFrame() for intv in INTERVALS}
+    ranking = scanner.scan_market(["BTC", "ETH", "SOL"], "1H")
+    assert ranking["symbol"].iloc[-1] == "ETH"
+    assert ranking["signal"].iloc[-1] == "ERROR" and isinstance(ranking["error"].iloc[-1], str)
+    ranks = ranking["signal"].map(scanner.SIGNAL_RANK).tolist()
+    assert ranks == sorted(ranks)
+    for _, group in ranking.groupby("signal"):
+        assert group["confidence"].is_monotonic_decreasing
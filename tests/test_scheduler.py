@@ -0,0 +1,61 @@
+import pytest
+import pipeline
+import resampler
+from scheduler import PrefetchScheduler
+
+HOUR = 3600.0
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    # Une minute avant une clôture 1H
+    return Clock(resampler.next_close_ms("1h", 1_700_000_000_000) / 1000 - 60)
+
+@pytest.fixture(autouse=True)
+def no_thread(monkeypatch):
+    """start() enregistre les délais de grâce sans lancer de rafraîchissement réseau."""
+    monkeypatch.setattr(PrefetchScheduler, "_loop", lambda self: None)
+
+def test_only_watched_analyses_outlive_the_close(clock):
+    cache = pipeline.MemoryCache(timer=clock)
+    scheduler = PrefetchScheduler(["BTC"], None, None, cache, intervals=["1H", "4H"]).start()
+    watched = pipeline.analysis_key("BTC", "1H")
+    unwatched = [pipeline.analysis_key("ETH", "1H"), pipeline.analysis_key("BTC", "1D"),
+                 pipeline.analysis_key("BTC", "1H", derive=True), pipeline.analysis_key("BTC", "1H", compact=True)]
+    for key in [watched] + unwatched:
+        cache.set(key, ({"signal": "HOLD"}, {}))
+    clock.now += 61  # Clôture passée, scheduler pas encore réveillé
+    assert cache.get(watched) is not None
+    assert all(cache.get(key) is None for key in unwatched)
+    clock.now += scheduler.max_delay()
+    assert cache.get(watched) is None
+    scheduler.stop()
+
+def test_grace_is_capped_for_large_watchlists(clock):
+    cache = pipeline.MemoryCache(timer=clock)
+    scheduler = PrefetchScheduler([f"S{i}" for i in range(100)], None, None, cache, intervals=["1H"])
+    assert scheduler.max_delay() > pipeline.MAX_ANALYSIS_GRACE
+    scheduler.start()
+    assert pipeline.MAX_ANALYSIS_GRACE < HOUR / 2
+    key = pipeline.analysis_key("S0", "1H")
+    cache.set(key, ({"signal": "HOLD"}, {}))
+    clock.now += 60 + pipeline.MAX_ANALYSIS_GRACE - 1
+    assert cache.get(key) is not None
+    clock.now += 2
+    assert cache.get(key) is None
+    scheduler.stop()
+
+def test_stop_restores_expiry_at_close(clock):
+    cache = pipeline.MemoryCache(timer=clock)
+    PrefetchScheduler(["BTC"], None, None, cache, intervals=["1H"]).start().stop()
+    key = pipeline.analysis_key("BTC", "1H")
+    assert cache.analysis_grace == {}
+    cache.set(key, ({"signal": "HOLD"}, {}))
+    clock.now += 61
+    assert cache.get(key) is None
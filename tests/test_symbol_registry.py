@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+import time
+import pytest
+from symbol_registry import DEFAULT_IDS, SymbolRegistry
+
+FULL_IDS = {**DEFAULT_IDS, "sol": "solana", "xrp": "xrp", "doge": "dogecoin"}
+
+class Fetcher:
+    """fetch_coincap_ids simulé : bloque jusqu'à release, compte les appels."""
+
+    def __init__(self, ids=FULL_IDS):
+        self.ids = ids
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        return self.ids
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "coincap_ids.json")
+
+def write(path, ids, age=0.0):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(ids, f)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+def wait_refreshed(registry):
+    registry._refresh_thread.join(5)
+    assert not registry._refresh_thread.is_alive()
+
+def test_cold_start_serves_defaults_without_waiting(path):
+    fetcher = Fetcher()
+    registry = SymbolRegistry(path, fetcher=fetcher, initial_timeout=5)
+    started = time.monotonic()
+    assert dict(registry) == DEFAULT_IDS
+    assert registry.resolve("SOL") == "SOL"
+    assert time.monotonic() - started < 1.0
+    fetcher.release.set()
+    wait_refreshed(registry)
+    assert dict(registry) == FULL_IDS
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == FULL_IDS
+    assert fetcher.calls == 1
+
+def test_wait_ready_blocks_until_first_refresh(path):
+    fetcher = Fetcher()
+    registry = SymbolRegistry(path, fetcher=fetcher, initial_timeout=5)
+    timer = threading.Timer(0.1, fetcher.release.set)
+    timer.start()
+    assert dict(registry.wait_ready()) == FULL_IDS
+    assert fetcher.calls == 1
+
+def test_wait_ready_gives_up_after_timeout(path):
+    fetcher = Fetcher()
+    registry = SymbolRegistry(path, fetcher=fetcher)
+    started = time.monotonic()
+    assert dict(registry.wait_ready(timeout=0.05)) == DEFAULT_IDS
+    registry.wait_ready(timeout=5)  # Une seule attente
+    assert time.monotonic() - started < 1.0
+    fetcher.release.set()
+    wait_refreshed(registry)
+
+def test_fresh_file_is_not_refreshed(path):
+    write(path, {"BTC": "bitcoin", "SOL": "solana"}, age=60)
+    fetcher = Fetcher()
+    registry = SymbolRegistry(path, ttl=3600, fetcher=fetcher)
+    assert dict(registry.wait_ready(timeout=0)) == {"btc": "bitcoin", "sol": "solana"}
+    assert registry._refresh_thread is None and fetcher.calls == 0
+
+def test_expired_file_is_served_then_refreshed_in_background(path):
+    write(path, {"btc": "bitcoin", "sol": "solana"}, age=7200)
+    fetcher = Fetcher()
+    registry = SymbolRegistry(path, ttl=3600, fetcher=fetcher)
+    assert registry["sol"] == "solana"  # Fichier périmé servi sans attendre
+    assert "doge" not in registry
+    fetcher.release.set()
+    wait_refreshed(registry)
+    assert registry["doge"] == "dogecoin"
+    assert fetcher.calls == 1
+    registry["btc"]
+    assert fetcher.calls == 1  # Rafraîchi : plus de rafraîchissement avant le prochain TTL
+
+def test_failed_refresh_keeps_ids_and_is_not_retried_on_every_access(path):
+    write(path, {"btc": "bitcoin"}, age=7200)
+    fetcher = Fetcher(ids=None)
+    fetcher.release.set()
+    registry = SymbolRegistry(path, ttl=3600, fetcher=fetcher)
+    assert registry["btc"] == "bitcoin"
+    wait_refreshed(registry)
+    for _ in range(5):
+        assert registry["btc"] == "bitcoin"
+    assert fetcher.calls == 1
+
+def test_symbol_for_reverse_index(path):
+    write(path, {"btc": "bitcoin", "sol": "solana"})
+    fetcher = Fetcher(ids={"btc": "bitcoin", "sol": "solana-v2"})
+    registry = SymbolRegistry(path, ttl=3600, fetcher=fetcher)
+    assert registry.symbol_for("solana") == "sol"
+    assert registry.symbol_for("dogecoin") is None
+    assert registry.resolve("BTC") == "bitcoin" and registry.resolve("bitcoin") == "bitcoin"
+    fetcher.release.set()
+    assert registry.refresh()
+    assert registry.symbol_for("solana") is None
+    assert registry.symbol_for("solana-v2") == "sol"
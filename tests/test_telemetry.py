@@ -0,0 +1,108 @@
+import json
+import re
+import pytest
+import telemetry
+
+METRIC = telemetry.METRIC_NAME
+# Ligne d'échantillon du format texte Prometheus 0.0.4 : nom{labels} valeur
+SAMPLE = re.compile(r'^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)\{(?P<labels>.*)\} (?P<value>\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\\n]|\\["\\n])*)"(,|$)')
+
+def parse_labels(text):
+    labels, position = {}, 0
+    while position < len(text):
+        match = LABEL.match(text, position)
+        assert match, f"labels invalides : {text[position:]}"
+        labels[match.group(1)] = re.sub(r"\\(.)", lambda m: "\n" if m.group(1) == "n" else m.group(1), match.group(2))
+        position = match.end()
+    return labels
+
+def parse_exposition(text):
+    """Échantillons {(nom, labels triés): valeur} après vérification des lignes HELP/TYPE."""
+    assert text.endswith("\n")
+    lines = text.rstrip("\n").split("\n")
+    assert lines[0].startswith(f"# HELP {METRIC} ")
+    assert lines[1] == f"# TYPE {METRIC} histogram"
+    samples = {}
+    for line in lines[2:]:
+        match = SAMPLE.match(line)
+        assert match, f"ligne invalide : {line!r}"
+        labels = parse_labels(match.group("labels"))
+        samples[(match.group("name"), tuple(sorted(labels.items())))] = float(match.group("value"))
+    return samples
+
+@pytest.fixture(autouse=True)
+def clean(monkeypatch):
+    monkeypatch.setattr(telemetry, "ENABLED", True)
+    telemetry.reset()
+    yield
+    telemetry.reset()
+
+def record_sample():
+    for seconds in [0.005, 0.03, 0.03, 0.2, 3.0, 42.0]:
+        telemetry.record("fetch_klines", seconds, attributes={"provider": "binance_proxy"})
+    telemetry.record("analysis", 0.07)
+    telemetry.record("fetch", 0.2, attributes={"provider": 'odd"host\\name\nx'})
+
+def test_prometheus_histograms_are_cumulative():
+    record_sample()
+    samples = parse_exposition(telemetry.export_prometheus())
+    labels = (("provider", "binance_proxy"), ("stage", "fetch_klines"))
+    bounds = ["+Inf" if bound == float("inf") else f"{bound:g}" for bound in telemetry.LATENCY_BUCKETS]
+    counts = [samples[(f"{METRIC}_bucket", tuple(sorted(labels + (("le", le),))))] for le in bounds]
+    assert counts == [1, 3, 3, 4, 4, 4, 4, 5, 5, 6]
+    assert counts == sorted(counts)
+    assert samples[(f"{METRIC}_count", labels)] == 6 == counts[-1]
+    assert samples[(f"{METRIC}_sum", labels)] == pytest.approx(45.265)
+    assert samples[(f"{METRIC}_count", (("provider", ""), ("stage", "analysis")))] == 1
+
+def test_prometheus_label_values_are_escaped():
+    record_sample()
+    samples = parse_exposition(telemetry.export_prometheus())
+    labels = (("provider", 'odd"host\\name\nx'), ("stage", "fetch"))
+    assert samples[(f"{METRIC}_count", labels)] == 1
+    assert len({key[1] for key in samples if key[0] == f"{METRIC}_count"}) == 3
+
+def test_prometheus_series_are_sorted_and_complete():
+    record_sample()
+    text = telemetry.export_prometheus()
+    series = [line for line in text.splitlines() if not line.startswith("#")]
+    per_histogram = len(telemetry.LATENCY_BUCKETS) + 2
+    assert len(series) == 3 * per_histogram
+    stages = [re.search(r'stage="([^"]*)"', line).group(1) for line in series[::per_histogram]]
+    assert stages == sorted(stages)
+    assert telemetry.export_prometheus().count("# TYPE") == 1
+
+def test_empty_prometheus_export():
+    assert parse_exposition(telemetry.export_prometheus()) == {}
+
+def test_json_export(tmp_path):
+    record_sample()
+    with telemetry.span("parse", provider="kraken", rows=200) as attributes:
+        attributes["bytes"] = 1024
+    path = tmp_path / "telemetry.json"
+    text = telemetry.export_json(str(path))
+    assert path.read_text(encoding="utf-8") == text
+    payload = json.loads(text)
+    assert payload["buckets"][-1] == "inf" and len(payload["buckets"]) == len(telemetry.LATENCY_BUCKETS)
+    histograms = {(h["stage"], h["provider"]): h for h in payload["histograms"]}
+    assert histograms[("fetch_klines", "binance_proxy")]["count"] == 6
+    assert histograms[("fetch_klines", "binance_proxy")]["buckets"][-1] == 6
+    assert [h["stage"] for h in payload["histograms"]] == sorted(h["stage"] for h in payload["histograms"])
+    span = payload["spans"][-1]
+    assert span["stage"] == "parse" and span["status"] == "ok" and span["rows"] == 200 and span["bytes"] == 1024
+    assert len(payload["spans"]) == 9
+
+def test_prometheus_export_written_atomically(tmp_path):
+    record_sample()
+    path = tmp_path / "crypto_swinger.prom"
+    text = telemetry.export_prometheus(str(path))
+    assert path.read_text(encoding="utf-8") == text
+    assert not (tmp_path / "crypto_swinger.prom.tmp").exists()
+
+def test_failed_span_is_recorded_with_error_status():
+    with pytest.raises(RuntimeError):
+        with telemetry.span("fetch", provider="kraken"):
+            raise RuntimeError("boom")
+    assert telemetry.recent_spans("fetch")[-1]["status"] == "error"
+    assert telemetry.histograms()[("fetch", "kraken")]["count"] == 1